@@ -1,22 +1,165 @@
 #!/usr/bin/env python3
-import json, os, time
+"""Monthly Actions budget guard.
+
+Run history is an append-only JSON Lines file. Its first line is a fixed-width
+header holding the running totals, so the pre-run check reads HEADER_SIZE
+bytes whatever the number of runs, and a post-run update is one append plus an
+in-place header rewrite under an exclusive flock (concurrent runs serialize
+instead of clobbering each other). When a new month starts, the previous
+month's records are compacted into one summary line in ARCHIVE_FILE.
+"""
+import fcntl, json, os, sys, time
 from pathlib import Path
 from datetime import datetime
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "scripts"))
+import ci_trace
+
 BUDGET_EUR = float(os.getenv("BUDGET_EUR", "200"))
 COST_PER_MIN_EUR = float(os.getenv("COST_PER_MIN_EUR", "0.01"))  # estimation
-BUDGET_FILE = Path(os.getenv("BUDGET_FILE", ".github/budget/actions-budget.json"))
+BUDGET_FILE = Path(os.getenv("BUDGET_FILE", ".github/budget/actions-budget.jsonl"))
+ARCHIVE_FILE = BUDGET_FILE.with_name(BUDGET_FILE.stem + ".archive.jsonl")
+LEGACY_FILE = Path(os.getenv("BUDGET_LEGACY_FILE") or BUDGET_FILE.with_suffix(".json"))
 OUT = os.getenv("GITHUB_OUTPUT")
 SUM = os.getenv("GITHUB_STEP_SUMMARY")
 
-def load():
-    if BUDGET_FILE.exists():
-        return json.loads(BUDGET_FILE.read_text(encoding="utf-8"))
-    return {"month": None, "total_eur": 0.0, "runs": []}
+VERSION = 1
+HEADER_SIZE = 128  # bytes, newline included
+
+def empty_header(month):
+    # "size" is the file length the totals account for; a mismatch means a
+    # writer died between appending its record and updating the header
+    return {"v": VERSION, "month": month, "total_eur": 0.0, "runs": 0, "minutes": 0.0, "size": HEADER_SIZE}
+
+def encode_header(h):
+    raw = json.dumps(h, separators=(",", ":")).encode()
+    if len(raw) >= HEADER_SIZE:
+        raise ValueError(f"budget header too long ({len(raw)} bytes)")
+    return raw.ljust(HEADER_SIZE - 1) + b"\n"
+
+def read_header(f):
+    """Header of the store; None if the file is too short, unreadable or of another version."""
+    f.seek(0)
+    raw = f.read(HEADER_SIZE)
+    if len(raw) < HEADER_SIZE:
+        return None
+    try:
+        h = json.loads(raw)
+    except ValueError:
+        return None  # torn or corrupt: the caller rebuilds it from the records
+    return h if isinstance(h, dict) and h.get("v") == VERSION else None
+
+def has_legacy():
+    # BUDGET_FILE pointed at the old path is the live store, never something to migrate
+    return LEGACY_FILE.exists() and LEGACY_FILE.resolve() != BUDGET_FILE.resolve()
+
+def add(h, r):
+    h["runs"] += 1
+    h["total_eur"] = round(h["total_eur"] + float(r.get("cost_eur", 0)), 2)
+    h["minutes"] = round(h["minutes"] + float(r.get("duration_min", 0)), 2)
+
+def append(f, h, r):
+    f.seek(0, os.SEEK_END)
+    f.write(json.dumps(r, separators=(",", ":")).encode() + b"\n")
+    add(h, r)
+    h["size"] = f.tell()
 
-def save(d):
+def write_header(f, h):
+    f.seek(0)
+    f.write(encode_header(h))
+    f.flush()
+
+def rebuild_header(f, month=None, repair=True):
+    """Recompute totals from the records (after a crash between append and header write).
+
+    Without month (the header itself was lost), the month is the first record's;
+    with repair, a torn final record is cut off.
+    """
+    h = empty_header(month)
+    f.seek(HEADER_SIZE)
+    for line in f:
+        if not line.endswith(b"\n"):
+            break  # torn final write
+        if line.strip():
+            try:
+                r = json.loads(line)
+            except ValueError:
+                raise ValueError(f"{BUDGET_FILE}: unreadable record at byte {h['size']}, not a budget log") from None
+            h["month"] = h["month"] or str(r.get("ts_utc", ""))[:7] or None
+            add(h, r)
+        h["size"] += len(line)
+    h["month"] = h["month"] or datetime.utcnow().strftime("%Y-%m")
+    if repair:
+        f.truncate(h["size"])
+    return h
+
+def archive(h):
+    """Append the compacted summary of a finished month."""
+    if not h or not h["runs"]:
+        return
+    with open(ARCHIVE_FILE, "a", encoding="utf-8") as a:
+        a.write(json.dumps({"month": h["month"], "total_eur": h["total_eur"], "runs": h["runs"],
+                            "minutes": h["minutes"]}, separators=(",", ":")) + "\n")
+
+def migrate(f, month):
+    """Import the legacy whole-file JSON store once, then keep it as .migrated."""
+    d = json.loads(LEGACY_FILE.read_text(encoding="utf-8"))
+    h = empty_header(d.get("month") or month)
+    f.truncate(0)
+    write_header(f, h)
+    for r in d.get("runs", []):
+        append(f, h, r)
+    h["total_eur"] = round(float(d.get("total_eur", 0.0)), 2)
+    write_header(f, h)
+    LEGACY_FILE.rename(LEGACY_FILE.with_suffix(".json.migrated"))
+    return h
+
+def open_store(month):
+    """Open the store locked for update; returns (file, header for the current month)."""
     BUDGET_FILE.parent.mkdir(parents=True, exist_ok=True)
-    BUDGET_FILE.write_text(json.dumps(d, indent=2), encoding="utf-8")
+    f = os.fdopen(os.open(BUDGET_FILE, os.O_RDWR | os.O_CREAT, 0o644), "r+b")
+    fcntl.flock(f, fcntl.LOCK_EX)
+    h = read_header(f)
+    size = f.seek(0, os.SEEK_END)
+    if h is None and size >= HEADER_SIZE:
+        # records behind a corrupt or half-written header
+        h = rebuild_header(f)
+        write_header(f, h)
+    if h is None and has_legacy():
+        h = migrate(f, month)
+    if h is None:
+        f.truncate(0)
+        h = empty_header(month)
+        write_header(f, h)
+    elif size != h["size"]:
+        h = rebuild_header(f, h["month"])
+    if h["month"] != month:
+        # month rollover: compact into the archive and start over
+        archive(h)
+        f.truncate(0)
+        h = empty_header(month)
+        write_header(f, h)
+    return f, h
+
+def peek(month):
+    """Current month total without parsing the records (O(1))."""
+    try:
+        with open(BUDGET_FILE, "rb") as f:
+            fcntl.flock(f, fcntl.LOCK_SH)
+            h = read_header(f)
+            if h is None and f.seek(0, os.SEEK_END) >= HEADER_SIZE:
+                h = rebuild_header(f, repair=False)
+    except FileNotFoundError:
+        h = None
+    except ValueError as e:
+        print(f"⚠️ budget illisible: {e}", file=sys.stderr)
+        h = None
+    if h is None and has_legacy():
+        d = json.loads(LEGACY_FILE.read_text(encoding="utf-8"))
+        h = {**empty_header(d.get("month")), "total_eur": float(d.get("total_eur", 0.0)), "runs": len(d.get("runs", []))}
+    if h is None or h["month"] != month:
+        return empty_header(month)
+    return h
 
 def out(k,v):
     if OUT:
@@ -31,46 +174,62 @@ def summ(lines):
 def main():
     now = datetime.utcnow()
     month = now.strftime("%Y-%m")
-    d = load()
-    if d.get("month") != month:
-        d = {"month": month, "total_eur": 0.0, "runs": []}
 
     phase = os.getenv("PHASE", "pre")
+    ci_trace.install(f"budget_guard:{phase}")
     if phase == "pre":
-        skip = d["total_eur"] >= BUDGET_EUR
+        with ci_trace.span("read header"):
+            h = peek(month)
+        skip = h["total_eur"] >= BUDGET_EUR
         out("budget_skip_heavy", "true" if skip else "false")
-        out("budget_total_eur", f"{d['total_eur']:.2f}")
+        out("budget_total_eur", f"{h['total_eur']:.2f}")
         summ([
             "## 💸 Budget guard (pré-run)",
             f"- Mois: **{month}**",
-            f"- Total actuel: **{d['total_eur']:.2f} €** / **{BUDGET_EUR:.2f} €**",
+            f"- Total actuel: **{h['total_eur']:.2f} €** / **{BUDGET_EUR:.2f} €** ({h['runs']} run(s))",
             f"- Heavy steps: **{'SKIP' if skip else 'RUN'}**",
         ])
         return
 
     start_ts = float(os.getenv("BUDGET_START_TS", "0") or "0")
     dur_min = max(0.0, (time.time() - start_ts) / 60.0)
-    cost = round(dur_min * COST_PER_MIN_EUR, 2)
+    run_id = os.getenv("GITHUB_RUN_ID","")
+    # actual spend: spooled LLM token usage + runner minutes priced by costs.json
+    import cost_ledger  # post only: the pre-run check stays a header read
+    try:
+        cost_ledger.spool_minutes("workflow", dur_min)
+        with ci_trace.span("ledger fold"):
+            actual = cost_ledger.fold().get(run_id)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"⚠️ cost ledger indisponible: {e}", file=sys.stderr)
+        actual = None
+    source = "ledger" if actual is not None else "estimate"
+    cost = round(actual if actual is not None else dur_min * COST_PER_MIN_EUR, 2)
 
     entry = {
         "ts_utc": now.isoformat()+"Z",
-        "run_id": os.getenv("GITHUB_RUN_ID",""),
+        "run_id": run_id,
         "ref": os.getenv("GITHUB_REF",""),
         "duration_min": round(dur_min,2),
         "cost_eur": cost,
+        "source": source,
     }
-    d["runs"].append(entry)
-    d["total_eur"] = round(float(d["total_eur"]) + cost, 2)
-    save(d)
+    with ci_trace.span("append run"):
+        f, h = open_store(month)
+        with f:
+            append(f, h, entry)
+            f.flush()
+            write_header(f, h)
 
-    over = d["total_eur"] >= BUDGET_EUR
+    over = h["total_eur"] >= BUDGET_EUR
     out("budget_over", "true" if over else "false")
-    out("budget_total_eur", f"{d['total_eur']:.2f}")
+    out("budget_total_eur", f"{h['total_eur']:.2f}")
     summ([
         "## 💸 Budget guard (post-run)",
         f"- Durée: **{entry['duration_min']} min**",
-        f"- Coût estimé run: **{entry['cost_eur']} €** (rate={COST_PER_MIN_EUR} €/min)",
-        f"- Total mois: **{d['total_eur']:.2f} €** / **{BUDGET_EUR:.2f} €**",
+        f"- Coût run: **{entry['cost_eur']} €** ("
+        + ("tokens LLM + minutes runner, costs.json" if source == "ledger" else f"estimation, rate={COST_PER_MIN_EUR} €/min") + ")",
+        f"- Total mois: **{h['total_eur']:.2f} €** / **{BUDGET_EUR:.2f} €**",
         f"- Statut: **{'DÉPASSÉ' if over else 'OK'}**",
     ])
 
@@ -3,92 +3,85 @@
 Phase 3: Évalue les changements et décide du rollback
 """
 import os
+import sys
 import json
-import requests
+from datetime import datetime, timezone
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "scripts"))
+import ci_trace
+import cost_ledger
+import evaluate_metrics
+import score_series
+
 API_KEY = os.environ.get("ANTHROPIC_API_KEY")
+MODEL = "claude-sonnet-4-20250514"
 
 def call_claude(prompt):
     if not API_KEY:
         return None
-    
+    import llm_cache
+    import llm_http
+
+    cache = llm_cache.ResponseCache()
+    key = cache.key(MODEL, "", prompt, max_tokens=2048)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
     try:
-        response = requests.post(
-            "https://api.anthropic.com/v1/messages",
-            headers={
-                "x-api-key": API_KEY,
-                "anthropic-version": "2023-06-01",
-                "content-type": "application/json"
-            },
-            json={
-                "model": "claude-sonnet-4-20250514",
-                "max_tokens": 2048,
-                "messages": [{"role": "user", "content": prompt}]
-            },
-            timeout=60
-        )
-        response.raise_for_status()
-        return response.json()["content"][0]["text"]
-    except:
+        text = llm_http.AnthropicClient(API_KEY).message(MODEL, prompt, max_tokens=2048)
+    except llm_http.LLMError as e:
+        print(f"⚠️ Appel Claude échoué: {e}", file=sys.stderr)
         return None
+    cache.put(key, text, model=MODEL)
+    return text
 
-def load_previous_score():
-    """Charge le score précédent"""
-    history_file = Path(".github/reports/score_history.json")
-    if history_file.exists():
-        history = json.loads(history_file.read_text())
-        if history:
-            return history[-1].get("score", 50)
-    return 50
-
-def save_score(score):
-    """Sauvegarde le score dans l'historique"""
-    history_file = Path(".github/reports/score_history.json")
-    history = []
-    if history_file.exists():
-        try:
-            history = json.loads(history_file.read_text())
-        except:
-            pass
-    
-    from datetime import datetime
-    history.append({
-        "timestamp": datetime.now().isoformat(),
-        "score": score
-    })
-    
-    # Garder les 100 derniers
-    history = history[-100:]
-    history_file.write_text(json.dumps(history, indent=2))
+def read_metrics(metrics_file):
+    """Scores par métrique de current_metrics.json (+ Total) ; 50 par défaut"""
+    if not metrics_file.exists():
+        return {"Total": 50}
+    metrics = json.loads(metrics_file.read_text())
+    values = {m["name"]: m["score"] for m in metrics.get("metrics", []) if "name" in m and "score" in m}
+    values["Total"] = metrics.get("total_score", 50)
+    return values
 
 def main():
+    ci_trace.install("evaluate_changes")
     print("="*60)
     print("📊 PHASE 3: ÉVALUATION DES CHANGEMENTS")
     print("="*60)
     
-    # Charger métriques actuelles
+    # Calculer les métriques actuelles (seules celles dont les entrées ont changé)
     metrics_file = Path(".github/reports/current_metrics.json")
-    if metrics_file.exists():
-        metrics = json.loads(metrics_file.read_text())
-        score_after = metrics.get("total_score", 50)
-    else:
-        score_after = 50
+    with ci_trace.span("metrics"):
+        evaluate_metrics.write_metrics(output=metrics_file)
+    values = read_metrics(metrics_file)
+    score_after = values["Total"]
     
-    score_before = load_previous_score()
+    with ci_trace.span("score series"):
+        score_series.migrate()
+        score_before = score_series.previous_total(score_series.load())
+        should_rollback, trend = score_series.record_and_assess(values)
+    total = trend[-1]
     
     print(f"📈 Score avant: {score_before}")
     print(f"📈 Score après: {score_after}")
+    if "threshold" in total:
+        print(f"📉 Tendance: EWMA {total['baseline']}, bruit ±{total['noise']}, seuil {total['threshold']}")
+    for t in trend[:-1]:
+        if t["low"]:
+            print(f"   ↘ {t['metric']}: {t['value']:.1f} < {t['threshold']} (EWMA {t['baseline']})")
     
-    # Décision rollback
-    should_rollback = score_after < score_before - 5  # Tolérance de 5 points
-    
+    # Décision rollback : deux runs consécutifs sous EWMA - K·bruit
     if should_rollback:
-        print(f"⚠️ RÉGRESSION: {score_before} → {score_after} (diff: {score_after - score_before})")
-        print("   → ROLLBACK recommandé")
+        since = datetime.fromtimestamp(total["revert_ts"], timezone.utc).strftime("%Y-%m-%d %H:%M")
+        print(f"⚠️ RÉGRESSION confirmée: {score_before} → {score_after} (EWMA {total['baseline']})")
+        print(f"   → ROLLBACK recommandé, depuis le run du {since} UTC")
+    elif total["low"]:
+        print(f"⚠️ Score bas isolé: {score_before} → {score_after}, à confirmer au prochain run")
     else:
         print(f"✅ Amélioration ou stable: {score_before} → {score_after}")
-        save_score(score_after)
     
     # Output pour GitHub Actions
     github_output = os.environ.get("GITHUB_OUTPUT", "/dev/null")
@@ -96,8 +89,12 @@ def main():
         f.write(f"score_before={score_before}\n")
         f.write(f"score_after={score_after}\n")
         f.write(f"should_rollback={'true' if should_rollback else 'false'}\n")
+        if should_rollback:
+            # premier run de la régression : le workflow annule les commits depuis cet instant
+            f.write(f"rollback_since={total['revert_ts']}\n")
     
     print(f"\n{'❌ ROLLBACK' if should_rollback else '✅ COMMIT'}")
+    cost_ledger.spool_calls("evaluate_changes")
 
 if __name__ == "__main__":
     main()
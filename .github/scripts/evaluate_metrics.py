@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+Calcule les métriques de current_metrics.json à partir du dépôt.
+
+Un évaluateur par métrique, chacun déclarant les fichiers qu'il lit :
+- Server Authority : RPC / écritures d'état réseau dans Assets/Scripts
+- Structure Discovery : scènes Assets/Scenes/*.unity, scripts manquants,
+  scènes du build
+- Network Flow : nommage, appartenance et appels des RPC
+- Build Ready : dernier log Unity de UNITY_LOG_DIR
+- Code Quality : syntaxe C#, méthodes/fichiers trop longs, TODO
+
+Le résultat de chaque évaluateur est mis en cache (.ci_cache/metrics_cache.json)
+contre l'empreinte des fichiers lus (sha1, raccourci mtime+taille) : seules les
+métriques dont les entrées ont changé sont recalculées, en parallèle dans un
+pool de processus.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "scripts"))
+import ci_trace
+
+METRICS_FILE = Path(".github/reports/current_metrics.json")
+CACHE_FILE = Path(os.environ.get("METRICS_CACHE", ".ci_cache/metrics_cache.json"))
+LOG_DIR = os.environ.get("UNITY_LOG_DIR", ".ci_logs")
+SCRIPTS_DIR = "Assets/Scripts"
+SCENES_DIR = "Assets/Scenes"
+# Changer VERSION invalide tous les résultats en cache (règles de score modifiées).
+VERSION = "1"
+
+LONG_METHOD = 80
+LONG_FILE = 600
+SERVER_GUARD_RE = re.compile(r"\b(IsServer|IsHost)\b")
+STATE_WRITE_RE = re.compile(r"\.(Spawn|SpawnWithOwnership|Despawn|ChangeOwnership|RemoveOwnership)\s*\(|\.Value\s*=[^=]")
+OWNER_WRITE_RE = re.compile(r"NetworkVariableWritePermission\.Owner")
+TODO_RE = re.compile(r"//\s*(TODO|FIXME|HACK)\b")
+BUILD_SCENE_RE = re.compile(r"enabled: 1\s*\n\s*path: (\S+\.unity)")
+
+Result = Dict  # {"score": int, "details": str, "improvements": [str]}
+
+
+# ----------------------------------------------------------------------
+# Évaluateurs : fonctions pures (root, fichiers) -> Result, exécutées dans le pool
+# ----------------------------------------------------------------------
+
+def _read(root: Path, rel: str) -> str:
+    return (root / rel).read_text(encoding="utf-8", errors="replace")
+
+
+def _symbols(root: Path, files: List[str]) -> Dict[str, Tuple[List[str], list]]:
+    import symbol_index
+    out = {}
+    for rel in files:
+        src = _read(root, rel)
+        out[rel] = (src.splitlines(), symbol_index.scan(src))
+    return out
+
+
+def _rpcs(parsed) -> List[Tuple[str, object, List[str]]]:
+    """(fichier, symbole, lignes attribut + corps) pour chaque méthode [ServerRpc]/[ClientRpc]/[Rpc]."""
+    out = []
+    for rel, (lines, syms) in parsed.items():
+        for s in syms:
+            if s.kind == "method" and any(a in ("ServerRpc", "ClientRpc", "Rpc") for a in s.attrs):
+                out.append((rel, s, lines[max(0, s.line - 4):s.end]))
+    return out
+
+
+def _ratio(ok: int, total: int) -> float:
+    return ok / total if total else 1.0
+
+
+def server_authority(root: Path, files: List[str]) -> Result:
+    parsed = _symbols(root, [f for f in files if f.endswith(".cs")])
+    rpcs = [(rel, s, body) for rel, s, body in _rpcs(parsed) if "ServerRpc" in s.attrs]
+    # RequireOwnership = false n'est sûr que si l'expéditeur est vérifié
+    unchecked = [f"{s.parent}.{s.name}" for _, s, body in rpcs
+                 if any("RequireOwnership = false" in l for l in body) and not any("SenderClientId" in l for l in body)]
+    writes = unguarded = 0
+    where: List[str] = []
+    owner_vars = 0
+    for rel, (lines, syms) in parsed.items():
+        owner_vars += sum(1 for l in lines if OWNER_WRITE_RE.search(l))
+        for s in syms:
+            if s.kind != "method" or "ServerRpc" in s.attrs:
+                continue
+            body = lines[s.line - 1:s.end]
+            if any(STATE_WRITE_RE.search(l) for l in body):
+                writes += 1
+                if not any(SERVER_GUARD_RE.search(l) for l in body):
+                    unguarded += 1
+                    where.append(f"{s.parent}.{s.name}")
+    score = 100 * (0.5 * _ratio(len(rpcs) - len(unchecked), len(rpcs)) + 0.3 * _ratio(writes - unguarded, writes)
+                   + 0.2 * max(0.0, 1 - 0.25 * owner_vars))
+    improvements = []
+    if unchecked:
+        improvements.append(f"Vérifier SenderClientId dans {', '.join(unchecked[:5])}")
+    if where:
+        improvements.append(f"Garder par IsServer les écritures réseau de {', '.join(where[:5])}")
+    if owner_vars:
+        improvements.append(f"{owner_vars} NetworkVariable modifiable(s) par le client (WritePermission.Owner)")
+    return {"score": round(score), "improvements": improvements,
+            "details": f"{len(rpcs)} ServerRpc dont {len(unchecked)} sans contrôle d'expéditeur, "
+                       f"{unguarded}/{writes} méthode(s) d'écriture réseau sans garde serveur, "
+                       f"{owner_vars} NetworkVariable owner-write"}
+
+
+def network_flow(root: Path, files: List[str]) -> Result:
+    parsed = _symbols(root, [f for f in files if f.endswith(".cs")])
+    bases: Dict[str, List[str]] = {}
+    for _, syms in parsed.values():
+        for s in syms:
+            if s.is_type:
+                bases.setdefault(s.name, []).extend(s.bases)
+
+    def networked(name: str, seen=()) -> bool:
+        if name in ("NetworkBehaviour", "NetworkBehavior"):
+            return True
+        return name not in seen and any(networked(b, seen + (name,)) for b in bases.get(name, []))
+
+    rpcs = _rpcs(parsed)
+    text = "\n".join("\n".join(lines) for lines, _ in parsed.values())
+    misnamed, orphan, unused = [], [], []
+    for _, s, _ in rpcs:
+        attr = next(a for a in s.attrs if a in ("ServerRpc", "ClientRpc", "Rpc"))
+        if not s.name.endswith(attr):
+            misnamed.append(s.name)
+        if not networked(s.parent):
+            orphan.append(f"{s.parent}.{s.name}")
+        if len(re.findall(rf"\b{re.escape(s.name)}\s*\(", text)) < 2:  # la déclaration seule
+            unused.append(s.name)
+    n = len(rpcs)
+    score = 100 * (0.3 * _ratio(n - len(misnamed), n) + 0.3 * _ratio(n - len(orphan), n) + 0.4 * _ratio(n - len(unused), n))
+    improvements = []
+    if misnamed:
+        improvements.append(f"Suffixe Rpc manquant : {', '.join(misnamed[:5])}")
+    if orphan:
+        improvements.append(f"RPC hors NetworkBehaviour : {', '.join(orphan[:5])}")
+    if unused:
+        improvements.append(f"RPC jamais appelées : {', '.join(unused[:5])}")
+    return {"score": round(score), "improvements": improvements,
+            "details": f"{n} RPC : {len(misnamed)} mal nommée(s), {len(orphan)} hors NetworkBehaviour, {len(unused)} jamais appelée(s)"}
+
+
+def structure_discovery(root: Path, files: List[str]) -> Result:
+    import unity_yaml
+    scenes = [f for f in files if f.endswith(".unity")]
+    known, prefabs = set(), {}
+    for rel in files:
+        if rel.endswith(".meta"):
+            m = unity_yaml.META_GUID_RE.search(_read(root, rel)[:512])
+            if m and rel.endswith(".cs.meta"):
+                known.add(m.group(1))
+            elif m:
+                prefabs[m.group(1)] = rel[:-5]
+    records: Dict[str, Dict] = {}
+
+    def components(rel: str, seen: Tuple[str, ...] = ()) -> List[Dict]:
+        """Composants du fichier et des prefabs instanciés (récursivement)."""
+        if rel not in records:
+            records[rel] = unity_yaml.parse_file(root / rel)
+        rec = records[rel]
+        comps = list(rec["components"].values())
+        for pi in rec["prefabs"]:
+            src = prefabs.get(pi["guid"])
+            if src and src not in seen:
+                comps += components(src, seen + (rel,))
+        return comps
+
+    build = next((f for f in files if f.endswith("EditorBuildSettings.asset")), None)
+    in_build = set(BUILD_SCENE_RE.findall(_read(root, build))) if build else set()
+    parsed = missing = behaviours = 0
+    broken: List[str] = []
+    has_network_manager = False
+    for rel in scenes:
+        try:
+            comps = components(rel)
+        except (OSError, ValueError, AttributeError):
+            broken.append(rel)
+            continue
+        parsed += 1
+        for comp in comps:
+            if comp["type"] != "MonoBehaviour":
+                continue
+            behaviours += 1
+            has_network_manager |= comp.get("class") == "NetworkManager"
+            if not comp.get("class") and comp.get("script_guid") not in known:
+                missing += 1
+    outside = sorted(set(scenes) - in_build)
+    parts = [(0.3, _ratio(parsed, len(scenes))), (0.3, _ratio(behaviours - missing, behaviours)),
+             (0.2, float(has_network_manager))]
+    if build:  # sans EditorBuildSettings.asset dans le dépôt, le critère n'est pas évaluable
+        parts.append((0.2, _ratio(len(scenes) - len(outside), len(scenes))))
+    score = 100 * sum(w * r for w, r in parts) / sum(w for w, _ in parts)
+    improvements = []
+    if broken:
+        improvements.append(f"Scènes illisibles : {', '.join(broken)}")
+    if missing:
+        improvements.append(f"{missing} composant(s) avec script manquant")
+    if build and outside:
+        improvements.append(f"Scènes hors Build Settings : {', '.join(Path(s).stem for s in outside)}")
+    if not has_network_manager:
+        improvements.append("Aucun NetworkManager dans les scènes")
+    in_build_text = f"{len(scenes) - len(outside)} dans le build" if build else "Build Settings absents"
+    return {"score": round(score), "improvements": improvements,
+            "details": f"{parsed}/{len(scenes)} scène(s) lue(s), {missing}/{behaviours} script(s) manquant(s), "
+                       f"{in_build_text}, NetworkManager {'présent' if has_network_manager else 'absent'}"}
+
+
+def build_ready(root: Path, files: List[str]) -> Result:
+    import unity_log
+    if not files:
+        return {"score": 50, "details": f"Aucun log Unity dans {LOG_DIR}", "improvements": ["Lancer un build Unity"]}
+    triage = unity_log.triage_file(str(root / files[0]), tail_lines=1)
+    c = triage.counts()
+    penalty = (40 * c.get("compile", 0) + 20 * c.get("build", 0) + 10 * c.get("exception", 0)
+               + 10 * c.get("test", 0) + min(20, c.get("warning", 0)))
+    first = triage.ranked()[:1]
+    return {"score": max(0, 100 - penalty),
+            "improvements": [f"Corriger : {first[0].text[:120]}"] if first else [],
+            "details": f"{Path(files[0]).name} : " + (", ".join(f"{v} {k}" for k, v in sorted(c.items())) or "aucune erreur")}
+
+
+def code_quality(root: Path, files: List[str]) -> Result:
+    import cs_syntax
+    parsed = _symbols(root, files)
+    bad_syntax, big, long_methods, methods, todos = [], [], [], 0, 0
+    for rel, (lines, syms) in parsed.items():
+        if cs_syntax.check_source("\n".join(lines)):
+            bad_syntax.append(rel)
+        if len(lines) > LONG_FILE:
+            big.append(Path(rel).name)
+        todos += sum(1 for l in lines if TODO_RE.search(l))
+        for s in syms:
+            if s.kind == "method":
+                methods += 1
+                if s.end - s.line > LONG_METHOD:
+                    long_methods.append(f"{s.parent}.{s.name}")
+    n = len(parsed)
+    score = 100 * (0.4 * _ratio(n - len(bad_syntax), n) + 0.25 * max(0.0, 1 - 5 * len(long_methods) / max(methods, 1))
+                   + 0.2 * _ratio(n - len(big), n) + 0.15 * max(0.0, 1 - todos / max(n, 1)))
+    improvements = []
+    if bad_syntax:
+        improvements.append(f"Erreurs de syntaxe : {', '.join(bad_syntax[:5])}")
+    if long_methods:
+        improvements.append(f"Découper les méthodes > {LONG_METHOD} lignes : {', '.join(long_methods[:5])}")
+    if big:
+        improvements.append(f"Fichiers > {LONG_FILE} lignes : {', '.join(big[:5])}")
+    return {"score": round(score), "improvements": improvements,
+            "details": f"{n} fichier(s), {len(bad_syntax)} avec erreur de syntaxe, {len(long_methods)}/{methods} "
+                       f"méthode(s) longue(s), {len(big)} fichier(s) long(s), {todos} TODO"}
+
+
+# ----------------------------------------------------------------------
+# Entrées de chaque métrique
+# ----------------------------------------------------------------------
+
+def _glob(root: Path, base: str, pattern: str) -> List[str]:
+    return sorted(p.relative_to(root).as_posix() for p in (root / base).rglob(pattern))
+
+
+def _scripts(root: Path) -> List[str]:
+    return _glob(root, SCRIPTS_DIR, "*.cs")
+
+
+def _scenes(root: Path) -> List[str]:
+    build = root / "ProjectSettings/EditorBuildSettings.asset"
+    return (_glob(root, SCENES_DIR, "*.unity") + _glob(root, "Assets", "*.cs.meta")
+            + _glob(root, "Assets", "*.prefab") + _glob(root, "Assets", "*.prefab.meta")
+            + (["ProjectSettings/EditorBuildSettings.asset"] if build.exists() else []))
+
+
+def _last_log(root: Path) -> List[str]:
+    logs = sorted((root / LOG_DIR).glob("*.log"), key=lambda p: p.stat().st_mtime)
+    return [Path(LOG_DIR, logs[-1].name).as_posix()] if logs else []
+
+
+# name, weight, inputs, evaluator
+METRICS: List[Tuple[str, float, Callable, Callable]] = [
+    ("Server Authority", 0.3, _scripts, server_authority),
+    ("Structure Discovery", 0.2, _scenes, structure_discovery),
+    ("Network Flow", 0.2, _scripts, network_flow),
+    ("Build Ready", 0.2, _last_log, build_ready),
+    ("Code Quality", 0.1, _scripts, code_quality),
+]
+
+
+# ----------------------------------------------------------------------
+# Cache et orchestration
+# ----------------------------------------------------------------------
+
+def _sha1(path: Path) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def fingerprint(root: Path, name: str, files: List[str], hashes: Dict[str, list]) -> str:
+    """Empreinte des entrées ; hashes (rel -> [mtime_ns, size, sha1]) est mis à jour."""
+    h = hashlib.sha1(f"{VERSION}\0{name}".encode())
+    for rel in files:
+        st = (root / rel).stat()
+        cached = hashes.get(rel)
+        if not cached or cached[0] != st.st_mtime_ns or cached[1] != st.st_size:
+            cached = hashes[rel] = [st.st_mtime_ns, st.st_size, _sha1(root / rel)]
+        h.update(f"\0{rel}\0{cached[2]}".encode())
+    return h.hexdigest()
+
+
+def _run(job: Tuple[str, str, List[str]]) -> Result:
+    name, root, files = job
+    fn = next(m[3] for m in METRICS if m[0] == name)
+    t0 = time.perf_counter()
+    result = fn(Path(root), files)
+    result["seconds"] = round(time.perf_counter() - t0, 3)
+    return result
+
+
+def evaluate(root: Path = Path("."), force: bool = False, cache_file: Path = CACHE_FILE) -> Tuple[Dict, Dict]:
+    """Retourne (current_metrics, stats) ; ne recalcule que les métriques dont les entrées ont changé."""
+    try:
+        cache = json.loads(cache_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        cache = {}
+    hashes = cache.setdefault("files", {})
+    results = cache.setdefault("metrics", {})
+    todo = []
+    with ci_trace.span("metrics fingerprint"):
+        inputs = {name: files(root) for name, _, files, _ in METRICS}
+        for name, _, _, _ in METRICS:
+            key = fingerprint(root, name, inputs[name], hashes)
+            if force or results.get(name, {}).get("key") != key:
+                todo.append((name, key))
+    with ci_trace.span("metrics evaluate", stale=len(todo)):
+        jobs = [(name, str(root), inputs[name]) for name, _ in todo]
+        if len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=min(len(jobs), os.cpu_count() or 1)) as pool:
+                outputs = list(pool.map(_run, jobs))
+        else:
+            outputs = [_run(j) for j in jobs]
+    for (name, key), out in zip(todo, outputs):
+        results[name] = {"key": key, "result": out}
+    used = {rel for files in inputs.values() for rel in files}
+    cache["files"] = {rel: v for rel, v in hashes.items() if rel in used}
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp = cache_file.with_suffix(".tmp")
+    tmp.write_text(json.dumps(cache), encoding="utf-8")
+    os.replace(tmp, cache_file)
+
+    metrics, improvements = [], []
+    for name, weight, _, _ in METRICS:
+        r = results[name]["result"]
+        metrics.append({"name": name, "weight": weight, "score": r["score"], "details": r["details"]})
+        improvements += r["improvements"]
+    total = round(sum(m["weight"] * m["score"] for m in metrics))
+    stats = {"recomputed": [n for n, _ in todo], "seconds": {n: results[n]["result"]["seconds"] for n, _ in todo}}
+    return {"metrics": metrics, "total_score": total, "improvements": improvements}, stats
+
+
+def write_metrics(root: Path = Path("."), output: Path = METRICS_FILE, force: bool = False) -> Dict:
+    current, stats = evaluate(root, force)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(current, indent=2) + "\n")
+    cached = len(METRICS) - len(stats["recomputed"])
+    timing = ", ".join(f"{n} {s:.2f}s" for n, s in stats["seconds"].items())
+    print(f"📊 {len(METRICS)} métrique(s) : {len(stats['recomputed'])} recalculée(s){f' ({timing})' if timing else ''}, "
+          f"{cached} en cache")
+    return current
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Calcule current_metrics.json à partir du dépôt")
+    ap.add_argument("--root", default=".")
+    ap.add_argument("--output", default=str(METRICS_FILE))
+    ap.add_argument("--force", action="store_true", help="Ignorer le cache")
+    args = ap.parse_args()
+    ci_trace.install("evaluate_metrics")
+    current = write_metrics(Path(args.root), Path(args.output), args.force)
+    for m in current["metrics"]:
+        print(f"  {m['name']:<20} {m['score']:>3}  {m['details']}")
+    print(f"📈 Score total: {current['total_score']}")
+
+
+if __name__ == "__main__":
+    main()
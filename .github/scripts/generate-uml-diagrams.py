@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""Génère les diagrammes UML (Mermaid) à partir du code C#.
+
+Les diagrammes sont dérivés de l'index de symboles de Assets/Scripts/**/*.cs
+(scripts/symbol_index.py) et des .asmdef (scripts/asset_graph.py) :
+
+- classes-<assembly>-vN.mmd : classes/interfaces d'une assembly, héritage,
+  méthodes [ServerRpc]/[ClientRpc]
+- rpc-vN.mmd : flux RPC client -> serveur / serveur -> client
+- assemblies-vN.mmd : dépendances entre assemblies (.asmdef)
+
+Régénération incrémentale : chaque diagramme a une empreinte (sha1 de ses
+entrées, sans numéros de ligne) stockée dans .ci_cache/uml_state.json ; seuls
+les diagrammes dont l'empreinte change sont rendus, en parallèle dans un pool
+de processus. La sortie est déterministe (tri, pas d'horodatage), donc un
+diagramme inchangé reste identique octet pour octet. Les diagrammes de la
+version qui ne sont plus produits (assembly renommée) sont supprimés.
+
+Coût sur ce dépôt (103 scripts) : l'index à froid domine, 0,5 à 0,65 s
+(cache .ci_cache/symbols.json absent, cas d'un checkout CI neuf) ; avec
+l'index en cache, ~18 ms d'index et ~15 ms de rendu des 8 diagrammes.
+
+Usage: generate-uml-diagrams.py [version]
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "scripts"))
+import symbol_index
+from asset_graph import assembly_of, load_asmdefs
+
+DIAGRAMS_DIR = Path(os.environ.get("UML_DIAGRAMS_DIR", ".cursor/agents/diagrams"))
+STATE_FILE = Path(os.environ.get("UML_STATE", ".ci_cache/uml_state.json"))
+ASSETS_DIR = Path("Assets")
+# Changer GENERATOR invalide toutes les empreintes (format de sortie modifié).
+GENERATOR = "1"
+RPC_ATTRS = ("ServerRpc", "ClientRpc", "Rpc")
+
+# ----------------------------------------------------------------------
+# Modèle : données minimales par diagramme (sérialisables, sans lignes)
+# ----------------------------------------------------------------------
+
+def build_model(idx: symbol_index.SymbolIndex, asmdefs: Dict[str, Dict]) -> Dict[str, Dict]:
+    """assembly -> {type name: {kind, bases, rpcs}}"""
+    model: Dict[str, Dict] = {}
+    for rel, sym in idx.all():
+        if not sym.is_type or sym.kind == "enum":
+            continue
+        types = model.setdefault(assembly_of(rel, asmdefs), {})
+        t = types.setdefault(sym.name, {"kind": sym.kind, "bases": [], "rpcs": []})
+        t["bases"] = sorted(set(t["bases"]) | set(sym.bases))
+    for rel, sym in idx.all():
+        rpc = next((a for a in sym.attrs if a in RPC_ATTRS), None)
+        if sym.kind == "method" and rpc and sym.parent:
+            t = model.get(assembly_of(rel, asmdefs), {}).get(sym.parent)
+            if t is not None and [sym.name, rpc] not in t["rpcs"]:
+                t["rpcs"].append([sym.name, rpc])
+    for types in model.values():
+        for t in types.values():
+            t["rpcs"].sort()
+    return model
+
+
+# ----------------------------------------------------------------------
+# Rendu : fonctions pures (exécutées dans le pool de processus)
+# ----------------------------------------------------------------------
+
+def _id(name: str) -> str:
+    return re.sub(r"\W", "_", name)
+
+
+def render_classes(assembly: str, types: Dict[str, Dict]) -> str:
+    lines = ["classDiagram", f"  %% Assembly: {assembly}"]
+    local = set(types)
+    for name in sorted(types):
+        t = types[name]
+        body = [f"    +{m}() {attr}" for m, attr in t["rpcs"]]
+        if t["kind"] != "class":
+            body.insert(0, f"    <<{t['kind']}>>")
+        if body:
+            lines += [f"  class {_id(name)} {{"] + body + ["  }"]
+        else:
+            lines.append(f"  class {_id(name)}")
+    for name in sorted(types):
+        t = types[name]
+        for base in t["bases"]:
+            is_interface = (base in local and types[base]["kind"] == "interface") or re.match(r"I[A-Z]", base)
+            arrow = "<|.." if is_interface else "<|--"
+            lines.append(f"  {_id(base)} {arrow} {_id(name)}")
+    return "\n".join(lines) + "\n"
+
+
+def render_rpc(rpcs: List[List[str]]) -> str:
+    lines = ["flowchart LR", "  Client((Client))", "  Server((Server))"]
+    for owner, method, attr in rpcs:
+        if attr == "ServerRpc":
+            lines.append(f"  Client -- \"{owner}.{method}\" --> Server")
+        elif attr == "ClientRpc":
+            lines.append(f"  Server -- \"{owner}.{method}\" --> Client")
+        else:
+            lines.append(f"  Client <-- \"{owner}.{method}\" --> Server")
+    return "\n".join(lines) + "\n"
+
+
+def render_assemblies(asms: List[List]) -> str:
+    lines = ["graph LR"]
+    local = {name for name, _ in asms}
+    external = sorted({r for _, refs in asms for r in refs} - local)
+    lines += [f"  {_id(name)}[\"{name}\"]" for name in sorted(local)]
+    lines += [f"  ext_{_id(r)}([\"{r}\"])" for r in external]
+    for name, refs in asms:
+        for r in refs:
+            # pointillés : packages / assemblies hors du projet
+            lines.append(f"  {_id(name)} --> {_id(r)}" if r in local else f"  {_id(name)} -.-> ext_{_id(r)}")
+    return "\n".join(lines) + "\n"
+
+
+RENDERERS = {"classes": render_classes, "rpc": render_rpc, "assemblies": render_assemblies}
+
+
+def render(job: Tuple[str, list]) -> str:
+    kind, args = job
+    return RENDERERS[kind](*args)
+
+
+# ----------------------------------------------------------------------
+# Orchestration
+# ----------------------------------------------------------------------
+
+def plan(version: int, model: Dict[str, Dict], asmdefs: Dict[str, Dict]) -> List[Dict]:
+    """Un job par diagramme : fichier, description, renderer et ses entrées."""
+    jobs = []
+    for asm in sorted(model):
+        jobs.append({"file": f"classes-{asm}-v{version}.mmd", "desc": f"Classes de l'assembly {asm}",
+                     "job": ("classes", [asm, model[asm]])})
+    rpcs = sorted([owner, m, attr] for types in model.values() for owner, t in types.items() for m, attr in t["rpcs"])
+    jobs.append({"file": f"rpc-v{version}.mmd", "desc": "RPC Netcode ([ServerRpc] / [ClientRpc])",
+                 "job": ("rpc", [rpcs])})
+    asms = sorted([a["name"], a["refs"]] for a in asmdefs.values())
+    jobs.append({"file": f"assemblies-v{version}.mmd", "desc": "Dépendances entre assemblies (.asmdef)",
+                 "job": ("assemblies", [asms])})
+    for j in jobs:
+        raw = json.dumps([GENERATOR, j["job"]], sort_keys=True, separators=(",", ":"))
+        j["hash"] = hashlib.sha1(raw.encode()).hexdigest()
+    return jobs
+
+
+def write_if_changed(path: Path, content: str) -> bool:
+    try:
+        if path.read_text(encoding="utf-8") == content:
+            return False
+    except OSError:
+        pass
+    path.write_text(content, encoding="utf-8")
+    return True
+
+
+def remove_stale(version: int, current: set, state: Dict[str, str]) -> int:
+    """Supprime les diagrammes de cette version que le run n'a pas produits
+    (assembly renommée ou supprimée). Seuls les noms générés par ce script
+    sont concernés : les diagrammes écrits à la main restent en place."""
+    suffix = f"-v{version}.mmd"
+    owned = {p.name for p in DIAGRAMS_DIR.glob(f"classes-*{suffix}")}
+    owned |= {f for f in state if f.endswith(suffix)}
+    removed = 0
+    for name in sorted(owned - current):
+        state.pop(name, None)
+        try:
+            (DIAGRAMS_DIR / name).unlink()
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def main():
+    version = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    t0 = time.perf_counter()
+    root = Path(".")
+    idx = symbol_index.load(root)
+    asmdefs = load_asmdefs(root)
+    jobs = plan(version, build_model(idx, asmdefs), asmdefs)
+    t1 = time.perf_counter()
+
+    try:
+        state = json.loads(STATE_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        state = {}
+    DIAGRAMS_DIR.mkdir(parents=True, exist_ok=True)
+    todo = [j for j in jobs if state.get(j["file"]) != j["hash"] or not (DIAGRAMS_DIR / j["file"]).exists()]
+    if len(todo) > 1:
+        with ProcessPoolExecutor(max_workers=min(len(todo), os.cpu_count() or 1)) as pool:
+            outputs = list(pool.map(render, [j["job"] for j in todo]))
+    else:
+        outputs = [render(j["job"]) for j in todo]
+    written = 0
+    for j, content in zip(todo, outputs):
+        written += write_if_changed(DIAGRAMS_DIR / j["file"], content)
+        state[j["file"]] = j["hash"]
+    removed = remove_stale(version, {j["file"] for j in jobs}, state)
+
+    summary = DIAGRAMS_DIR / f"diagrams-v{version}.md"
+    lines = [f"# Diagrams v{version}", ""]
+    for j in jobs:
+        lines += [f"## {j['file'][:-len(f'-v{version}.mmd')]}", f"- {j['desc']}", f"- Mermaid: `{DIAGRAMS_DIR / j['file']}`", ""]
+    write_if_changed(summary, "\n".join(lines))
+
+    STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    STATE_FILE.write_text(json.dumps(state, indent=1, sort_keys=True), encoding="utf-8")
+    t2 = time.perf_counter()
+    print(f"✅ {len(jobs)} diagramme(s) : {len(todo)} rendu(s), {written} modifié(s), "
+          f"{len(jobs) - len(todo)} inchangé(s), {removed} supprimé(s)")
+    print(f"⏱️ index {1000 * (t1 - t0):.0f} ms, rendu {1000 * (t2 - t1):.0f} ms ({idx.stats})")
+    print(f"📄 Résumé: {summary}")
+
+if __name__ == "__main__":
+    main()
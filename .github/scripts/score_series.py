@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Série temporelle compacte des scores d'évaluation + analyse de tendance.
+
+Stockage binaire, en ajout seul :
+- score_series.bin : un enregistrement de taille fixe par run
+  (timestamp u32, flags u8, un float32 par métrique ; NaN = non mesuré)
+- score_rollup.bin : agrégats journaliers (count, moyenne, min, max par
+  métrique) des points les plus anciens. Au-delà de RAW_MAX points bruts,
+  les plus anciens sont repliés dans les rollups : rétention illimitée,
+  taille bornée.
+
+Décision de rollback : baseline EWMA des runs précédents, bruit estimé par
+MAD des résidus récents. Un run est « bas » si son total est sous
+baseline - K_NOISE * bruit ; le rollback n'est recommandé que si deux runs
+consécutifs sont bas (un score LLM bruité isolé ne déclenche plus rien), et
+vise le premier run bas de la série, celui qui a introduit la régression.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import struct
+import time
+from array import array
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+REPORTS_DIR = Path(os.environ.get("SCORE_REPORTS_DIR", ".github/reports"))
+SERIES_FILE = REPORTS_DIR / "score_series.bin"
+ROLLUP_FILE = REPORTS_DIR / "score_rollup.bin"
+LEGACY_FILE = REPORTS_DIR / "score_history.json"
+
+METRICS = ["Server Authority", "Structure Discovery", "Network Flow", "Build Ready", "Code Quality", "Total"]
+MAGIC = b"SCS1"
+RECORD = struct.Struct("<IB" + "f" * len(METRICS))
+ROLLUP = struct.Struct("<II" + "fff" * len(METRICS))  # day (epoch/86400), count, (mean, min, max) * metrics
+FLAG_ROLLED_BACK = 1
+
+RAW_MAX = 2000
+RAW_SLACK = 500  # compaction rewrites the raw file at most once every RAW_SLACK runs
+ALPHA = 0.3  # EWMA
+NOISE_WINDOW = 30
+NOISE_FLOOR = 2.0
+K_NOISE = 3.0
+LEGACY_TOLERANCE = 5.0  # seuil fixe de l'ancien calcul, utilisé tant que l'historique est trop court
+DEFAULT_SCORE = 50.0
+
+
+# ----------------------------------------------------------------------
+# Stockage
+# ----------------------------------------------------------------------
+
+def _header() -> bytes:
+    names = "\n".join(METRICS).encode()
+    return MAGIC + struct.pack("<H", len(names)) + names
+
+
+def _check_header(f, path: Path) -> None:
+    head = f.read(6)
+    if not head:
+        return
+    if head[:4] != MAGIC:
+        raise ValueError(f"{path}: format inconnu")
+    names = f.read(struct.unpack("<H", head[4:])[0]).decode().split("\n")
+    if names != METRICS:
+        raise ValueError(f"{path}: métriques {names} != {METRICS}")
+
+
+class Series:
+    """Colonnes en mémoire : ts (array 'I'), flags (array 'B'), une array 'f' par métrique."""
+
+    def __init__(self):
+        self.ts = array("I")
+        self.flags = array("B")
+        self.cols: Dict[str, array] = {m: array("f") for m in METRICS}
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def add(self, ts: int, flags: int, values: List[float]) -> None:
+        self.ts.append(ts)
+        self.flags.append(flags)
+        for m, v in zip(METRICS, values):
+            self.cols[m].append(v)
+
+
+def load(path: Path = SERIES_FILE) -> Series:
+    s = Series()
+    try:
+        with open(path, "rb") as f:
+            _check_header(f, path)
+            data = f.read()
+    except FileNotFoundError:
+        return s
+    usable = len(data) - len(data) % RECORD.size  # ignore un enregistrement tronqué
+    for rec in RECORD.iter_unpack(data[:usable]):
+        s.add(rec[0], rec[1], list(rec[2:]))
+    return s
+
+
+def append(values: Dict[str, float], ts: Optional[int] = None, flags: int = 0, path: Path = SERIES_FILE) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    row = [float(values.get(m, math.nan)) for m in METRICS]
+    with open(path, "ab") as f:
+        if f.tell() == 0:
+            f.write(_header())
+        f.write(RECORD.pack(int(ts if ts is not None else time.time()), flags, *row))
+
+
+def set_flags(index: int, flags: int, path: Path = SERIES_FILE) -> None:
+    """Modifie en place les flags d'un enregistrement (index négatif accepté)."""
+    with open(path, "r+b") as f:
+        _check_header(f, path)
+        start = f.tell()
+        n = (f.seek(0, os.SEEK_END) - start) // RECORD.size
+        i = index if index >= 0 else n + index
+        f.seek(start + i * RECORD.size + 4)
+        f.write(bytes([flags]))
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def load_rollups(path: Path = ROLLUP_FILE) -> List[Tuple]:
+    try:
+        with open(path, "rb") as f:
+            _check_header(f, path)
+            data = f.read()
+    except FileNotFoundError:
+        return []
+    return list(ROLLUP.iter_unpack(data[:len(data) - len(data) % ROLLUP.size]))
+
+
+def compact(series_path: Path = SERIES_FILE, rollup_path: Path = ROLLUP_FILE) -> int:
+    """Replie les points bruts au-delà de RAW_MAX en agrégats journaliers ; retourne le nombre replié."""
+    s = load(series_path)
+    extra = len(s) - RAW_MAX
+    if extra < RAW_SLACK:
+        return 0
+    days: Dict[int, List] = {}
+    for i in range(extra):
+        if s.flags[i] & FLAG_ROLLED_BACK:
+            continue
+        d = days.setdefault(s.ts[i] // 86400, [0] + [[0.0, 0, math.inf, -math.inf] for _ in METRICS])
+        d[0] += 1
+        for k, m in enumerate(METRICS):
+            v = s.cols[m][i]
+            if not math.isnan(v):
+                acc = d[k + 1]
+                acc[0] += v
+                acc[1] += 1
+                acc[2] = min(acc[2], v)
+                acc[3] = max(acc[3], v)
+    rollups = load_rollups(rollup_path)
+    by_day = {r[0]: r for r in rollups}
+    for day, d in days.items():
+        prev = by_day.get(day)
+        fields = []
+        for k in range(len(METRICS)):
+            total, n, lo, hi = d[k + 1]
+            if prev:
+                pn = prev[1]
+                pmean, plo, phi = prev[2 + 3 * k: 5 + 3 * k]
+                if not math.isnan(pmean):
+                    total, n, lo, hi = total + pmean * pn, n + pn, min(lo, plo), max(hi, phi)
+            fields += [total / n, lo, hi] if n else [math.nan] * 3
+        by_day[day] = (day, d[0] + (prev[1] if prev else 0), *fields)
+    _write_atomic(rollup_path, _header() + b"".join(ROLLUP.pack(*by_day[d]) for d in sorted(by_day)))
+    keep = b"".join(RECORD.pack(s.ts[i], s.flags[i], *(s.cols[m][i] for m in METRICS)) for i in range(extra, len(s)))
+    _write_atomic(series_path, _header() + keep)
+    return extra
+
+
+def migrate(legacy: Path = LEGACY_FILE, path: Path = SERIES_FILE) -> int:
+    """Importe l'ancien score_history.json (score global uniquement) puis le renomme en .migrated."""
+    if path.exists() or not legacy.exists():
+        return 0
+    history = json.loads(legacy.read_text(encoding="utf-8"))
+    for h in history:
+        ts = datetime.fromisoformat(h["timestamp"]).replace(tzinfo=timezone.utc).timestamp()
+        append({"Total": h.get("score", DEFAULT_SCORE)}, ts=int(ts), path=path)
+    legacy.rename(legacy.with_suffix(".json.migrated"))
+    return len(history)
+
+
+# ----------------------------------------------------------------------
+# Analyse
+# ----------------------------------------------------------------------
+
+def ewma(values, alpha: float = ALPHA) -> List[float]:
+    """EWMA en un seul passage ; les NaN reprennent la valeur précédente."""
+    out: List[float] = []
+    level = math.nan
+    for v in values:
+        if not math.isnan(v):
+            level = v if math.isnan(level) else level + alpha * (v - level)
+        out.append(level)
+    return out
+
+
+def _median(xs: List[float]) -> float:
+    xs = sorted(xs)
+    n = len(xs)
+    return (xs[n // 2] + xs[(n - 1) // 2]) / 2 if n else math.nan
+
+
+def noise(values, smoothed: List[float], window: int = NOISE_WINDOW) -> float:
+    """Écart-type robuste (1.4826 * MAD) des résidus à la baseline précédente."""
+    res = [v - smoothed[i - 1] for i, v in enumerate(values) if i and not math.isnan(v) and not math.isnan(smoothed[i - 1])]
+    res = res[-window:]
+    if len(res) < 5:
+        return LEGACY_TOLERANCE / K_NOISE
+    med = _median(res)
+    return max(NOISE_FLOOR, 1.4826 * _median([abs(r - med) for r in res]))
+
+
+def _usable(s: Series, metric: str) -> List[float]:
+    col = s.cols[metric]
+    return [math.nan if s.flags[i] & FLAG_ROLLED_BACK else col[i] for i in range(len(s))]
+
+
+def _threshold(raw: List[float], values: List[float], smoothed: List[float], i: int) -> Optional[Tuple[float, float, float]]:
+    """(baseline, bruit, seuil) du point i face aux points utilisables qui le précèdent ; None sans baseline."""
+    if i < 1 or math.isnan(raw[i]) or math.isnan(smoothed[i - 1]):
+        return None
+    base = smoothed[i - 1]
+    sigma = noise(values[:i], smoothed[:i])
+    return base, sigma, base - K_NOISE * sigma
+
+
+def assess(s: Series, metric: str = "Total") -> Dict:
+    """Évalue le dernier point de la série face à la tendance des précédents.
+
+    Un point marqué FLAG_ROLLED_BACK est exclu des baselines mais reste jugé
+    sur sa valeur : le marquer ne remet pas la confirmation à zéro. La
+    régression est confirmée dès deux runs bas consécutifs ; le run à annuler
+    est le plus ancien run bas non marqué de cette série (« revert »).
+    """
+    raw = list(s.cols[metric])
+    values = _usable(s, metric)
+    n = len(values)
+    if n < 2 or math.isnan(raw[-1]):
+        return {"metric": metric, "low": False, "confirmed": False, "baseline": values[-1] if values else math.nan}
+    smoothed = ewma(values)
+    cur = _threshold(raw, values, smoothed, n - 1)
+    if cur is None:
+        return {"metric": metric, "low": False, "confirmed": False, "baseline": smoothed[-2]}
+    base, sigma, threshold = cur
+    low = raw[-1] < threshold
+    # remonte la série de runs bas consécutifs qui se termine au run courant
+    start = n - 1
+    while low and start > 0:
+        prev = _threshold(raw, values, smoothed, start - 1)
+        if prev is None or raw[start - 1] >= prev[2]:
+            break
+        start -= 1
+    result = {"metric": metric, "value": raw[-1], "baseline": round(base, 2), "noise": round(sigma, 2),
+              "threshold": round(threshold, 2), "low": low, "confirmed": low and start < n - 1}
+    if result["confirmed"]:
+        first = next((i for i in range(start, n) if not s.flags[i] & FLAG_ROLLED_BACK), n - 1)
+        result["revert"] = first - n  # index négatif, stable tant que rien n'est ajouté
+        result["revert_ts"] = s.ts[first]
+    return result
+
+
+def record_and_assess(metrics: Dict[str, float]) -> Tuple[bool, List[Dict]]:
+    """Ajoute le run courant et retourne (rollback recommandé, évaluation par métrique).
+
+    Sur rollback, les runs de la régression (du run à annuler au run courant)
+    sont marqués pour ne plus peser dans les baselines suivantes.
+    """
+    migrate()
+    append(metrics)
+    compact()
+    s = load()
+    results = [assess(s, m) for m in METRICS]
+    rollback = results[-1]["confirmed"]
+    if rollback:
+        for i in range(results[-1]["revert"], 0):
+            if not s.flags[i] & FLAG_ROLLED_BACK:
+                set_flags(i, s.flags[i] | FLAG_ROLLED_BACK)
+    return rollback, results
+
+
+def previous_total(s: Series) -> float:
+    values = [v for v in _usable(s, "Total") if not math.isnan(v)]
+    return values[-1] if values else DEFAULT_SCORE
+
+
+# ----------------------------------------------------------------------
+# CLI
+# ----------------------------------------------------------------------
+
+def _bench(n: int) -> None:
+    import tempfile
+    tmp = Path(tempfile.mkdtemp())
+    series, rollup = tmp / "s.bin", tmp / "r.bin"
+    rng = random.Random(0)
+    t0 = time.perf_counter()
+    start = int(time.time()) - n * 3600
+    rows = []
+    for i in range(n):
+        base = 60 + 10 * math.sin(i / 200)
+        vals = {m: base + rng.gauss(0, 4) for m in METRICS}
+        rows.append(RECORD.pack(start + i * 3600, 0, *(vals[m] for m in METRICS)))
+    _write_atomic(series, _header() + b"".join(rows))
+    t1 = time.perf_counter()
+    folded = compact(series, rollup)
+    t2 = time.perf_counter()
+    s = load(series)
+    results = [assess(s, m) for m in METRICS]
+    t3 = time.perf_counter()
+    print(f"{n} runs: write {1000 * (t1 - t0):.0f} ms, compact {folded} -> {len(load_rollups(rollup))} jour(s) "
+          f"{1000 * (t2 - t1):.0f} ms, load+assess {len(s)} points x {len(METRICS)} métriques {1000 * (t3 - t2):.0f} ms")
+    print(json.dumps(results[-1]))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Série temporelle des scores d'évaluation")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sh = sub.add_parser("show", help="Derniers points et tendance")
+    sh.add_argument("--last", type=int, default=10)
+    b = sub.add_parser("bench", help="Mesure sur une série synthétique")
+    b.add_argument("--runs", type=int, default=5000)
+    args = ap.parse_args()
+    if args.cmd == "bench":
+        _bench(args.runs)
+        return
+    migrate()
+    s = load()
+    for i in range(max(0, len(s) - args.last), len(s)):
+        stamp = datetime.fromtimestamp(s.ts[i], timezone.utc).strftime("%Y-%m-%d %H:%M")
+        vals = " ".join(f"{s.cols[m][i]:6.1f}" for m in METRICS)
+        print(f"{stamp} {'R' if s.flags[i] & FLAG_ROLLED_BACK else ' '} {vals}")
+    print(f"{len(s)} point(s) bruts, {len(load_rollups())} jour(s) agrégés")
+    for r in (assess(s, m) for m in METRICS):
+        print(json.dumps(r, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
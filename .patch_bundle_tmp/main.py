@@ -1,11 +1,142 @@
 #!/usr/bin/env python3
-import argparse, os, pathlib, zipfile
+"""Install the patch bundle into a repo and (re)build patch_bundle.zip.
 
-def write_file(path: pathlib.Path, content: str, overwrite: bool):
-    path.parent.mkdir(parents=True, exist_ok=True)
-    if path.exists() and not overwrite:
-        return
-    path.write_text(content, encoding="utf-8")
+Files are streamed in chunks, never loaded whole. The zip carries a
+MANIFEST.json (sha256, size, mode per file); on the next run only members
+whose hash changed are recompressed, unchanged members are copied as raw
+compressed bytes, and if nothing changed the zip is not touched at all.
+Bundle files whose size and mtime match the manifest are not even re-hashed.
+Installs compare hashes with the files already in the repo and write only
+the ones that differ, verifying the hash of what was written.
+"""
+import argparse, copy, hashlib, json, os, pathlib, shutil, struct, sys, tempfile, zipfile
+
+CHUNK = 1 << 20
+MANIFEST = "MANIFEST.json"
+# (path in bundle/repo, mode)
+FILES = [
+    (".github/workflows/ci.yml", 0o644),
+    ("scripts/unity_ai_loop.sh", 0o755),
+    ("scripts/claude_autofix.py", 0o755),
+]
+# Already-compressed payloads are stored, deflating them only burns CPU.
+STORED_SUFFIXES = {".zip", ".gz", ".tgz", ".bz2", ".xz", ".7z", ".png", ".jpg", ".jpeg", ".webp",
+                   ".mp3", ".ogg", ".mp4", ".unitypackage", ".bundle", ".pdf"}
+
+def sha256_file(path: pathlib.Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def read_manifest(zip_path: pathlib.Path) -> dict:
+    try:
+        with zipfile.ZipFile(zip_path) as z:
+            return json.loads(z.read(MANIFEST))
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+        return {}
+
+def scan_bundle(bundle_dir: pathlib.Path, old: dict) -> dict:
+    """rel -> {sha256, size, mode, mtime_ns}; hashes reused when size+mtime match the old manifest."""
+    entries = {}
+    for rel, mode in FILES:
+        src = bundle_dir / rel
+        try:
+            st = src.stat()
+        except FileNotFoundError:
+            print(f"⚠️ {rel} missing from bundle, skipped", file=sys.stderr)
+            continue
+        prev = old.get(rel)
+        if prev and prev["size"] == st.st_size and prev.get("mtime_ns") == st.st_mtime_ns:
+            digest = prev["sha256"]
+        else:
+            digest = sha256_file(src)
+        entries[rel] = {"sha256": digest, "size": st.st_size, "mode": mode, "mtime_ns": st.st_mtime_ns}
+    return entries
+
+def _copy_raw(zin: zipfile.ZipFile, info: zipfile.ZipInfo, zout: zipfile.ZipFile):
+    """Copy a member's compressed bytes as-is (no decompress/recompress)."""
+    zin.fp.seek(info.header_offset)
+    fixed = zin.fp.read(30)
+    name_len, extra_len = struct.unpack("<HH", fixed[26:30])
+    zin.fp.seek(info.header_offset + 30 + name_len + extra_len)
+    ni = copy.copy(info)
+    ni.flag_bits &= ~0x08  # sizes/CRC go in the local header, no data descriptor
+    ni.header_offset = zout.fp.tell()
+    zout.fp.write(ni.FileHeader())
+    left = info.compress_size
+    while left:
+        chunk = zin.fp.read(min(CHUNK, left))
+        if not chunk:
+            raise zipfile.BadZipFile(f"{info.filename}: truncated member")
+        zout.fp.write(chunk)
+        left -= len(chunk)
+    zout.filelist.append(ni)
+    zout.NameToInfo[ni.filename] = ni
+    zout.start_dir = zout.fp.tell()
+
+def _add_streamed(zout: zipfile.ZipFile, src: pathlib.Path, rel: str, mode: int):
+    zi = zipfile.ZipInfo.from_file(src, rel)
+    zi.external_attr = (0o100000 | mode) << 16
+    zi.compress_type = zipfile.ZIP_STORED if src.suffix.lower() in STORED_SUFFIXES else zipfile.ZIP_DEFLATED
+    with open(src, "rb") as f, zout.open(zi, "w") as dst:
+        shutil.copyfileobj(f, dst, CHUNK)
+
+def build_zip(zip_path: pathlib.Path, bundle_dir: pathlib.Path, entries: dict, old: dict) -> tuple:
+    """Rewrite the zip only if the manifest changed; returns (recompressed, copied raw)."""
+    def same(a, b):
+        return {k: (v["sha256"], v["mode"]) for k, v in a.items()} == {k: (v["sha256"], v["mode"]) for k, v in b.items()}
+    if zip_path.exists() and same(entries, old):
+        return 0, 0
+    changed = copied = 0
+    fd, tmp = tempfile.mkstemp(dir=zip_path.parent, prefix=".patch_bundle-")
+    os.close(fd)
+    try:
+        zin = zipfile.ZipFile(zip_path) if zip_path.exists() and old else None
+        with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED) as zout:
+            for rel, e in entries.items():
+                prev = old.get(rel)
+                if zin and prev and prev["sha256"] == e["sha256"] and prev["mode"] == e["mode"] and rel in zin.NameToInfo:
+                    _copy_raw(zin, zin.getinfo(rel), zout)
+                    copied += 1
+                else:
+                    _add_streamed(zout, bundle_dir / rel, rel, e["mode"])
+                    changed += 1
+            zout.writestr(MANIFEST, json.dumps(entries, indent=2, sort_keys=True))
+        if zin:
+            zin.close()
+        os.replace(tmp, zip_path)
+    except BaseException:
+        pathlib.Path(tmp).unlink(missing_ok=True)
+        raise
+    return changed, copied
+
+def install(repo: pathlib.Path, bundle_dir: pathlib.Path, entries: dict, overwrite: bool) -> list:
+    """Copy bundle files whose content differs from the repo; returns the written paths."""
+    written = []
+    for rel, e in entries.items():
+        dst = repo / rel
+        if dst.exists():
+            if not overwrite or sha256_file(dst) == e["sha256"]:
+                continue
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=dst.parent, prefix=f".{dst.name}.")
+        try:
+            h = hashlib.sha256()
+            with open(bundle_dir / rel, "rb") as f, os.fdopen(fd, "wb") as out:
+                for chunk in iter(lambda: f.read(CHUNK), b""):
+                    h.update(chunk)
+                    out.write(chunk)
+            if h.hexdigest() != e["sha256"]:
+                raise SystemExit(f"❌ {rel}: hash mismatch while copying (bundle modified during install?)")
+            os.chmod(tmp, e["mode"])
+            os.replace(tmp, dst)
+        except BaseException:
+            pathlib.Path(tmp).unlink(missing_ok=True)
+            raise
+        written.append(rel)
+    return written
 
 def main():
     ap = argparse.ArgumentParser()
@@ -20,27 +151,18 @@ def main():
         raise SystemExit(1)
 
     bundle_dir = pathlib.Path(__file__).resolve().parent
-    content_map = {
-        ".github/workflows/ci.yml": (bundle_dir / ".github/workflows/ci.yml").read_text(encoding="utf-8"),
-        "scripts/unity_ai_loop.sh": (bundle_dir / "scripts/unity_ai_loop.sh").read_text(encoding="utf-8"),
-        "scripts/claude_autofix.py": (bundle_dir / "scripts/claude_autofix.py").read_text(encoding="utf-8"),
-    }
-
-    for rel, content in content_map.items():
-        write_file(repo / rel, content, args.overwrite)
-
-    os.chmod(repo / "scripts/unity_ai_loop.sh", 0o755)
-    os.chmod(repo / "scripts/claude_autofix.py", 0o755)
-
     zip_path = repo / args.zip_out
-    if zip_path.exists() and args.overwrite:
-        zip_path.unlink()
+    old = read_manifest(zip_path)
+    entries = scan_bundle(bundle_dir, old)
 
-    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as z:
-        for rel in content_map.keys():
-            z.write(repo / rel, rel)
+    written = install(repo, bundle_dir, entries, args.overwrite)
+    changed, copied = build_zip(zip_path, bundle_dir, entries, old)
 
-    print(f"✅ Wrote files + zip: {zip_path}")
+    print(f"✅ {len(written)}/{len(entries)} file(s) written: {', '.join(written) or '-'}")
+    if changed or copied:
+        print(f"✅ Zip updated: {zip_path} ({changed} member(s) recompressed, {copied} copied as-is)")
+    else:
+        print(f"✅ Zip up to date: {zip_path}")
 
 if __name__ == "__main__":
     main()
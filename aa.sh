@@ -7,6 +7,8 @@ MAIN_BRANCH="${MAIN_BRANCH:-main}"
 DEV_BRANCH="${DEV_BRANCH:-dev}"
 WF_PATH=".github/workflows/auto-improve.yml"
 
+BACKUP_PY="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)/scripts/backup_store.py"
+
 log(){ echo -e "[$(date '+%Y-%m-%d %H:%M:%S')] $*"; }
 die(){ log "❌ $*"; exit 1; }
 
@@ -53,18 +55,14 @@ else
 fi
 
 # --- Clean “agents” + Copilot traces ---
-STAMP="$(date +%Y%m%d_%H%M%S)"
-BACKUP_DIR=".patch-backups/$STAMP"
-mkdir -p "$BACKUP_DIR"
-
-backup_if_exists() {
-  local f="$1"
-  if [ -f "$f" ]; then
-    mkdir -p "$BACKUP_DIR/$(dirname "$f")"
-    cp "$f" "$BACKUP_DIR/$f.bak"
-    log "🗂️ Backup: $BACKUP_DIR/$f.bak"
-  fi
-}
+# Sauvegarde dédupliquée (contenu stocké une fois, snapshot = petit manifeste)
+shopt -s nullglob
+WORKFLOWS=(.github/workflows/*.yml .github/workflows/*.yaml)
+shopt -u nullglob
+if [ ${#WORKFLOWS[@]} -gt 0 ]; then
+  python3 "$BACKUP_PY" save --label aa "${WORKFLOWS[@]}"
+  log "🗂️ Backup: .patch-backups (restauration: backup_store.py restore --label aa)"
+fi
 
 log "🧹 Suppression scripts/steps d’agents & Copilot"
 
@@ -73,7 +71,6 @@ for wf in .github/workflows/*.yml .github/workflows/*.yaml; do
   [ -e "$wf" ] || continue
   base="$(basename "$wf")"
   if [[ "$base" != "auto-improve.yml" && "$base" != "auto-improve.yaml" ]]; then
-    backup_if_exists "$wf"
     git rm -f "$wf" || true
     log "🗑️ Workflow supprimé: $wf"
   fi
@@ -81,7 +78,6 @@ done
 
 # 2) Nettoyer le workflow auto-improve : retirer agent/env AGENT_* / appels IA
 if [ -f "$WF_PATH" ]; then
-  backup_if_exists "$WF_PATH"
   python3 - "$WF_PATH" <<'PY'
 from __future__ import annotations
 import re, sys
@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+"""Benchmarks of the CI tooling's hot paths on synthetic inputs, compared to a baseline.
+
+Inputs are generated once per scale (workloads.py) into .ci_cache/bench/
+(BENCH_DIR) and reused. Each benchmark then runs in its own Python process,
+from a scratch directory that holds every cache the scripts write, so the
+runs are isolated and their peak RSS is their own. Timings are best of
+--repeat; benchmarks marked cold start from empty caches each time. The LLM
+endpoints are a local stub (stub_llm.py), so the suite runs offline.
+
+    benchmarks/run.py [--scale 1] [--only log.,diff.] [--repeat 3]
+    benchmarks/run.py --update-baseline          # record benchmarks/baseline.json
+    benchmarks/run.py --threshold 0.25           # exit 1 when a benchmark is >25% slower
+
+Results go to .ci_cache/bench/results.json and, on GitHub, to the step
+summary. A time regression must also exceed MIN_DELTA_S to count, so
+millisecond jitter on small benchmarks is not reported.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parent
+BENCH_DIR = Path(os.environ.get("BENCH_DIR", ROOT / ".ci_cache" / "bench")).resolve()
+BASELINE_FILE = HERE / "baseline.json"
+BUNDLE_MAIN = ROOT / ".patch_bundle_tmp" / "main.py"
+MIN_DELTA_S = 0.05
+VERSION = 1
+MONTH = "2026-01"
+
+sys.path.insert(0, str(HERE))
+import workloads  # noqa: E402
+
+
+# ----------------------------------------------------------------------
+# Workloads (generated by the parent, once per scale)
+# ----------------------------------------------------------------------
+
+def _make_project(d: Path, scale: float) -> None:
+    workloads.unity_project(d / "project", scale)
+
+
+def _make_diff(d: Path, scale: float) -> None:
+    files = min(max(5, int(workloads.DIFF_FILES * scale)), max(20, int(workloads.CS_FILES * scale)))
+    (d / "diff.patch").write_text(workloads.unified_diff(d / "project", files, workloads.DIFF_HUNKS), encoding="utf-8")
+
+
+def _make_jobs(d: Path, scale: float) -> None:
+    jobs = []
+    (d / "jobs").mkdir(exist_ok=True)
+    for i in range(max(4, int(20 * scale))):
+        workloads.unity_log(d / "jobs" / f"job{i}.log", 0.2, seed=100 + i)
+        jobs.append({"id": f"job{i}", "project": "../project", "platform": ["StandaloneLinux64", "Android"][i % 2],
+                     "log": f"job{i}.log", "depends_on": [f"job{i - 1}"] if i % 5 else []})
+    (d / "jobs" / "manifest.json").write_text(json.dumps({"jobs": jobs}), encoding="utf-8")
+
+
+def _make_bundle(d: Path, scale: float) -> None:
+    for i, rel in enumerate((".github/workflows/ci.yml", "scripts/unity_ai_loop.sh", "scripts/claude_autofix.py")):
+        workloads.blob(d / "bundle" / rel, workloads.BUNDLE_MB * scale / 3, seed=i)
+
+
+WORKLOADS: Dict[str, Callable[[Path, float], None]] = {
+    "log": lambda d, s: workloads.unity_log(d / "unity.log", workloads.LOG_MB * s),
+    "small_log": lambda d, s: workloads.unity_log(d / "small.log", max(1.0, workloads.LOG_MB * s / 40), seed=9),
+    "project": _make_project,
+    "diff": _make_diff,
+    "score_history": lambda d, s: workloads.score_history(d / "score_history.json", int(workloads.SCORE_RUNS * s) or 50),
+    "budget": lambda d, s: workloads.actions_budget(d / "actions-budget.json", int(workloads.BUDGET_RUNS * s) or 50, MONTH),
+    "nunit": lambda d, s: workloads.nunit_xml(d / "results.xml", int(workloads.NUNIT_TESTS * s) or 100),
+    "jobs": _make_jobs,
+    "bundle": _make_bundle,
+}
+DEPENDS = {"diff": ["project"], "jobs": ["project"]}
+
+
+def ensure(names: List[str], work: Path, scale: float) -> None:
+    work.mkdir(parents=True, exist_ok=True)
+    for name in names:
+        ensure(DEPENDS.get(name, []), work, scale)
+        done = work / f".{name}.done"
+        if done.exists():
+            continue
+        t0 = time.perf_counter()
+        WORKLOADS[name](work, scale)
+        done.touch()
+        print(f"  generated {name} in {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+
+
+# ----------------------------------------------------------------------
+# Benchmarks (run in the child process, cwd = scratch directory)
+# ----------------------------------------------------------------------
+
+class Bench:
+    def __init__(self, name: str, needs: List[str], fn: Callable, cold: bool = False, llm: float = -1.0):
+        self.name = name
+        self.needs = needs
+        self.fn = fn  # (work dir) -> timed callable, or (reset, timed callable)
+        self.cold = cold  # caches wiped before every repeat
+        self.llm = llm  # stub latency in seconds; < 0 = no stub
+
+
+BENCHES: Dict[str, Bench] = {}
+
+
+def bench(name: str, needs: List[str], cold: bool = False, llm: float = -1.0):
+    def deco(fn):
+        BENCHES[name] = Bench(name, needs, fn, cold, llm)
+        return fn
+    return deco
+
+
+@bench("log.triage", ["log"])
+def _log_triage(w: Path):
+    import unity_log
+    return lambda: unity_log.triage_file(str(w / "unity.log")).counts()
+
+
+@bench("log.follow", ["log"])
+def _log_follow(w: Path):
+    import log_follow
+    return lambda: log_follow.LiveTriage().feed(log_follow.LogFollower(str(w / "unity.log")).lines(lambda: True)).lines
+
+
+@bench("prompt.prepare", ["small_log", "project"], cold=True)
+def _prompt_cold(w: Path):
+    import claude_autofix
+    return lambda: len(claude_autofix.prepare("bench", str(w / "small.log"), w / "project", no_memory=True)["user"])
+
+
+@bench("prompt.prepare.warm", ["small_log", "project"])
+def _prompt_warm(w: Path):
+    import claude_autofix
+    return lambda: len(claude_autofix.prepare("bench", str(w / "small.log"), w / "project", no_memory=True)["user"])
+
+
+@bench("diff.apply", ["diff"])
+def _diff_apply(w: Path):
+    import unidiff
+    text = (w / "diff.patch").read_text(encoding="utf-8")
+
+    def run():
+        files = unidiff.parse(unidiff.extract_diff(text))
+        unidiff.static_check(files, w / "project")
+        return sum(len(unidiff.apply_file((w / "project" / f.path).read_text(encoding="utf-8"), f)) for f in files)
+    return run
+
+
+@bench("cs_syntax.check", ["project"])
+def _cs_syntax(w: Path):
+    import cs_syntax
+    sources = [p.read_text(encoding="utf-8") for p in sorted((w / "project" / workloads.SCRIPT_DIR).glob("*.cs"))]
+    return lambda: sum(len(cs_syntax.check_source(s)) for s in sources)
+
+
+@bench("yaml.scene", ["project"])
+def _yaml_scene(w: Path):
+    import unity_yaml
+    return lambda: len(unity_yaml.parse_file(w / "project/Assets/Scenes/Bench.unity")["objects"])
+
+
+@bench("asset_graph.build", ["project"], cold=True)
+def _asset_graph(w: Path):
+    import asset_graph
+    return lambda: len(asset_graph.AssetGraph.build(w / "project").edges)
+
+
+@bench("score.migrate", ["score_history"])
+def _score_migrate(w: Path):
+    import score_series
+
+    def reset():
+        shutil.rmtree(score_series.REPORTS_DIR, ignore_errors=True)
+        score_series.REPORTS_DIR.mkdir(parents=True)
+        shutil.copy(w / "score_history.json", score_series.LEGACY_FILE)
+
+    def run():
+        n = score_series.migrate()
+        s = score_series.load()
+        return n, [score_series.assess(s, m)["low"] for m in score_series.METRICS]
+    return reset, run
+
+
+@bench("score.record", ["score_history"])
+def _score_record(w: Path):
+    import score_series
+
+    def reset():
+        shutil.rmtree(score_series.REPORTS_DIR, ignore_errors=True)
+        score_series.REPORTS_DIR.mkdir(parents=True)
+        shutil.copy(w / "score_history.json", score_series.LEGACY_FILE)
+        score_series.migrate()
+
+    def run():
+        # one evaluate_changes.py run each: append, assess, compact when due
+        return sum(score_series.record_and_assess({m: 60.0 + i % 7 for m in score_series.METRICS})[0] for i in range(50))
+    return reset, run
+
+
+@bench("budget.guard", ["budget"])
+def _budget(w: Path):
+    import budget_guard
+
+    def reset():
+        shutil.rmtree(budget_guard.BUDGET_FILE.parent, ignore_errors=True)
+        budget_guard.BUDGET_FILE.parent.mkdir(parents=True)
+        shutil.copy(w / "actions-budget.json", budget_guard.LEGACY_FILE)
+
+    def run():
+        for i in range(100):
+            f, h = budget_guard.open_store(MONTH)  # the first one migrates the legacy store
+            with f:
+                budget_guard.append(f, h, {"run_id": str(i), "duration_min": 3.0, "cost_eur": 0.03})
+                f.flush()
+                budget_guard.write_header(f, h)
+        return sum(budget_guard.peek(MONTH)["runs"] for _ in range(1000))
+    return reset, run
+
+
+@bench("nunit.record", ["nunit"], cold=True)
+def _nunit(w: Path):
+    import nunit_results
+
+    def run():
+        h = nunit_results.History()
+        r = h.record("PlayMode", str(w / "results.xml"))
+        h.save()
+        return r["counts"]
+    return run
+
+
+@bench("bundle.build", ["bundle"])
+def _bundle(w: Path):
+    spec = importlib.util.spec_from_file_location("bundle_main", BUNDLE_MAIN)
+    main = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(main)
+    zip_path = Path("patch_bundle.zip")
+
+    def reset():
+        zip_path.unlink(missing_ok=True)
+
+    def run():
+        entries = main.scan_bundle(w / "bundle", main.read_manifest(zip_path))
+        return main.build_zip(zip_path, w / "bundle", entries, {})
+    return reset, run
+
+
+@bench("llm.roundtrip", [], llm=0.0)
+def _llm_roundtrip(w: Path):
+    import llm_http
+    client = llm_http.AnthropicClient("bench")
+    return lambda: sum(len(client.message("bench-model", f"ping {i}", max_tokens=64)) for i in range(100))
+
+
+@bench("autofix.batch", ["jobs"], cold=True, llm=0.2)
+def _autofix_batch(w: Path):
+    import claude_autofix
+    args = SimpleNamespace(batch=str(w / "jobs/manifest.json"), out_dir="autofix-batch", concurrency=4,
+                           token_budget=0, candidates=1, no_cache=True, no_memory=True)
+    return lambda: claude_autofix.run_batch(args)
+
+
+@bench("ci.startup", [])
+def _ci_startup(w: Path):
+    # whole processes, as a workflow step starts them; compare with python -c pass
+    env = {k: v for k, v in os.environ.items() if k not in ("ANTHROPIC_API_KEY", "OPENAI_API_KEY")}
+    cmds = [[sys.executable, "-c", "pass"],
+            [sys.executable, str(ROOT / "scripts/ci.py"), "budget", "pre"],
+            [sys.executable, str(ROOT / "scripts/ci.py"), "autopr"]]
+
+    def run():
+        ms = []
+        for cmd in cmds:
+            t0 = time.perf_counter()
+            for _ in range(10):
+                subprocess.run(cmd, env=env, stdout=subprocess.DEVNULL, check=True)
+            ms.append(round((time.perf_counter() - t0) * 100, 1))
+        # the cost of a step is what it adds to the interpreter start
+        return "ms per start: bare {}, budget pre {} (+{:.1f}), autopr without key {} (+{:.1f})".format(
+            ms[0], ms[1], ms[1] - ms[0], ms[2], ms[2] - ms[0])
+    return run
+
+
+def child(name: str, work: Path, repeat: int, alloc: bool) -> Dict:
+    b = BENCHES[name]
+    scratch = BENCH_DIR / "scratch" / name
+    shutil.rmtree(scratch, ignore_errors=True)
+    scratch.mkdir(parents=True)
+    os.chdir(scratch)
+    os.environ.update({
+        "SCORE_REPORTS_DIR": str(scratch / "reports"),
+        "BUDGET_FILE": str(scratch / "budget/actions-budget.jsonl"),
+        "ANTHROPIC_API_KEY": "bench",
+        "OPENAI_API_KEY": "bench",
+        "LLM_CACHE_BYPASS": "1",
+    })
+    for k in ("CI_TRACE", "CI_PROFILE", "GITHUB_STEP_SUMMARY", "GITHUB_OUTPUT", "LLM_RPM"):
+        os.environ.pop(k, None)
+    if b.llm >= 0:
+        import stub_llm
+        _, url = stub_llm.start(b.llm)
+        os.environ["ANTHROPIC_BASE_URL"] = os.environ["OPENAI_BASE_URL"] = url
+    sys.path[:0] = [str(ROOT / "scripts"), str(ROOT / ".github/scripts")]
+
+    made = b.fn(work)
+    reset, run = made if isinstance(made, tuple) else (None, made)
+
+    def prepare():
+        if b.cold:
+            # project indexes live in the project's own .ci_cache/
+            for cache in [scratch / ".ci_cache", *work.glob("*/.ci_cache")]:
+                shutil.rmtree(cache, ignore_errors=True)
+        if reset:
+            reset()
+
+    times = []
+    result = None
+    for _ in range(repeat):
+        prepare()
+        t0 = time.perf_counter()
+        result = run()
+        times.append(time.perf_counter() - t0)
+    out = {
+        "name": name,
+        "seconds": round(min(times), 4),
+        "median": round(sorted(times)[len(times) // 2], 4),
+        "runs": len(times),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "result": str(result)[:120],
+    }
+    if alloc:
+        prepare()
+        tracemalloc.start()
+        run()
+        out["alloc_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1)
+        tracemalloc.stop()
+    return out
+
+
+# ----------------------------------------------------------------------
+# Parent: run, compare, report
+# ----------------------------------------------------------------------
+
+def run_one(name: str, work: Path, repeat: int, alloc: bool) -> Dict:
+    res = BENCH_DIR / f".result-{name}.json"
+    cmd = [sys.executable, str(Path(__file__).resolve()), "--child", name, "--work", str(work),
+           "--repeat", str(repeat), "--result", str(res)] + (["--alloc"] if alloc else [])
+    # the scripts print progress; only the result file matters here
+    p = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if p.returncode != 0:
+        return {"name": name, "error": (p.stderr.strip().splitlines() or ["failed"])[-1]}
+    return json.loads(res.read_text(encoding="utf-8"))
+
+
+def compare(results: List[Dict], baseline: Optional[Dict], threshold: float, mem_threshold: float) -> List[Dict]:
+    base = (baseline or {}).get("results", {})
+    for r in results:
+        b = base.get(r["name"])
+        if "error" in r:
+            r["status"] = "error"
+        elif not b:
+            r["status"] = "new"
+        else:
+            r["time_ratio"] = round(r["seconds"] / b["seconds"], 3) if b["seconds"] else None
+            r["rss_ratio"] = round(r["peak_rss_mb"] / b["peak_rss_mb"], 3) if b.get("peak_rss_mb") else None
+            slower = r["seconds"] > b["seconds"] * (1 + threshold) and r["seconds"] - b["seconds"] > MIN_DELTA_S
+            bigger = r["rss_ratio"] is not None and r["rss_ratio"] > 1 + mem_threshold
+            r["status"] = "REGRESSION" if slower or bigger else "ok"
+    return results
+
+
+def table(results: List[Dict]) -> List[str]:
+    lines = ["| benchmark | best s | median s | peak RSS MB | vs baseline | status |", "|---|---:|---:|---:|---:|---|"]
+    for r in results:
+        if "error" in r:
+            lines.append(f"| {r['name']} | | | | | error: {r['error'][:80]} |")
+            continue
+        vs = f"x{r['time_ratio']:.2f} time, x{r['rss_ratio']:.2f} RSS" if r.get("time_ratio") and r.get("rss_ratio") else ""
+        lines.append(f"| {r['name']} | {r['seconds']:.3f} | {r['median']:.3f} | {r['peak_rss_mb']:.0f} | {vs} | {r['status']} |")
+    return lines
+
+
+def _write_json(path: Path, data: Dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data, indent=1), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmarks of the CI tooling on synthetic inputs")
+    ap.add_argument("--scale", type=float, default=1.0, help="Input size multiplier (0.05 for a quick run)")
+    ap.add_argument("--only", default="", help="Comma-separated benchmark name prefixes")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--alloc", action="store_true", help="Also measure peak Python allocations (tracemalloc, one extra run)")
+    ap.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    ap.add_argument("--update-baseline", action="store_true", help="Store these results as the baseline")
+    ap.add_argument("--threshold", type=float, default=float(os.environ.get("BENCH_THRESHOLD", "0.25")),
+                    help="Allowed slowdown vs the baseline (0.25 = 25%%)")
+    ap.add_argument("--mem-threshold", type=float, default=float(os.environ.get("BENCH_MEM_THRESHOLD", "0.25")))
+    ap.add_argument("--out", type=Path, default=BENCH_DIR / "results.json")
+    ap.add_argument("--list", action="store_true")
+    ap.add_argument("--child", help=argparse.SUPPRESS)
+    ap.add_argument("--work", type=Path, help=argparse.SUPPRESS)
+    ap.add_argument("--result", type=Path, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        args.result.write_text(json.dumps(child(args.child, args.work, args.repeat, args.alloc)), encoding="utf-8")
+        return
+    if args.list:
+        for b in BENCHES.values():
+            print(f"{b.name:22} inputs: {', '.join(b.needs) or '-'}{' (cold)' if b.cold else ''}{' (LLM stub)' if b.llm >= 0 else ''}")
+        return
+
+    prefixes = [p for p in args.only.split(",") if p]
+    names = [n for n in BENCHES if not prefixes or any(n.startswith(p) for p in prefixes)]
+    work = BENCH_DIR / f"work-{args.scale:g}"
+    print(f"Preparing inputs in {work} (scale {args.scale:g})", file=sys.stderr)
+    ensure(sorted({w for n in names for w in BENCHES[n].needs}), work, args.scale)
+
+    results = []
+    for n in names:
+        r = run_one(n, work, args.repeat, args.alloc)
+        results.append(r)
+        print(f"  {n}: " + (r["error"] if "error" in r else f"{r['seconds']:.3f}s, {r['peak_rss_mb']:.0f} MB"), file=sys.stderr)
+
+    try:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        baseline = None
+    if baseline and baseline.get("scale") != args.scale:
+        print(f"Baseline was recorded at scale {baseline.get('scale')}, not compared", file=sys.stderr)
+        baseline = None
+    compare(results, baseline, args.threshold, args.mem_threshold)
+    meta = {"version": VERSION, "scale": args.scale, "python": platform.python_version(),
+            "machine": f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPU(s)",
+            "date": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+    _write_json(args.out, dict(meta, threshold=args.threshold, results=results))
+
+    lines = table(results)
+    print("\n".join(lines))
+    if os.environ.get("GITHUB_STEP_SUMMARY"):
+        with open(os.environ["GITHUB_STEP_SUMMARY"], "a", encoding="utf-8") as f:
+            f.write("## ⏱️ CI tooling benchmarks\n\n" + "\n".join(lines) + "\n")
+
+    if args.update_baseline:
+        kept = (baseline or {}).get("results", {})
+        kept.update({r["name"]: {k: r[k] for k in ("seconds", "median", "peak_rss_mb")} for r in results if "error" not in r})
+        _write_json(args.baseline, dict(meta, results=kept))
+        print(f"Baseline written to {args.baseline}", file=sys.stderr)
+    bad = [r["name"] for r in results if r["status"] in ("REGRESSION", "error")]
+    if bad and not args.update_baseline:
+        print(f"{len(bad)} benchmark(s) regressed or failed: {', '.join(bad)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Local stand-in for the Anthropic Messages and OpenAI Responses endpoints.
+
+Answers every POST with a canned unified diff, streamed as SSE when asked,
+after a fixed delay, and reports token usage like the real APIs so the cost
+accounting paths run too. Point the scripts at it with ANTHROPIC_BASE_URL /
+OPENAI_BASE_URL; nothing leaves the machine.
+
+    stub_llm.py --port 8765 --latency 0.3
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+PATCH = """diff --git a/Assets/Scripts/Bench/BenchBehaviour0.cs b/Assets/Scripts/Bench/BenchBehaviour0.cs
+--- a/Assets/Scripts/Bench/BenchBehaviour0.cs
++++ b/Assets/Scripts/Bench/BenchBehaviour0.cs
+@@ -1,3 +1,4 @@
++// benchmark stub
+ using UnityEngine;
+ using System.Collections.Generic;
+
+"""
+
+
+def _sse(events) -> bytes:
+    return "".join(f"event: {e}\ndata: {json.dumps(d)}\n\n" for e, d in events).encode()
+
+
+def _anthropic(body: dict, tokens_in: int) -> Tuple[str, bytes]:
+    usage = {"input_tokens": tokens_in, "output_tokens": len(PATCH) // 4}
+    if not body.get("stream"):
+        return "application/json", json.dumps({"content": [{"type": "text", "text": PATCH}], "usage": usage}).encode()
+    return "text/event-stream", _sse([
+        ("message_start", {"type": "message_start", "message": {"usage": {"input_tokens": tokens_in}}}),
+        ("content_block_delta", {"type": "content_block_delta", "delta": {"type": "text_delta", "text": PATCH}}),
+        ("message_delta", {"type": "message_delta", "usage": {"output_tokens": usage["output_tokens"]}}),
+        ("message_stop", {"type": "message_stop"}),
+    ])
+
+
+def _openai(body: dict, tokens_in: int) -> Tuple[str, bytes]:
+    usage = {"input_tokens": tokens_in, "output_tokens": len(PATCH) // 4}
+    if not body.get("stream"):
+        return "application/json", json.dumps({"output_text": PATCH, "usage": usage}).encode()
+    return "text/event-stream", _sse([
+        ("response.output_text.delta", {"type": "response.output_text.delta", "delta": PATCH}),
+        ("response.completed", {"type": "response.completed", "response": {"usage": usage}}),
+    ])
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # headers and body go out in two writes; with Nagle on, the second one
+    # waits for the client's delayed ACK (~40 ms per call)
+    disable_nagle_algorithm = True
+    latency = 0.0
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        raw = self.rfile.read(int(self.headers.get("content-length") or 0))
+        body = json.loads(raw or b"{}")
+        time.sleep(self.latency)
+        ctype, data = (_openai if self.path.endswith("/responses") else _anthropic)(body, len(raw) // 4)
+        self.send_response(200)
+        self.send_header("content-type", ctype)
+        self.send_header("content-length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start(latency: float = 0.0, port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """Serve from a daemon thread; returns (server, base URL)."""
+    handler = type("StubHandler", (Handler,), {"latency": latency})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Offline stub for the Anthropic / OpenAI endpoints")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency", type=float, default=0.0, help="Seconds before each answer")
+    args = ap.parse_args()
+    server, url = start(args.latency, args.port)
+    print(f"LLM stub on {url} (ANTHROPIC_BASE_URL / OPENAI_BASE_URL)", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
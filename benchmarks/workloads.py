@@ -0,0 +1,233 @@
+"""Deterministic synthetic inputs for the benchmarks.
+
+Every generator writes through a buffered file and never holds its whole
+output in memory, so a multi-hundred-MB log costs no more RAM to produce than
+a small one. Sizes are given at scale 1.0; run.py multiplies them by --scale.
+"""
+import json
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+LOG_MB = 200
+CS_FILES = 400
+SCENE_OBJECTS = 30000
+PREFABS = 50
+DIFF_FILES = 200
+DIFF_HUNKS = 10
+SCORE_RUNS = 5000
+BUDGET_RUNS = 5000
+NUNIT_TESTS = 50000
+BUNDLE_MB = 20
+
+SCRIPT_DIR = "Assets/Scripts/Bench"
+NOISE = [
+    "Refreshing native plugins compatible for Editor in 1.23 ms, found 3 plugins.",
+    "[Package Manager] Done resolving packages in 2.31 seconds",
+    "Reloading assemblies after forced synchronous recompile.",
+    "UnityEngine.Debug:Log (object)",
+    "UnityEngine.StackTraceUtility:ExtractStackTrace ()",
+    "Loaded scene 'Assets/Scenes/Game.unity'",
+    "[Licensing::Client] Successfully resolved entitlement details",
+    "Asset Pipeline Refresh (id=8c0f): Total: 0.412 seconds - Initiated by RefreshV2(NoUpdateAssetOptions)",
+    "Start importing Assets/Art/Texture_{n}.png using Guid(3f1c2b) Importer(-1,00000000000000000000000000000000)",
+    "  ImportTime: 0.0{n} seconds",
+]
+
+
+def _guid(rng: random.Random) -> str:
+    return "%032x" % rng.getrandbits(128)
+
+
+def _class(i: int) -> str:
+    return f"BenchBehaviour{i}"
+
+
+def unity_log(path: Path, mb: float, seed: int = 1) -> None:
+    """Editor log: mostly noise, with repeated compile errors, warnings, exceptions and test failures."""
+    rng = random.Random(seed)
+    target = int(mb * 1024 * 1024)
+    written = 0
+    with open(path, "w", encoding="utf-8", buffering=1 << 20) as f:
+        n = 0
+        while written < target:
+            n += 1
+            r = rng.random()
+            k = rng.randrange(CS_FILES)
+            if r < 0.002:
+                line = (f"{SCRIPT_DIR}/{_class(k % 20)}.cs({10 + k % 40},9): error CS0103: "
+                        f"The name 'missing{k % 7}' does not exist in the current context")
+            elif r < 0.01:
+                line = f"{SCRIPT_DIR}/{_class(k)}.cs({k % 90 + 1},13): warning CS0168: The variable 'e' is declared but never used"
+            elif r < 0.012:
+                line = (f"NullReferenceException: Object reference not set to an instance of an object\n"
+                        f"Bench.{_class(k)}.Update () (at {SCRIPT_DIR}/{_class(k)}.cs:{k % 80 + 1})\n"
+                        f"UnityEngine.Debug:LogException (System.Exception)")
+            elif r < 0.0125:
+                line = f"Failed: Bench.Tests.Fixture{k % 30}.Test{k % 5}"
+            else:
+                line = NOISE[n % len(NOISE)].replace("{n}", str(n % 1000))
+            line += "\n"
+            f.write(line)
+            written += len(line)
+        f.write("Scripts have compiler errors.\n")
+
+
+def cs_source(i: int, methods: int = 12) -> str:
+    out = ["using UnityEngine;", "using System.Collections.Generic;", "", "namespace Bench", "{",
+           f"    public class {_class(i)} : MonoBehaviour", "    {",
+           f"        [SerializeField] private float speed = {i % 10}.5f;",
+           "        private readonly List<int> values = new List<int>();", ""]
+    for m in range(methods):
+        out += [f"        public int Compute{m}(int x)", "        {",
+                f"            var total = x * {m + 1};",
+                "            for (var k = 0; k < values.Count; k++)", "            {",
+                "                total += values[k] % (k + 1);", "            }",
+                f"            if (total > {1000 + m}) {{ Debug.Log(\"big {m}\"); }}",
+                "            return total;", "        }", ""]
+    out += ["        private void Update()", "        {", "            transform.Rotate(0, speed * Time.deltaTime, 0);",
+            "        }", "    }", "}", ""]
+    return "\n".join(out)
+
+
+def _meta(path: Path, guid: str) -> None:
+    path.with_name(path.name + ".meta").write_text(f"fileFormatVersion: 2\nguid: {guid}\n", encoding="utf-8")
+
+
+def _game_object(f, rng: random.Random, fid: int, name: str, script_guid: str, cls: str) -> None:
+    go, tr, mb = fid, fid + 1, fid + 2
+    f.write(f"--- !u!1 &{go}\nGameObject:\n  m_ObjectHideFlags: 0\n  serializedVersion: 6\n  m_Component:\n"
+            f"  - component: {{fileID: {tr}}}\n  - component: {{fileID: {mb}}}\n  m_Layer: 0\n  m_Name: {name}\n"
+            f"  m_TagString: Untagged\n  m_IsActive: 1\n")
+    f.write(f"--- !u!4 &{tr}\nTransform:\n  m_ObjectHideFlags: 0\n  m_GameObject: {{fileID: {go}}}\n"
+            f"  m_LocalRotation: {{x: 0, y: 0, z: 0, w: 1}}\n  m_LocalPosition: {{x: {rng.randrange(100)}, y: 0, z: 0}}\n"
+            f"  m_LocalScale: {{x: 1, y: 1, z: 1}}\n  m_Children: []\n  m_Father: {{fileID: 0}}\n")
+    f.write(f"--- !u!114 &{mb}\nMonoBehaviour:\n  m_ObjectHideFlags: 0\n  m_GameObject: {{fileID: {go}}}\n"
+            f"  m_Enabled: 1\n  m_Script: {{fileID: 11500000, guid: {script_guid}, type: 3}}\n  m_Name: \n"
+            f"  m_EditorClassIdentifier: Assembly-CSharp::Bench.{cls}\n  speed: {rng.random():.3f}\n")
+
+
+def unity_scene(path: Path, objects: int, script_guids: List[str], prefab_guids: List[str] = (), seed: int = 2) -> None:
+    """A .unity scene of `objects` GameObjects (Transform + MonoBehaviour each) plus prefab instances."""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8", buffering=1 << 20) as f:
+        f.write("%YAML 1.1\n%TAG !u! tag:unity3d.com,2011:\n")
+        fid = 1000
+        for i in range(objects):
+            k = i % len(script_guids)
+            _game_object(f, rng, fid, f"Object{i}", script_guids[k], _class(k))
+            fid += 3
+        for i, g in enumerate(prefab_guids):
+            f.write(f"--- !u!1001 &{fid}\nPrefabInstance:\n  m_ObjectHideFlags: 0\n  serializedVersion: 2\n"
+                    f"  m_Modification:\n    m_Modifications:\n    - target: {{fileID: 1, guid: {g}, type: 3}}\n"
+                    f"      propertyPath: m_Name\n      value: Instance{i}\n"
+                    f"  m_SourcePrefab: {{fileID: 100100000, guid: {g}, type: 3}}\n")
+            fid += 1
+
+
+def unity_project(root: Path, scale: float, seed: int = 3) -> None:
+    """Assets/ with C# scripts (+ .meta), prefabs using them and one large scene."""
+    rng = random.Random(seed)
+    scripts = root / SCRIPT_DIR
+    scripts.mkdir(parents=True, exist_ok=True)
+    n = max(20, int(CS_FILES * scale))
+    script_guids = []
+    for i in range(n):
+        p = scripts / f"{_class(i)}.cs"
+        p.write_text(cs_source(i), encoding="utf-8")
+        script_guids.append(_guid(rng))
+        _meta(p, script_guids[-1])
+    prefabs = root / "Assets/Prefabs"
+    prefabs.mkdir(parents=True, exist_ok=True)
+    prefab_guids = []
+    for i in range(max(5, int(PREFABS * scale))):
+        p = prefabs / f"Bench{i}.prefab"
+        unity_scene(p, 5, script_guids[i::max(1, len(script_guids) // 5)][:5] or script_guids[:1], seed=i)
+        prefab_guids.append(_guid(rng))
+        _meta(p, prefab_guids[-1])
+    scenes = root / "Assets/Scenes"
+    scenes.mkdir(parents=True, exist_ok=True)
+    unity_scene(scenes / "Bench.unity", max(100, int(SCENE_OBJECTS * scale)), script_guids, prefab_guids)
+    _meta(scenes / "Bench.unity", _guid(rng))
+
+
+def unified_diff(root: Path, files: int, hunks: int) -> str:
+    """A multi-file unified diff against the scripts of unity_project(root), one edit per hunk."""
+    out = []
+    for i in range(files):
+        rel = f"{SCRIPT_DIR}/{_class(i)}.cs"
+        lines = (root / rel).read_text(encoding="utf-8").split("\n")
+        out += [f"diff --git a/{rel} b/{rel}", f"--- a/{rel}", f"+++ b/{rel}"]
+        shift = 0
+        for h in range(min(hunks, 12)):
+            at = 12 + h * 11  # the "var total" line of method h
+            ctx_a, ctx_b = lines[at - 3:at], lines[at + 1:at + 4]
+            out.append(f"@@ -{at - 2},7 +{at - 2 + shift},8 @@")
+            out += [" " + l for l in ctx_a] + ["-" + lines[at],
+                                              "+" + lines[at].replace(";", " + 1;"),
+                                              "+            total -= 1;"] + [" " + l for l in ctx_b]
+            shift += 1
+    return "\n".join(out) + "\n"
+
+
+def score_history(path: Path, runs: int, seed: int = 4) -> None:
+    """Legacy score_history.json: [{timestamp, score}] (what score_series.migrate imports)."""
+    rng = random.Random(seed)
+    t0 = datetime(2024, 1, 1)
+    score = 60.0
+    hist = []
+    for i in range(runs):
+        score = min(100.0, max(0.0, score + rng.gauss(0.02, 2.0)))
+        hist.append({"timestamp": (t0 + timedelta(hours=3 * i)).isoformat(), "score": round(score, 2)})
+    path.write_text(json.dumps(hist), encoding="utf-8")
+
+
+def actions_budget(path: Path, runs: int, month: str, seed: int = 5) -> None:
+    """Legacy actions-budget.json: {month, total_eur, runs: [...]} (what budget_guard.migrate imports)."""
+    rng = random.Random(seed)
+    recs = []
+    for i in range(runs):
+        dur = round(rng.uniform(2, 40), 2)
+        recs.append({"ts_utc": f"{month}-01T00:00:00Z", "run_id": str(100000 + i), "ref": "refs/heads/main",
+                     "duration_min": dur, "cost_eur": round(dur * 0.01, 2), "source": "estimate"})
+    path.write_text(json.dumps({"month": month, "total_eur": round(sum(r["cost_eur"] for r in recs), 2),
+                                "runs": recs}), encoding="utf-8")
+
+
+def nunit_xml(path: Path, tests: int, seed: int = 6) -> None:
+    """NUnit 3 results as written by Unity's test runner, ~1% failures with stack traces."""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8", buffering=1 << 20) as f:
+        f.write(f'<?xml version="1.0" encoding="utf-8"?>\n<test-run id="2" testcasecount="{tests}" result="Failed">\n'
+                '<test-suite type="Assembly" name="Bench.Tests.dll">\n')
+        per = 10
+        for fx in range(max(1, tests // per)):
+            cls = f"Bench.Tests.Fixture{fx}"
+            f.write(f'<test-suite type="TestFixture" name="Fixture{fx}" fullname="{cls}" classname="{cls}">\n')
+            for t in range(per):
+                dur = rng.expovariate(1 / (0.02 if fx % 9 else 1.5))
+                failed = rng.random() < 0.01
+                f.write(f'<test-case id="{fx}-{t}" name="Test{t}" fullname="{cls}.Test{t}" methodname="Test{t}" '
+                        f'classname="{cls}" result="{"Failed" if failed else "Passed"}" duration="{dur:.4f}">')
+                if failed:
+                    f.write(f"<failure><message><![CDATA[Expected: {t}\n  But was:  {t + 1}]]></message>"
+                            f"<stack-trace><![CDATA[at {cls}.Test{t} () [0x00001] in "
+                            f"/github/workspace/Assets/Tests/Fixture{fx}.cs:{t + 10}]]></stack-trace></failure>")
+                f.write("<output><![CDATA[" + "frame log line\n" * 3 + "]]></output></test-case>\n")
+            f.write("</test-suite>\n")
+        f.write("</test-suite>\n</test-run>\n")
+
+
+def blob(path: Path, mb: float, seed: int = 7) -> None:
+    """Text that compresses like source code (repetitive, not random bytes)."""
+    rng = random.Random(seed)
+    words = ["public", "void", "int", "return", "var", "if", "for", "Debug.Log", "transform", "{", "}", ";"]
+    target = int(mb * 1024 * 1024)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8", buffering=1 << 20) as f:
+        written = 0
+        while written < target:
+            line = " ".join(rng.choice(words) for _ in range(12)) + "\n"
+            f.write(line)
+            written += len(line)
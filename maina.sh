@@ -7,6 +7,8 @@ REMOTE="${REMOTE:-origin}"
 DEV_BRANCH="${DEV_BRANCH:-dev}"
 MAIN_BRANCH="${MAIN_BRANCH:-main}"
 
+BACKUP_PY="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)/scripts/backup_store.py"
+
 log(){ echo -e "[$(date '+%Y-%m-%d %H:%M:%S')] $*"; }
 die(){ log "❌ $*"; exit 1; }
 
@@ -65,10 +67,8 @@ fi
 if [ -f "$WF" ]; then
   log "🧩 Patch workflow: ajout référence Agent si manquante"
 
-  STAMP="$(date +%Y%m%d_%H%M%S)"
-  mkdir -p "$REPO/.patch-backups/$STAMP"
-  cp "$WF" "$REPO/.patch-backups/$STAMP/auto-improve.yml.bak"
-  log "🗂️ Backup workflow: .patch-backups/$STAMP/auto-improve.yml.bak"
+  python3 "$BACKUP_PY" save --label maina .github/workflows/auto-improve.yml
+  log "🗂️ Backup workflow: .patch-backups (restauration: backup_store.py restore --label maina)"
 
   python3 - "$WF" <<'PY'
 from __future__ import annotations
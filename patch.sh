@@ -9,178 +9,17 @@ test -f .github/workflows/auto-improve.yml || { echo "❌ Missing .github/workfl
 
 mkdir -p .github/scripts .github/budget
 
-STAMP="$(date +%Y%m%d-%H%M%S)"
-mkdir -p ".patch-backups/$STAMP"
-cp .github/workflows/auto-improve.yml ".patch-backups/$STAMP/auto-improve.yml.bak"
+# deduplicated backup: unchanged content is not stored again (scripts/backup_store.py restore --label patch)
+python3 scripts/backup_store.py save --label patch .github/workflows/auto-improve.yml
+python3 scripts/backup_store.py gc --keep "${BACKUP_KEEP:-20}"
 
 # --------------------------
-# 1) Create generate-uml-diagrams.py if missing
+# 1) generate-uml-diagrams.py is versioned in the repo (diagrams are derived
+#    from the C# symbol index in scripts/), no template to install anymore
 # --------------------------
-if [ ! -f .github/scripts/generate-uml-diagrams.py ]; then
-  echo "🧩 Creating .github/scripts/generate-uml-diagrams.py ..."
-  cat > .github/scripts/generate-uml-diagrams.py <<'PY'
-#!/usr/bin/env python3
-from __future__ import annotations
-from pathlib import Path
-from typing import Dict, List
-import sys
-
-DIAGRAMS_DIR = Path(".cursor/agents/diagrams")
-DIAGRAMS_DIR.mkdir(parents=True, exist_ok=True)
-
-def write(name: str, content: str) -> Path:
-    p = DIAGRAMS_DIR / name
-    p.write_text(content, encoding="utf-8")
-    return p
-
-def arch(version:int)->Dict:
-    m = f"""```mermaid
-flowchart TB
-  subgraph Build
-    GH[GitHub Actions] --> CI[auto-improve.yml]
-    CI --> DGM[generate-uml-diagrams.py]
-    CI --> AI[auto-improve-ai.py / auto-improve.py]
-    CI --> UB[unity-builder (docker)]
-  end
-
-  subgraph Runtime
-    C[Client (NGO)] <--> S[Dedicated Server (authoritative)]
-    C -->|RPC| NGO[Netcode for GameObjects]
-    S -->|RPC| NGO
-  end
-
-  UB -->|Artifacts| C
-  UB -->|Artifacts| S
-```"""
-    return {"type":"architecture","mermaid":write(f"architecture-v{version}.mmd", m), "desc":"Architecture CI + runtime (NGO)"}
-
-def component(version:int)->Dict:
-    m = f"""```mermaid
-flowchart LR
-  Client[Client App] --> NM[NetworkManager]
-  Server[Dedicated Server] --> NM
-  NM --> UT[UnityTransport]
-  NM --> RPC[ServerRpc/ClientRpc]
-  RPC --> AUTH[Authoritative Game Logic]
-  AUTH --> STATE[Replicated State]
-  STATE --> Client
-```"""
-    return {"type":"component","mermaid":write(f"component-v{version}.mmd", m), "desc":"Composants NGO + logique autoritaire"}
-
-def sequence(version:int)->Dict:
-    m = f"""```mermaid
-sequenceDiagram
-  participant Client
-  participant NM as NGO/NetworkManager
-  participant Server
-  participant Game as GameLogic
-
-  Client->>NM: StartClient()
-  NM->>Server: Connect
-  Server-->>NM: Accept + Spawn
-  Server->>Game: Init authoritative state
-  Server-->>Client: ClientRpc initial snapshot
-  Client->>Client: Load scene / init UI
-```"""
-    return {"type":"sequence","mermaid":write(f"sequence-v{version}.mmd", m), "desc":"Séquence de connexion NGO"}
-
-def fsm(version:int)->Dict:
-    m = f"""```mermaid
-stateDiagram-v2
-  [*] --> Boot
-  Boot --> MainMenu
-  MainMenu --> Connecting: start client/server
-  Connecting --> InLobby: connected
-  InLobby --> InGame: start match
-  InGame --> InLobby: end match
-  InLobby --> MainMenu: disconnect
-  Connecting --> MainMenu: fail/timeout
-  InGame --> [*]: quit
-```"""
-    return {"type":"fsm","mermaid":write(f"fsm-v{version}.mmd", m), "desc":"FSM session"}
-
-def er(version:int)->Dict:
-    m = f"""```mermaid
-erDiagram
-  PLAYER ||--o{{ SESSION : joins
-  SESSION ||--|| GAME : runs
-  SESSION ||--o{{ ENTITY : has
-
-  PLAYER {{
-    string playerId
-    string displayName
-  }}
-  SESSION {{
-    string sessionId
-    string mapId
-  }}
-  GAME {{
-    string gameId
-    string ruleset
-  }}
-  ENTITY {{
-    string netId
-    string prefab
-  }}
-```"""
-    return {"type":"er","mermaid":write(f"er-v{version}.mmd", m), "desc":"ER logique"}
-
-def links(version:int)->Dict:
-    m = f"""```mermaid
-graph LR
-  Core --> NetworkingShared
-  NetworkingShared --> NetworkingClient
-  NetworkingShared --> NetworkingServer
-  NetworkingServer --> DedicatedServer
-  NetworkingClient --> ClientApp
-```"""
-    return {"type":"links","mermaid":write(f"links-v{version}.mmd", m), "desc":"Liens assemblies"}
-
-def class_diag(version:int)->Dict:
-    m = f"""```mermaid
-classDiagram
-  class NetworkManager
-  class UnityTransport
-  class ServerGame
-  class ClientGame
-  class ReplicatedState
-
-  NetworkManager --> UnityTransport
-  ServerGame --> ReplicatedState : writes
-  ClientGame --> ReplicatedState : reads
-```"""
-    return {"type":"class","mermaid":write(f"class-v{version}.mmd", m), "desc":"Diagramme de classes (haut niveau)"}
-
-def generate_all(version:int)->List[Dict]:
-    return [
-        arch(version),
-        component(version),
-        sequence(version),
-        fsm(version),
-        er(version),
-        links(version),
-        class_diag(version),
-    ]
-
-def main():
-    version = int(sys.argv[1]) if len(sys.argv) > 1 else 1
-    diags = generate_all(version)
-    summary = DIAGRAMS_DIR / f"diagrams-v{version}.md"
-    lines = [f"# Diagrams v{version}", ""]
-    for d in diags:
-        lines.append(f"## {d['type']}")
-        lines.append(f"- {d['desc']}")
-        lines.append(f"- Mermaid: `{d['mermaid']}`")
-        lines.append("")
-    summary.write_text("\n".join(lines), encoding="utf-8")
-    print(f"✅ {len(diags)} diagramme(s) généré(s)")
-    print(f"📄 Résumé: {summary}")
-
-if __name__ == "__main__":
-    main()
-PY
-  chmod +x .github/scripts/generate-uml-diagrams.py
-fi
+test -f .github/scripts/generate-uml-diagrams.py || { echo "❌ Missing .github/scripts/generate-uml-diagrams.py (update the checkout)"; exit 1; }
+# the workflow steps go through the single CLI (scripts/ci.py)
+test -f scripts/ci.py || { echo "❌ Missing scripts/ci.py (update the checkout)"; exit 1; }
 
 # --------------------------
 # 2) Create budget_guard.py if missing
@@ -320,7 +159,7 @@ if "Budget Guard (pre)" not in y:
         "        id: budget_pre\n"
         "        run: |\n"
         "          echo \"BUDGET_START_TS=$(date +%s)\" >> $GITHUB_ENV\n"
-        "          PHASE=pre python3 .github/scripts/budget_guard.py\n"
+        "          python3 scripts/ci.py budget pre\n"
         "        env:\n"
         "          BUDGET_EUR: 200\n"
         "          COST_PER_MIN_EUR: 0.01\n",
@@ -334,7 +173,7 @@ if "Generate UML Diagrams" not in y:
         "\n      - name: Generate UML Diagrams\n"
         "        run: |\n"
         "          VERSION=$(date +%Y%m%d%H%M)\n"
-        "          python3 .github/scripts/generate-uml-diagrams.py 1\n"
+        "          python3 scripts/ci.py diagrams 1\n"
     )
 else:
     # Replace existing diagram step body with ours (avoid mmdc)
@@ -342,7 +181,7 @@ else:
         r"- name: Generate UML Diagrams[\s\S]*?(?=\n\s*- name:|\Z)",
         "- name: Generate UML Diagrams\n"
         "        run: |\n"
-        "          python3 .github/scripts/generate-uml-diagrams.py 1\n",
+        "          python3 scripts/ci.py diagrams 1\n",
         y
     )
 
@@ -353,7 +192,7 @@ if "Budget Guard (post)" not in y:
         "\n      - name: Budget Guard (post)\n"
         "        if: always()\n"
         "        run: |\n"
-        "          PHASE=post BUDGET_START_TS=${BUDGET_START_TS:-0} python3 .github/scripts/budget_guard.py\n"
+        "          BUDGET_START_TS=${BUDGET_START_TS:-0} python3 scripts/ci.py budget post\n"
         "        env:\n"
         "          BUDGET_EUR: 200\n"
         "          COST_PER_MIN_EUR: 0.01\n"
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""Asset dependency graph over Assets/ and the scenes/assemblies a change impacts.
+
+Nodes are asset paths plus one `asm:<name>` node per assembly. Edges read
+"depends on":
+
+- .unity/.prefab/.asset -> every asset referenced by GUID (scripts, prefabs,
+  materials, .inputactions, ...); anything holding a NetworkManager also
+  depends on DefaultNetworkPrefabs.asset, which Netcode loads implicitly
+- asm:<A> -> each .cs compiled into A, its .asmdef, and the assemblies it
+  references; each .cs -> asm:<A> (a script is rebuilt with its assembly)
+
+A change impacts everything that reaches it, so impacted scenes and
+assemblies are a reverse breadth-first walk from the changed paths (.meta
+changes count as changes to their asset).
+
+GUIDs come from unity_yaml's index, which only reparses YAML files whose
+content changed. The graph is stored compactly in .ci_cache/asset_graph.json
+(ASSET_GRAPH) as a node list plus CSR arrays (offsets, targets), together
+with the commit it was built for; a run on the same commit and unchanged
+tree reuses it as is.
+
+    asset_graph.py impacted --base origin/main [--github-output]
+    asset_graph.py deps Assets/Scenes/Game.unity
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+import unity_yaml
+
+GRAPH_FILE = Path(os.environ.get("ASSET_GRAPH", ".ci_cache/asset_graph.json"))
+ASSETS_DIR = "Assets"
+# Changes outside Assets/ that invalidate every scene and assembly.
+GLOBAL_PREFIXES = ("Packages/manifest.json", "Packages/packages-lock.json", "ProjectSettings/")
+# Netcode registers this list implicitly: whatever holds a NetworkManager depends on it.
+NETWORK_PREFABS = "Assets/DefaultNetworkPrefabs.asset"
+VERSION = 1
+META_GUID_RE = re.compile(r"^guid: ([0-9a-f]{32})", re.M)
+
+
+# ----------------------------------------------------------------------
+# Assemblies (.asmdef)
+# ----------------------------------------------------------------------
+
+def load_asmdefs(root: Path) -> Dict[str, Dict]:
+    """asmdef directory -> {name, refs, file}; GUID:... references are resolved through the .meta files."""
+    asmdefs: Dict[str, Dict] = {}
+    guids: Dict[str, str] = {}
+    for p in sorted((root / ASSETS_DIR).rglob("*.asmdef")):
+        data = json.loads(p.read_text(encoding="utf-8"))
+        rel_dir = p.parent.relative_to(root).as_posix()
+        asmdefs[rel_dir] = {"name": data["name"], "refs": data.get("references", []),
+                            "file": p.relative_to(root).as_posix()}
+        meta = p.with_name(p.name + ".meta")
+        if meta.exists():
+            m = META_GUID_RE.search(meta.read_text(encoding="utf-8", errors="replace"))
+            if m:
+                guids[m.group(1)] = data["name"]
+    for a in asmdefs.values():
+        a["refs"] = sorted(guids.get(r[5:], r[5:13]) if r.startswith("GUID:") else r for r in a["refs"])
+    return asmdefs
+
+
+def assembly_of(rel: str, asmdefs: Dict[str, Dict]) -> str:
+    d = rel.rpartition("/")[0]
+    while d:
+        if d in asmdefs:
+            return asmdefs[d]["name"]
+        d = d.rpartition("/")[0]
+    return "Assembly-CSharp-Editor" if "/Editor/" in f"/{rel}" else "Assembly-CSharp"
+
+
+# ----------------------------------------------------------------------
+# Graph
+# ----------------------------------------------------------------------
+
+class AssetGraph:
+    def __init__(self, edges: Dict[str, List[str]], commit: str = ""):
+        self.edges = edges
+        self.commit = commit
+        self._reverse: Optional[Dict[str, List[str]]] = None
+
+    @classmethod
+    def build(cls, root: Path = Path("."), index: Optional[unity_yaml.UnityIndex] = None) -> "AssetGraph":
+        idx = index or unity_yaml.load(root)
+        edges: Dict[str, List[str]] = {}
+        for rel in idx.files:
+            refs = [r for r in idx.references(rel) if r != rel]
+            rec = idx.record(rel)
+            if rec and rel != NETWORK_PREFABS and any(
+                    c.get("class") == "NetworkManager" for c in rec["components"].values()):
+                refs.append(NETWORK_PREFABS)
+            edges[rel] = refs
+        asmdefs = load_asmdefs(root)
+        by_name = {a["name"]: a for a in asmdefs.values()}
+        scripts: Dict[str, List[str]] = {}
+        for meta in idx.metas:
+            rel = meta[:-5]
+            if rel.endswith(".cs"):
+                asm = "asm:" + assembly_of(rel, asmdefs)
+                scripts.setdefault(asm, []).append(rel)
+                edges[rel] = [asm]
+        for asm, files in scripts.items():
+            a = by_name.get(asm[4:])
+            deps = sorted(files)
+            if a:
+                deps += [a["file"]] + [f"asm:{r}" for r in a["refs"] if r in by_name]
+            edges[asm] = deps
+        for a in asmdefs.values():
+            edges.setdefault(f"asm:{a['name']}", [a["file"]] + [f"asm:{r}" for r in a["refs"] if r in by_name])
+        return cls(edges, _head(root))
+
+    # -- storage ----------------------------------------------------------
+
+    def save(self, path: Path = GRAPH_FILE) -> None:
+        nodes = sorted(set(self.edges) | {t for ts in self.edges.values() for t in ts})
+        ids = {n: i for i, n in enumerate(nodes)}
+        offsets, targets = [0], []
+        for n in nodes:
+            targets += sorted(ids[t] for t in self.edges.get(n, ()))
+            offsets.append(len(targets))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"version": VERSION, "commit": self.commit, "nodes": nodes,
+                                   "offsets": offsets, "targets": targets}, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, path)
+
+    @classmethod
+    def read(cls, path: Path = GRAPH_FILE) -> Optional["AssetGraph"]:
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != VERSION:
+            return None
+        nodes, off, tg = data["nodes"], data["offsets"], data["targets"]
+        edges = {n: [nodes[t] for t in tg[off[i]:off[i + 1]]] for i, n in enumerate(nodes) if off[i + 1] > off[i]}
+        return cls(edges, data.get("commit", ""))
+
+    # -- queries ----------------------------------------------------------
+
+    def dependents(self) -> Dict[str, List[str]]:
+        if self._reverse is None:
+            rev: Dict[str, List[str]] = {}
+            for src, targets in self.edges.items():
+                for t in targets:
+                    rev.setdefault(t, []).append(src)
+            self._reverse = rev
+        return self._reverse
+
+    def dependencies(self, node: str) -> Set[str]:
+        return _walk([node], lambda n: self.edges.get(n, ())) - {node}
+
+    def impacted(self, changed: Iterable[str], also: Optional["AssetGraph"] = None) -> Set[str]:
+        """Everything that depends on a changed path, in this graph or in `also` (the graph before the change)."""
+        rev = self.dependents()
+        old = also.dependents() if also else {}
+        starts = {c[:-5] if c.endswith(".meta") else c for c in changed}
+        return _walk(starts, lambda n: rev.get(n, []) + old.get(n, []))
+
+
+def _walk(starts: Iterable[str], nxt) -> Set[str]:
+    seen = set(starts)
+    todo = deque(seen)
+    while todo:
+        for m in nxt(todo.popleft()):
+            if m not in seen:
+                seen.add(m)
+                todo.append(m)
+    return seen
+
+
+def _git(root: Path, *args: str) -> str:
+    r = subprocess.run(["git", "-C", str(root), *args], capture_output=True, text=True)
+    return r.stdout if r.returncode == 0 else ""
+
+
+def _head(root: Path) -> str:
+    dirty = _git(root, "status", "--porcelain", "--", ASSETS_DIR)
+    return "" if dirty else _git(root, "rev-parse", "HEAD").strip()
+
+
+def load(root: Path = Path("."), save: bool = True) -> "AssetGraph":
+    """The stored graph if it was built for the current clean commit, else an (incremental) rebuild."""
+    stored = AssetGraph.read()
+    if stored and stored.commit and stored.commit == _head(root):
+        return stored
+    graph = AssetGraph.build(root)
+    if save:
+        graph.save()
+    return graph
+
+
+def changed_files(root: Path, base: str, head: str = "HEAD") -> List[str]:
+    out = _git(root, "diff", "--name-only", "--no-renames", f"{base}...{head}")
+    return [l for l in out.splitlines() if l]
+
+
+def impact_report(root: Path, changed: List[str]) -> Dict:
+    previous = AssetGraph.read()
+    graph = load(root)
+    if any(c.startswith(GLOBAL_PREFIXES) for c in changed):
+        hit = set(graph.edges) | {t for ts in graph.edges.values() for t in ts}
+        reason = "project settings or packages changed"
+    else:
+        hit = graph.impacted([c for c in changed if c.startswith(ASSETS_DIR + "/")],
+                             previous if previous and previous.commit != graph.commit else None)
+        reason = ""
+    return {
+        "changed": len(changed),
+        "unity": bool(reason) or any(c.startswith(ASSETS_DIR + "/") for c in changed),
+        "full": bool(reason),
+        "reason": reason,
+        "scenes": sorted(n for n in hit if n.endswith(".unity")),
+        "assemblies": sorted(n[4:] for n in hit if n.startswith("asm:")),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Asset dependency graph and change impact")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("build", help="Refresh and store the graph")
+    imp = sub.add_parser("impacted", help="Scenes and assemblies impacted by a git diff")
+    imp.add_argument("--base", required=True, help="Base revision (merge base is used)")
+    imp.add_argument("--head", default="HEAD")
+    imp.add_argument("--github-output", action="store_true", help="Also write unity/full/scenes/assemblies to GITHUB_OUTPUT")
+    dep = sub.add_parser("deps", help="Transitive dependencies of an asset")
+    dep.add_argument("path")
+    args = ap.parse_args()
+    root = Path(".")
+
+    t0 = time.perf_counter()
+    if args.cmd == "build":
+        g = load(root)
+        print(f"{len(g.edges)} node(s) with dependencies, {sum(map(len, g.edges.values()))} edge(s) "
+              f"in {1000 * (time.perf_counter() - t0):.0f} ms")
+    elif args.cmd == "deps":
+        for n in sorted(load(root).dependencies(args.path)):
+            print(n)
+    else:
+        report = impact_report(root, changed_files(root, args.base, args.head))
+        print(json.dumps(report, indent=2))
+        print(f"computed in {1000 * (time.perf_counter() - t0):.0f} ms", file=sys.stderr)
+        if args.github_output and os.environ.get("GITHUB_OUTPUT"):
+            with open(os.environ["GITHUB_OUTPUT"], "a", encoding="utf-8") as f:
+                f.write(f"unity={'true' if report['unity'] else 'false'}\n")
+                f.write(f"full={'true' if report['full'] else 'false'}\n")
+                f.write(f"scenes={json.dumps(report['scenes'])}\n")
+                f.write(f"assemblies={json.dumps(report['assemblies'])}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""Content-addressed backups for the files the patch scripts rewrite.
+
+The store lives in .patch-backups/ (BACKUP_STORE):
+
+    objects/ab/cdef...        file contents, zlib-compressed, named by sha256
+    snapshots/<UTC time>-<label>.json
+                              {"version", "ts", "label", "files": {path: [sha256, mode, size, mtime_ns]}}
+
+A content is stored once whatever the number of snapshots holding it, so a
+backup costs a manifest plus the files that really changed. Files whose
+size and mtime match the label's previous snapshot are not even re-read,
+and a save that changes nothing writes nothing. Snapshot names sort by
+time: restoring "as of" a timestamp is a bisect on the directory listing
+and one manifest read. `gc` keeps the last N snapshots per label, then
+deletes the objects no snapshot references.
+
+    backup_store.py save --label patch .github/workflows/auto-improve.yml
+    backup_store.py list [--label patch]
+    backup_store.py restore [--at 2026-01-14T23:30] [--label patch] [--to DIR] [paths...]
+    backup_store.py gc --keep 20
+    backup_store.py import-legacy [--delete]   # .patch-backups/<STAMP>/, *.bak.<ts>, patch_bundle*.zip
+
+Timestamps are UTC: ISO 8601, 20260114_233309, 20260114-233309 or epoch seconds.
+"""
+import argparse
+import bisect
+import fcntl
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+STORE_DIR = Path(os.environ.get("BACKUP_STORE", ".patch-backups"))
+KEEP = int(os.environ.get("BACKUP_KEEP", "20"))
+CHUNK = 1 << 20
+LEVEL = 6
+VERSION = 1
+STAMP_FMT = "%Y%m%dT%H%M%SZ"
+LABEL_RE = re.compile(r"[^A-Za-z0-9_-]+")
+# legacy layouts: .patch-backups/<STAMP>/<file>.bak and <file>.bak.<STAMP> next to the original
+LEGACY_DIR_RE = re.compile(r"^\d{8}[-_]\d{6}$")
+LEGACY_SUFFIX_RE = re.compile(r"^(?P<name>.+)\.bak\.(?P<stamp>\d{8}_\d{6}|\d{9,})$")
+LEGACY_ZIPS = ("patch_bundle.zip", "patch_bundle_out.zip")
+
+
+class BackupError(Exception):
+    pass
+
+
+def parse_ts(text: str) -> float:
+    """Epoch seconds from an ISO 8601 time, a 20260114_233309 / 20260114-233309 stamp or epoch digits."""
+    text = text.strip()
+    if text.isdigit() and len(text) != 8:
+        return float(text)
+    for fmt in ("%Y%m%d_%H%M%S", "%Y%m%d-%H%M%S", STAMP_FMT, "%Y%m%d"):
+        try:
+            return datetime.strptime(text, fmt).replace(tzinfo=timezone.utc).timestamp()
+        except ValueError:
+            pass
+    try:
+        dt = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        raise BackupError(f"unreadable timestamp: {text!r}") from None
+    return (dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)).timestamp()
+
+
+def _stamp(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime(STAMP_FMT)
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+class Store:
+    def __init__(self, root: Path = STORE_DIR):
+        self.root = root
+        self.objects = root / "objects"
+        self.snapshots = root / "snapshots"
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        """Exclusive lock: a gc never sweeps the objects of a save in progress."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / "lock", "w") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+
+    # ------------------------------------------------------------------
+    # Objects
+    # ------------------------------------------------------------------
+
+    def _object(self, sha: str) -> Path:
+        return self.objects / sha[:2] / sha[2:]
+
+    def put_file(self, path: Path) -> Tuple[str, int, bool]:
+        """Store a file's content; returns (sha256, size, newly stored).
+
+        The file is hashed in chunks; it is compressed only when the store does
+        not hold that content yet.
+        """
+        h = hashlib.sha256()
+        size = 0
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK), b""):
+                h.update(chunk)
+                size += len(chunk)
+        sha = h.hexdigest()
+        obj = self._object(sha)
+        if obj.exists():
+            return sha, size, False
+        obj.parent.mkdir(parents=True, exist_ok=True)
+        tmp = obj.with_name(f".{obj.name}.{os.getpid()}.tmp")
+        z = zlib.compressobj(LEVEL)
+        with open(path, "rb") as src, open(tmp, "wb") as dst:
+            for chunk in iter(lambda: src.read(CHUNK), b""):
+                dst.write(z.compress(chunk))
+            dst.write(z.flush())
+        os.replace(tmp, obj)
+        return sha, size, True
+
+    def read_object(self, sha: str, dst: Path) -> None:
+        """Decompress an object to dst (atomically), checking its hash on the way."""
+        obj = self._object(sha)
+        if not obj.exists():
+            raise BackupError(f"missing object {sha[:12]} for {dst}")
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dst.with_name(f".{dst.name}.{os.getpid()}.tmp")
+        h = hashlib.sha256()
+        d = zlib.decompressobj()
+        with open(obj, "rb") as src, open(tmp, "wb") as out:
+            for chunk in iter(lambda: src.read(CHUNK), b""):
+                data = d.decompress(chunk)
+                h.update(data)
+                out.write(data)
+            tail = d.flush()
+            h.update(tail)
+            out.write(tail)
+        if h.hexdigest() != sha:
+            tmp.unlink()
+            raise BackupError(f"corrupt object {sha[:12]} for {dst}")
+        os.replace(tmp, dst)
+
+    # ------------------------------------------------------------------
+    # Snapshots
+    # ------------------------------------------------------------------
+
+    def names(self, label: str = "") -> List[str]:
+        """Snapshot names, oldest first (names start with their UTC time)."""
+        try:
+            names = sorted(n[:-5] for n in os.listdir(self.snapshots) if n.endswith(".json"))
+        except FileNotFoundError:
+            return []
+        # <stamp>-<label>, with a .N suffix when a label saved twice in one second
+        return [n for n in names if not label or n.split("-", 1)[1].split(".")[0] == label]
+
+    def manifest(self, name: str) -> Dict:
+        data = json.loads((self.snapshots / f"{name}.json").read_text(encoding="utf-8"))
+        if data.get("version") != VERSION:
+            raise BackupError(f"{name}: unsupported snapshot version {data.get('version')}")
+        return data
+
+    def at(self, ts: Optional[float], label: str = "") -> str:
+        """Name of the newest snapshot taken at or before ts (the newest of all without ts)."""
+        names = self.names(label)
+        if ts is not None:
+            names = names[:bisect.bisect_right(names, _stamp(ts) + "~")]
+        if not names:
+            raise BackupError("no snapshot" + (f" labelled {label!r}" if label else "")
+                              + (f" at or before {_stamp(ts)}" if ts is not None else ""))
+        return names[-1]
+
+    def save(self, paths: List[str], label: str = "manual", ts: Optional[float] = None,
+             sources: Optional[Dict[str, Path]] = None) -> Tuple[Optional[str], int, int]:
+        """Snapshot paths (missing ones are skipped); returns (name or None if unchanged, files, new objects).
+
+        `sources` maps a path to the file holding its content when that is not
+        the path itself (legacy imports).
+        """
+        label = LABEL_RE.sub("_", label) or "manual"
+        sources = sources or {}
+        with self.locked():
+            prev_names = self.names(label)
+            prev = self.manifest(prev_names[-1])["files"] if prev_names else {}
+            files: Dict[str, List] = {}
+            new = 0
+            for p in sorted(set(paths)):
+                src = sources.get(p, Path(p))
+                try:
+                    st = src.stat()
+                except FileNotFoundError:
+                    continue
+                old = prev.get(p)
+                if old and old[2:] == [st.st_size, st.st_mtime_ns] and self._object(old[0]).exists():
+                    files[p] = old
+                    continue
+                sha, size, stored = self.put_file(src)
+                new += stored
+                files[p] = [sha, st.st_mode & 0o777, size, st.st_mtime_ns]
+            if not files:
+                return None, 0, 0
+            if prev and {p: v[:2] for p, v in prev.items()} == {p: v[:2] for p, v in files.items()}:
+                return None, len(files), 0
+            ts = time.time() if ts is None else ts
+            name = f"{_stamp(ts)}-{label}"
+            n = 1
+            while (self.snapshots / f"{name}.json").exists():
+                n += 1
+                name = f"{_stamp(ts)}-{label}.{n}"
+            _write_atomic(self.snapshots / f"{name}.json", json.dumps(
+                {"version": VERSION, "ts": round(ts, 3), "label": label, "files": files},
+                indent=1, sort_keys=True).encode())
+            return name, len(files), new
+
+    def restore(self, name: str, paths: Optional[List[str]] = None, to: Path = Path(".")) -> List[str]:
+        """Write a snapshot's files (or only `paths`) under `to`; files already identical are left alone."""
+        files = self.manifest(name)["files"]
+        wanted = paths or sorted(files)
+        unknown = [p for p in wanted if p not in files]
+        if unknown:
+            raise BackupError(f"{name} does not hold: {', '.join(unknown)}")
+        written = []
+        for p in wanted:
+            sha, mode = files[p][:2]
+            dst = to / p
+            if dst.exists() and _sha256(dst) == sha:
+                continue
+            self.read_object(sha, dst)
+            os.chmod(dst, mode)
+            written.append(p)
+        return written
+
+    def gc(self, keep: int = KEEP) -> Tuple[int, int, int]:
+        """Keep the last `keep` snapshots of each label, then drop unreferenced objects.
+
+        Returns (snapshots removed, objects removed, bytes freed).
+        """
+        with self.locked():
+            by_label: Dict[str, List[str]] = {}
+            for n in self.names():
+                by_label.setdefault(self.manifest(n)["label"], []).append(n)
+            dropped = 0
+            for names in by_label.values():
+                for n in names[:max(0, len(names) - keep)]:
+                    (self.snapshots / f"{n}.json").unlink()
+                    dropped += 1
+            live = {v[0] for n in self.names() for v in self.manifest(n)["files"].values()}
+            objects = freed = 0
+            if self.objects.is_dir():
+                for sub in self.objects.iterdir():
+                    for obj in sub.iterdir():
+                        # temporary files are leftovers of an interrupted save
+                        if sub.name + obj.name not in live or obj.name.startswith("."):
+                            freed += obj.stat().st_size
+                            obj.unlink()
+                            objects += 1
+                    if not any(sub.iterdir()):
+                        sub.rmdir()
+            return dropped, objects, freed
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# ----------------------------------------------------------------------
+# Legacy copies: full files left by the old patch scripts
+# ----------------------------------------------------------------------
+
+def legacy_backups(root: Path = Path("."), store: Path = STORE_DIR) -> List[Tuple[float, str, str, Path]]:
+    """(timestamp, label, original path, copy) of every legacy backup, oldest first."""
+    found = []
+    if store.is_dir():
+        for d in store.iterdir():
+            if not (d.is_dir() and LEGACY_DIR_RE.match(d.name)):
+                continue
+            for f in d.rglob("*.bak"):
+                rel = f.relative_to(d).as_posix()[:-4]
+                if "/" not in rel and rel.endswith((".yml", ".yaml")):
+                    # the first scripts copied workflows without their directory
+                    rel = f".github/workflows/{rel}"
+                found.append((parse_ts(d.name), "patch", rel, f))
+    for f in sorted(root.glob(".github/workflows/*.bak.*")):
+        m = LEGACY_SUFFIX_RE.match(f.name)
+        if m:
+            rel = (f.parent / m.group("name")).relative_to(root).as_posix()
+            found.append((parse_ts(m.group("stamp")), "workflow", rel, f))
+    for name in LEGACY_ZIPS:
+        f = root / name
+        if f.is_file():
+            found.append((f.stat().st_mtime, "bundle", name, f))
+    return sorted(found, key=lambda t: (t[0], t[2]))
+
+
+def import_legacy(store: Store, delete: bool = False) -> Tuple[int, int]:
+    """Turn legacy copies into snapshots; with delete, remove each copy once it is stored and verified.
+
+    Returns (snapshots written, copies imported).
+    """
+    # copies taken by one run (same label, same second) become one snapshot
+    groups: Dict[Tuple[str, str], List[Tuple[float, str, Path]]] = {}
+    for ts, label, rel, copy in legacy_backups(store=store.root):
+        groups.setdefault((_stamp(ts), label), []).append((ts, rel, copy))
+    snaps = copies = 0
+    for (_, label), items in sorted(groups.items()):
+        sources = {rel: copy for _, rel, copy in items}
+        name, _, _ = store.save(list(sources), label=label, ts=items[0][0], sources=sources)
+        snaps += name is not None
+        copies += len(items)
+        if not delete:
+            continue
+        # unchanged content is held by the label's previous snapshot
+        files = store.manifest(name or store.names(label)[-1])["files"]
+        for rel, copy in sources.items():
+            if rel not in files or files[rel][0] != _sha256(copy):
+                raise BackupError(f"{copy}: stored content does not match, not deleted")
+            copy.unlink()
+            # drop the <STAMP>/ directories left empty inside the store
+            parent = copy.parent
+            while store.root in parent.parents and not any(parent.iterdir()):
+                parent.rmdir()
+                parent = parent.parent
+    return snaps, copies
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Deduplicated backups of patched files (zlib blobs + snapshot manifests)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sv = sub.add_parser("save", help="Snapshot files (unchanged content is not stored again)")
+    sv.add_argument("paths", nargs="+")
+    sv.add_argument("--label", default="manual")
+    ls = sub.add_parser("list", help="Snapshots, oldest first")
+    ls.add_argument("--label", default="")
+    rs = sub.add_parser("restore", help="Restore the newest snapshot at or before a time")
+    rs.add_argument("paths", nargs="*", help="Only these files (default: the whole snapshot)")
+    rs.add_argument("--at", help="UTC time; default: latest")
+    rs.add_argument("--label", default="")
+    rs.add_argument("--name", help="Exact snapshot name instead of --at")
+    rs.add_argument("--to", default=".", help="Restore under this directory")
+    gc = sub.add_parser("gc", help="Keep the last N snapshots per label, drop unreferenced objects")
+    gc.add_argument("--keep", type=int, default=KEEP)
+    il = sub.add_parser("import-legacy", help="Store the old full-copy backups as snapshots")
+    il.add_argument("--delete", action="store_true", help="Remove each copy once stored and verified")
+    args = ap.parse_args()
+    store = Store()
+
+    try:
+        if args.cmd == "save":
+            t0 = time.perf_counter()
+            name, n, new = store.save(args.paths, args.label)
+            took = f"{time.perf_counter() - t0:.2f}s"
+            print(f"{name}: {n} file(s), {new} new object(s) in {took}" if name
+                  else f"unchanged since the last '{args.label}' snapshot ({n} file(s)), nothing written")
+        elif args.cmd == "list":
+            for name in store.names(args.label):
+                files = store.manifest(name)["files"]
+                print(f"{name}  {len(files)} file(s), {sum(v[2] for v in files.values())} bytes")
+        elif args.cmd == "restore":
+            name = args.name or store.at(parse_ts(args.at) if args.at else None, args.label)
+            written = store.restore(name, args.paths, Path(args.to))
+            print(f"{name}: {len(written)} file(s) restored" + (f": {', '.join(written)}" if written else ", all up to date"))
+        elif args.cmd == "gc":
+            dropped, objects, freed = store.gc(args.keep)
+            print(f"{dropped} snapshot(s), {objects} object(s) removed, {freed / 1024:.1f} KiB freed")
+        else:
+            snaps, copies = import_legacy(store, args.delete)
+            print(f"{copies} legacy copies imported as {snaps} snapshot(s)" + (", copies removed" if args.delete else ""))
+    except BackupError as e:
+        print(f"backup_store: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
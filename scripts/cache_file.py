@@ -0,0 +1,40 @@
+"""Locked, atomic writes of the JSON caches under .ci_cache/.
+
+Threads, batch jobs and projects sharing .ci_cache/ may save the same file at
+once: writers take an exclusive lock on `<file>.lock` and write through a
+unique temporary file that replaces the target, so readers never see a
+partial file.
+"""
+import fcntl
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+
+
+@contextmanager
+def locked(path: Path) -> Iterator[None]:
+    """Exclusive lock for writers of `path` (read-merge-write under one lock)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(path.name + ".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def write_json(path: Path, data: Any) -> None:
+    """Replace `path` with `data`; the caller holds the lock."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+    except OSError:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def atomic_write_json(path: Path, data: Any) -> None:
+    with locked(path):
+        write_json(path, data)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""Single entry point for the CI scripts, with nothing imported before it is needed.
+
+    ci.py budget pre|post
+    ci.py autofix [claude_autofix options]
+    ci.py evaluate
+    ci.py autopr
+    ci.py bundle [--repo . --zip-out patch_bundle.zip]
+    ci.py diagrams [version]
+
+Only the script of the subcommand is imported, when its phase starts, and
+the scripts themselves import their heavy modules (HTTP client, diff
+parser...) only on the paths that use them. Measured with the ci.startup
+benchmark (1 CPU runner, bare interpreter ~18 ms): `budget pre` ~50 ms, most
+of it json/pathlib/datetime that the budget ledger needs; `autopr` without API
+key ~28 ms (was 63 and 68 ms while ci_trace and subprocess were imported
+eagerly).
+
+Several phases can run in one process, separated by `+`; modules, loaded
+configuration and the LLM connection pool are then shared:
+
+    ci.py budget pre + diagrams 1 + evaluate + budget post
+
+Phases stop at the first failure (exit code of that phase), except
+`budget post`, which always runs so the spend is recorded. When `budget pre`
+ran in the same process, `budget post` measures from its start unless
+BUDGET_START_TS is set. With CI_TRACE, the import and run time of each
+phase are recorded as spans (import time is the cold-start cost of a step).
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# subcommand -> (script, module name)
+COMMANDS = {
+    "budget": (".github/scripts/budget_guard.py", "budget_guard"),
+    "autofix": ("scripts/claude_autofix.py", "claude_autofix"),
+    "evaluate": (".github/scripts/evaluate_changes.py", "evaluate_changes"),
+    "autopr": ("scripts/codex_autopr.py", "codex_autopr"),
+    "bundle": (".patch_bundle_tmp/main.py", "patch_bundle_main"),
+    "diagrams": (".github/scripts/generate-uml-diagrams.py", "generate_uml_diagrams"),
+}
+ALWAYS = {("budget", "post")}
+
+
+def usage(code: int = 2) -> None:
+    print(__doc__.split("\n\n")[1], file=sys.stderr if code else sys.stdout)
+    sys.exit(code)
+
+
+def split_phases(argv):
+    """[['budget', 'pre'], ['evaluate']] from `budget pre + evaluate`."""
+    phases, cur = [], []
+    for a in argv:
+        if a == "+":
+            phases.append(cur)
+            cur = []
+        else:
+            cur.append(a)
+    phases.append(cur)
+    for p in phases:
+        if not p or p[0] not in COMMANDS:
+            print(f"unknown or missing command: {' '.join(p) or '(empty)'}", file=sys.stderr)
+            usage()
+        if p[0] == "budget" and p[1:] not in (["pre"], ["post"]):
+            print("usage: ci.py budget pre|post", file=sys.stderr)
+            usage()
+    return phases
+
+
+def load(cmd: str):
+    """Import the script of a subcommand (once per process)."""
+    script, name = COMMANDS[cmd]
+    if name in sys.modules:
+        return sys.modules[name]
+    path = os.path.join(ROOT, script)
+    if name.isidentifier() and os.path.basename(script) == name + ".py":
+        # scripts import their siblings by name, as when run directly
+        if os.path.dirname(path) not in sys.path:
+            sys.path.insert(0, os.path.dirname(path))
+        return __import__(name)
+    import importlib.util
+    spec = importlib.util.spec_from_file_location(name, path)
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[name] = mod  # process pools pickle functions by module name
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def run_phase(phase, t_pre: float) -> int:
+    cmd, args = phase[0], phase[1:]
+    if cmd == "budget":
+        os.environ["PHASE"] = args[0]
+        if args[0] == "post" and t_pre and not os.environ.get("BUDGET_START_TS"):
+            os.environ["BUDGET_START_TS"] = str(t_pre)
+        args = []
+    sys.argv = [os.path.join(ROOT, COMMANDS[cmd][0])] + args
+    try:
+        load(cmd).main()
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
+    except Exception:
+        # reported like an uncaught error, but `budget post` still gets to run
+        import traceback
+        traceback.print_exc()
+        return 1
+    return 0
+
+
+def main():
+    argv = sys.argv[1:]
+    if not argv or argv[0] in ("-h", "--help"):
+        usage(0 if argv else 2)
+    phases = split_phases(argv)
+    # ci_trace imports nothing unless CI_TRACE, CI_PROFILE or GITHUB_STEP_SUMMARY is set;
+    # installing it here names the whole process after its phases
+    import ci_trace
+    ci_trace.install("ci:" + "+".join(" ".join(p[:2]) if p[0] == "budget" else p[0] for p in phases))
+
+    rc, t_pre = 0, 0.0
+    for phase in phases:
+        label = " ".join(phase[:2]) if phase[0] == "budget" else phase[0]
+        if rc and tuple(phase[:2]) not in ALWAYS:
+            print(f"ci: {label} skipped (earlier phase failed with {rc})", file=sys.stderr)
+            continue
+        if phase[:2] == ["budget", "pre"]:
+            t_pre = time.time()
+        with ci_trace.span(f"import {COMMANDS[phase[0]][1]}"):
+            load(phase[0])
+        with ci_trace.span(label):
+            code = run_phase(phase, t_pre)
+        sys.stdout.flush()
+        rc = rc or code
+    sys.exit(rc)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""Timed spans and optional profiling for the CI Python scripts.
+
+    import ci_trace
+    ci_trace.install("claude_autofix")        # once, at the top of main()
+    with ci_trace.span("prompt build", chars=len(user)):
+        ...
+
+Spans nest per thread and are recorded as Chrome-trace "complete" events.
+At exit:
+
+- CI_TRACE=<path>: events are merged into that JSON trace (several scripts of
+  one job share a file; open it in chrome://tracing, Perfetto or speedscope).
+- GITHUB_STEP_SUMMARY: a per-span table (calls, total, max) is appended.
+- CI_PROFILE=cprofile: the whole run is profiled; stats go to
+  CI_PROFILE_DIR/<script>.pstats and the top functions to the summary.
+- CI_PROFILE=tracemalloc: peak memory and top allocation sites go to the summary.
+
+Without those variables nothing is recorded: span() and traced() cost a
+function call, and importing this module loads nothing beyond os and time
+(every CI step imports it, json/pathlib/threading alone cost ~25 ms of
+startup there).
+"""
+from __future__ import annotations
+
+import atexit
+import os
+import time
+
+TRACE_FILE = os.environ.get("CI_TRACE", "")
+PROFILE = os.environ.get("CI_PROFILE", "").strip().lower()
+PROFILE_DIR = os.environ.get("CI_PROFILE_DIR", ".ci_cache/profiles")
+SUMMARY_FILE = os.environ.get("GITHUB_STEP_SUMMARY", "")
+ENABLED = bool(TRACE_FILE or PROFILE or SUMMARY_FILE)
+TOP_N = 15
+
+_T0 = time.perf_counter()
+_EPOCH_US = time.time() * 1e6  # anchors perf_counter offsets so several processes line up
+EVENTS: list[dict] = []
+_state: dict = {"script": "", "profiler": None, "installed": False}
+if ENABLED:
+    import threading
+    _lock = threading.Lock()
+    _local = threading.local()
+
+
+def _us(t: float) -> float:
+    return _EPOCH_US + (t - _T0) * 1e6
+
+
+def _emit(name: str, start: float, end: float, args: dict) -> None:
+    ev = {"name": name, "cat": _state["script"] or "ci", "ph": "X", "ts": round(_us(start), 1),
+          "dur": round((end - start) * 1e6, 1), "pid": os.getpid(), "tid": threading.get_ident(),
+          "args": dict(args, depth=len(getattr(_local, "stack", [])))}
+    with _lock:
+        EVENTS.append(ev)
+
+
+class _Span:
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name: str, args: dict):
+        self.name, self.args = name, args
+
+    def __enter__(self) -> dict:
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(self.name)
+        self.start = time.perf_counter()
+        return self.args
+
+    def __exit__(self, *exc) -> None:
+        end = time.perf_counter()
+        _local.stack.pop()
+        _emit(self.name, self.start, end, self.args)
+
+
+class _NoSpan:
+    __slots__ = ("args",)
+
+    def __init__(self, args: dict):
+        self.args = args
+
+    def __enter__(self) -> dict:
+        return self.args
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+def span(name: str, **args):
+    """Time a block; the dict it yields can be filled with extra args before it closes."""
+    return _Span(name, args) if ENABLED else _NoSpan(args)
+
+
+def traced(name: str | None = None):
+    """Decorator form of span()."""
+    def deco(fn):
+        if not ENABLED:
+            return fn
+        import functools
+
+        @functools.wraps(fn)
+        def wrapper(*a, **kw):
+            with span(name or fn.__name__):
+                return fn(*a, **kw)
+        return wrapper
+    return deco
+
+
+def complete(name: str, duration_s: float, **args) -> None:
+    """Record a span that was timed elsewhere and just ended."""
+    if not ENABLED:
+        return
+    end = time.perf_counter()
+    _emit(name, end - duration_s, end, args)
+
+
+def install(script: str) -> None:
+    """Name the process in the trace, start profiling if asked, and emit everything at exit."""
+    if _state["installed"] or not ENABLED:
+        return
+    _state.update(script=script, installed=True)
+    if PROFILE == "cprofile":
+        import cProfile
+        _state["profiler"] = cProfile.Profile()
+        _state["profiler"].enable()
+    elif PROFILE == "tracemalloc":
+        import tracemalloc
+        tracemalloc.start(10)
+    atexit.register(finish)
+
+
+def _write_trace(path) -> None:
+    import fcntl
+    import json
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    meta = [{"name": "process_name", "ph": "M", "pid": os.getpid(), "args": {"name": _state["script"] or "ci"}}]
+    with open(path, "a+", encoding="utf-8") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        f.seek(0)
+        try:
+            data = json.loads(f.read() or "{}")
+        except ValueError:
+            data = {}
+        events = data.get("traceEvents", []) + meta + EVENTS
+        f.seek(0)
+        f.truncate()
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, separators=(",", ":"))
+
+
+def table() -> list[str]:
+    """Markdown rows aggregated by span name, in first-seen order, indented by depth."""
+    agg: dict[str, dict] = {}
+    with _lock:
+        events = list(EVENTS)
+    for ev in sorted(events, key=lambda e: e["ts"]):
+        a = agg.setdefault(ev["name"], {"n": 0, "total": 0.0, "max": 0.0, "depth": ev["args"].get("depth", 0)})
+        a["n"] += 1
+        a["total"] += ev["dur"] / 1000
+        a["max"] = max(a["max"], ev["dur"] / 1000)
+    rows = ["| span | calls | total ms | max ms |", "|---|---:|---:|---:|"]
+    for name, a in agg.items():
+        rows.append(f"| {'&nbsp;&nbsp;' * a['depth']}{name} | {a['n']} | {a['total']:.1f} | {a['max']:.1f} |")
+    return rows
+
+
+def _profile_lines() -> list[str]:
+    lines: list[str] = []
+    prof = _state["profiler"]
+    if prof is not None:
+        import io
+        import pstats
+        prof.disable()
+        from pathlib import Path
+        Path(PROFILE_DIR).mkdir(parents=True, exist_ok=True)
+        out = Path(PROFILE_DIR) / f"{_state['script'] or 'ci'}.pstats"
+        prof.dump_stats(out)
+        buf = io.StringIO()
+        pstats.Stats(prof, stream=buf).sort_stats("cumulative").print_stats(TOP_N)
+        lines += [f"cProfile ({out}):", "```", buf.getvalue().strip(), "```"]
+    elif PROFILE == "tracemalloc":
+        import tracemalloc
+        if tracemalloc.is_tracing():
+            _, peak = tracemalloc.get_traced_memory()
+            top = tracemalloc.take_snapshot().statistics("lineno")[:TOP_N]
+            tracemalloc.stop()
+            lines += [f"tracemalloc: peak {peak / 1e6:.1f} MB", "```"] + [str(s) for s in top] + ["```"]
+    return lines
+
+
+def finish() -> None:
+    extra = _profile_lines()
+    if not EVENTS and not extra:
+        return
+    if TRACE_FILE:
+        from pathlib import Path
+        _write_trace(Path(TRACE_FILE))
+    if SUMMARY_FILE:
+        total = (time.perf_counter() - _T0) * 1000
+        lines = [f"### ⏱️ {_state['script'] or 'ci'} ({total:.0f} ms)"] + table() + extra
+        with open(SUMMARY_FILE, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n\n")
@@ -2,14 +2,43 @@
 import argparse
 import json
 import os
+import shutil
+import subprocess
 import sys
-import urllib.request
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import ci_trace
+import cost_ledger
+import cs_syntax
+import fix_memory
+import llm_cache
+import llm_http
+import nunit_results
+import prompt_context
+import unidiff
+import unity_log
 
-CLAUDE_API_URL = "https://api.anthropic.com/v1/messages"
 DEFAULT_MODEL = os.environ.get("ANTHROPIC_MODEL") or "claude-3-5-sonnet-20241022"
+LOG_BUDGET = int(os.environ.get("AUTOFIX_LOG_BUDGET") or unity_log.DEFAULT_BUDGET)
+CONTEXT_TOKENS = prompt_context.DEFAULT_TOKENS
+MAX_TOKENS = 2000
+
+# (temperature, extra instruction) per candidate; cycled when --candidates exceeds the list.
+VARIANTS = [
+    (0.2, ""),
+    (0.5, "Focus on the FIRST compiler error only; later errors are often cascades of it."),
+    (0.7, "Look for missing using directives, asmdef references and renamed or moved symbols."),
+    (0.4, "Prefer the smallest possible change, ideally confined to a single file."),
+]
 
 SYSTEM = """You are an expert Unity + C# + CI engineer.
-You will receive a Unity Editor log from a GitHub Actions runner.
+You will receive a triaged Unity Editor log from a GitHub Actions runner
+(deduplicated diagnostics ranked by importance, followed by the log tail).
 Goal: produce a minimal git patch (unified diff) that fixes the compile/test failure.
 
 Rules:
@@ -27,46 +56,405 @@ Unity log:
 {log}
 ---LOG END---
 
-Repository tree hints (paths seen in the error):
-- Assets/Scripts/Networking/RpcHandlers/Interfaces/ISessionRpcHandler.cs
-- Assets/Scripts/Networking/RpcHandlers/Base/BaseRpcHandler.cs
-- Assets/Scripts/Networking/Player/SessionRpcHub.cs
+Relevant source (error lines marked with '>', definitions they reference, scenes using them):
+{context}
 
 Now produce a unified diff patch that fixes the issue.
 """
 
-def call_anthropic(api_key: str, model: str, user: str) -> str:
-    payload = {
-        "model": model,
-        "max_tokens": 2000,
-        "temperature": 0.2,
-        "system": SYSTEM,
-        "messages": [{"role": "user", "content": user}],
-    }
-    data = json.dumps(payload).encode("utf-8")
+def call_anthropic(api_key: str, model: str, user: str, temperature: float = 0.2) -> str:
+    client = llm_http.AnthropicClient(api_key)
+    return client.message(model, user, system=SYSTEM, max_tokens=MAX_TOKENS, temperature=temperature)
+
+def generate(api_key: str, model: str, user: str, temperature: float, cache: llm_cache.ResponseCache) -> str:
+    with ci_trace.span("generate", temperature=temperature) as sp:
+        key = cache.key(model, SYSTEM, user, temperature=temperature)
+        patch = cache.get(key)
+        sp["cached"] = patch is not None
+        if patch is None:
+            # guard: keep only the diff part of the answer (only diffs are worth caching)
+            patch = unidiff.extract_diff(call_anthropic(api_key, model, user, temperature))
+            cache.put(key, patch, model=model)
+    return patch
+
+@ci_trace.traced("git apply --check")
+def git_check(patch: str, repo: Path) -> Optional[str]:
+    """`git apply --check` inside a throwaway index-only worktree; returns the error or None."""
+    wt = Path(tempfile.mkdtemp(prefix="autofix-wt-"))
+    try:
+        for cmd in (
+            ["git", "-C", str(repo), "worktree", "add", "--detach", "--no-checkout", str(wt), "HEAD"],
+            ["git", "-C", str(wt), "read-tree", "HEAD"],
+        ):
+            r = subprocess.run(cmd, capture_output=True, text=True)
+            if r.returncode != 0:
+                return r.stderr.strip() or "worktree setup failed"
+        r = subprocess.run(
+            ["git", "-C", str(wt), "apply", "--cached", "--check", "-"],
+            input=patch, capture_output=True, text=True,
+        )
+        return None if r.returncode == 0 else (r.stderr.strip() or "git apply --check failed")
+    finally:
+        subprocess.run(["git", "-C", str(repo), "worktree", "remove", "--force", str(wt)], capture_output=True)
+        shutil.rmtree(wt, ignore_errors=True)
+
+@ci_trace.traced("syntax check")
+def syntax_problems(patch: str, repo: Path, cache: Optional[cs_syntax.SyntaxCache] = None) -> List[str]:
+    """C# pre-check of the touched .cs files with the patch applied in memory."""
+    try:
+        found = cs_syntax.check_patch(patch, repo, cache)
+    except (unidiff.PatchError, OSError) as e:
+        return [f"syntax pre-check skipped: {e}"]
+    return [f"{path}:{i}" for path, issues in found.items() for i in issues]
+
+@ci_trace.traced("validate")
+def validate(patch: str, repo: Path, syntax_cache: Optional[cs_syntax.SyntaxCache] = None) -> Dict:
+    """Static pre-rank first; only patches that parse are handed to git."""
+    res: Dict = {"static_score": -1000, "problems": [], "applies": False, "syntax_ok": False, "files": []}
+    if not patch:
+        res["problems"] = ["empty or non-diff answer"]
+        return res
+    try:
+        files = unidiff.parse(patch)
+    except unidiff.PatchError as e:
+        res["problems"] = [str(e)]
+        return res
+    res["files"] = [f.path for f in files]
+    with ci_trace.span("static check"):
+        res["static_score"], res["problems"] = unidiff.static_check(files, repo)
+    syntax = [p for p in syntax_problems(patch, repo, syntax_cache) if "skipped" not in p]
+    res["syntax_ok"] = not syntax
+    res["problems"] += syntax
+    err = git_check(patch, repo)
+    res["applies"] = err is None
+    if err:
+        res["problems"].append(err)
+    return res
+
+def run_candidates(api_key: str, model: str, user: str, n: int, cache: llm_cache.ResponseCache, repo: Path) -> List[Dict]:
+    variants = [VARIANTS[i % len(VARIANTS)] for i in range(n)]
+    syntax_cache = cs_syntax.SyntaxCache()
+
+    def one(i: int) -> Dict:
+        temperature, focus = variants[i]
+        prompt = user if not focus else f"{user}\nAdditional guidance: {focus}\n"
+        try:
+            patch = generate(api_key, model, prompt, temperature, cache)
+        except llm_http.LLMError as e:
+            return {"index": i, "patch": "", "temperature": temperature, "focus": focus, "static_score": -1000,
+                    "problems": [str(e)], "applies": False, "syntax_ok": False, "files": []}
+        return dict(validate(patch, repo, syntax_cache), index=i, patch=patch, temperature=temperature, focus=focus)
+
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        results = list(pool.map(one, range(n)))
+    syntax_cache.save()
+    # Applying cleanly and parsing dominate, then static score, then the more conservative variant.
+    return sorted(results, key=lambda r: (not r["applies"], not r["syntax_ok"], -r["static_score"], r["index"]))
+
+def write_candidates(out: str, ranked: List[Dict]) -> Path:
+    cdir = Path(out + ".candidates")
+    cdir.mkdir(parents=True, exist_ok=True)
+    summary = []
+    for rank, r in enumerate(ranked):
+        name = f"{rank:02d}-v{r['index']}.patch"
+        (cdir / name).write_text(r["patch"], encoding="utf-8")
+        summary.append({k: v for k, v in r.items() if k != "patch"} | {"rank": rank, "file": name})
+    (cdir / "ranking.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    return cdir
+
+def write_meta(path: Optional[str], **meta) -> None:
+    if path:
+        Path(path).write_text(json.dumps(meta), encoding="utf-8")
+
+def recall(sigs: List[fix_memory.Signature], repo: Path):
+    """(remembered patch that still validates or None, similar past fixes for the prompt)."""
+    mem = fix_memory.FixMemory()
+    try:
+        exact = mem.exact(sigs)
+        for fix in exact:
+            res = validate(fix.patch, repo)
+            if res["applies"] and res["syntax_ok"]:
+                mem.touch(fix.id)
+                return fix, []
+            print(f"Remembered fix #{fix.id} no longer applies: {res['problems'][:1]}")
+        return None, mem.similar(sigs, exclude=[f.id for f in exact])
+    finally:
+        mem.close()
+
+def prepare(title: str, log_file: str, repo: Path, no_memory: bool = False, test_results: Optional[str] = None,
+            indexes: Optional[Dict] = None) -> Dict:
+    """Everything before the API call: triage, fix memory lookup and prompt (raises FileNotFoundError).
+
+    indexes: prompt_context.load_indexes(repo), already loaded (batch mode).
+    """
+    with ci_trace.span("log read"):
+        triage = unity_log.triage_file(log_file)
+        if test_results:
+            # NUnit failures carry message, stack and location, unlike their one-line echo in the log
+            for d in nunit_results.diagnostics(test_results, nunit_results.History()):
+                triage.add(d)
+    job: Dict = {"triage": triage, "sigs": fix_memory.signatures(triage.ranked()), "replayed": None, "user": ""}
+    similar: List[fix_memory.Fix] = []
+    if not no_memory and job["sigs"]:
+        with ci_trace.span("fix memory") as sp:
+            job["replayed"], similar = recall(job["sigs"], repo)
+            sp["replayed"] = job["replayed"] is not None
+        if job["replayed"] is not None:
+            # known failure: the remembered patch still applies, no API call needed
+            return job
+
+    with ci_trace.span("prompt build") as sp:
+        # keep request small-ish: ranked diagnostics first, tail only if room remains
+        log = triage.excerpt(LOG_BUDGET)
+        # only the code around the failures, instead of fixed path hints
+        with ci_trace.span("source context"):
+            context = prompt_context.build_context(triage.ranked(), repo, CONTEXT_TOKENS, indexes)
+        job["context_tokens"] = prompt_context.estimate_tokens(context)
+        if similar:
+            context += "\n\nPatches that fixed similar errors before (adapt, do not copy blindly):\n"
+            context += fix_memory.prompt_section(similar)
+
+        job["user"] = USER_TEMPLATE.format(title=title, log=log, context=context or "(no source location in the log)")
+        sp["chars"] = len(job["user"])
+    return job
+
+def solve(api_key: str, model: str, user: str, candidates: int, cache: llm_cache.ResponseCache, repo: Path,
+          out: str, label: str = "") -> str:
+    """Best patch for the prompt ("" when every answer is rejected); raises LLMError for a single candidate."""
+    if candidates > 1:
+        with ci_trace.span("candidates", n=candidates):
+            ranked = run_candidates(api_key, model, user, candidates, cache, repo)
+        cdir = write_candidates(out, ranked)
+        for r in ranked:
+            state = "applies" if r["applies"] and r["syntax_ok"] else "rejected"
+            print(f"  {label}v{r['index']} (t={r['temperature']}): {state}, score={r['static_score']}, files={r['files']}")
+        best = ranked[0]
+        print(f"{label}Candidates written to {cdir}")
+        return best["patch"] if best["applies"] and best["syntax_ok"] else ""
+    patch = generate(api_key, model, user, VARIANTS[0][0], cache)
+    syntax_cache = cs_syntax.SyntaxCache()
+    broken = [p for p in syntax_problems(patch, repo, syntax_cache) if "skipped" not in p] if patch else []
+    syntax_cache.save()
+    if broken:
+        # rejected here in milliseconds instead of after a full Editor run
+        print(f"{label}Patch rejected by C# syntax pre-check:\n  " + "\n  ".join(broken), file=sys.stderr)
+        return ""
+    return patch
+
+# ----------------------------------------------------------------------
+# Batch mode: one process and one connection pool for a fleet of failures
+# ----------------------------------------------------------------------
+
+class TokenBudget:
+    """Tokens are reserved before a job's API calls and trued up with the usage actually reported."""
+
+    def __init__(self, limit: int = 0):
+        self.limit = limit
+        self.committed = 0
+        self._lock = threading.Lock()
+
+    def reserve(self, n: int) -> bool:
+        with self._lock:
+            if self.limit and self.committed + n > self.limit:
+                return False
+            self.committed += n
+            return True
 
-    req = urllib.request.Request(CLAUDE_API_URL, data=data, method="POST")
-    req.add_header("Content-Type", "application/json")
-    req.add_header("x-api-key", api_key)
-    req.add_header("anthropic-version", "2023-06-01")
+    def settle(self, reserved: int, used: int) -> None:
+        with self._lock:
+            self.committed += used - reserved
 
-    with urllib.request.urlopen(req, timeout=60) as resp:
-        raw = resp.read().decode("utf-8", errors="replace")
-    j = json.loads(raw)
+def load_manifest(path: Path) -> List[Dict]:
+    """Jobs of a batch manifest; relative paths are resolved against the manifest's directory.
 
-    blocks = j.get("content") or []
-    out = ""
-    for b in blocks:
-        if b.get("type") == "text":
-            out += b.get("text", "")
-    return out.strip()
+    {"jobs": [{"id": "game-linux", "project": "game", "platform": "StandaloneLinux64",
+               "log": "logs/game-linux.log", "results": "logs/game-linux-tests.xml",
+               "title": "...", "depends_on": ["core-linux"]}]}
+    """
+    data = json.loads(path.read_text(encoding="utf-8"))
+    jobs = data["jobs"] if isinstance(data, dict) else data
+    base = path.resolve().parent
+    out: List[Dict] = []
+    for n, j in enumerate(jobs):
+        project = j.get("project", ".")
+        platform = j.get("platform", "")
+        jid = j.get("id") or "-".join(x for x in (Path(project).name or "project", platform) if x)
+        out.append({
+            "id": jid,
+            "order": n,
+            "project": project,
+            "platform": platform,
+            "repo": (base / project).resolve(),
+            "log": str(base / j["log"]),
+            "results": str(base / j["results"]) if j.get("results") else None,
+            "title": j.get("title") or f"Unity CI failure ({project}{', ' + platform if platform else ''})",
+            "depends_on": list(j.get("depends_on", [])),
+        })
+    ids = [j["id"] for j in out]
+    dup = sorted({i for i in ids if ids.count(i) > 1})
+    if dup:
+        raise ValueError(f"duplicate job id(s) in {path}: {', '.join(dup)}")
+    return out
+
+def blocked_counts(jobs: List[Dict]) -> Dict[str, int]:
+    """id -> number of jobs that (transitively) wait for it."""
+    dependents: Dict[str, List[str]] = {}
+    for j in jobs:
+        for d in j["depends_on"]:
+            dependents.setdefault(d, []).append(j["id"])
+    counts = {}
+    for j in jobs:
+        seen, todo = set(), list(dependents.get(j["id"], []))
+        while todo:
+            k = todo.pop()
+            if k not in seen and k != j["id"]:
+                seen.add(k)
+                todo += dependents.get(k, [])
+        counts[j["id"]] = len(seen)
+    return counts
+
+def run_batch(args) -> int:
+    jobs = load_manifest(Path(args.batch))
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    blocks = blocked_counts(jobs)
+    t0 = time.monotonic()
+
+    # loading an index saves it: once per project here, only read by the threads below
+    with ci_trace.span("batch indexes"):
+        indexes = {repo: prompt_context.load_indexes(repo) for repo in sorted({j["repo"] for j in jobs})}
+
+    def prep(job: Dict) -> Dict:
+        try:
+            job.update(prepare(job["title"], job["log"], job["repo"], args.no_memory, job["results"],
+                               indexes[job["repo"]]))
+        except FileNotFoundError as e:
+            job["status"], job["error"] = "error", f"file not found: {e.filename or job['log']}"
+        return job
+
+    with ci_trace.span("batch prepare", jobs=len(jobs)), ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        jobs = list(pool.map(prep, jobs))
+
+    def write(job: Dict, patch: str, fix_id: Optional[int] = None) -> None:
+        (out_dir / f"{job['id']}.patch").write_text(patch, encoding="utf-8")
+        if patch:
+            # settled per job with `fix_memory.py confirm|reject --pending <out-dir>/<id>.pending.json`
+            fix_memory.write_pending(job["sigs"], patch, job["title"], fix_id, out_dir / f"{job['id']}.pending.json")
+        job["patch"] = f"{job['id']}.patch" if patch else None
+
+    for job in jobs:
+        job["blocks"] = blocks[job["id"]]
+        if job.get("replayed") is not None:
+            write(job, job["replayed"].patch, job["replayed"].id)
+            job["status"] = "memory"
+        elif "status" not in job and not job["sigs"] and not job["triage"].has_errors():
+            write(job, "")
+            job["status"] = "no-failure"
+
+    todo = [j for j in jobs if "status" not in j]
+    api_key = os.environ.get("ANTHROPIC_API_KEY", "").strip()
+    if todo and not api_key:
+        print("Missing ANTHROPIC_API_KEY", file=sys.stderr)
+        for job in todo:
+            job["status"], job["error"] = "error", "missing ANTHROPIC_API_KEY"
+        todo = []
+
+    # Jobs others depend on first, then compile errors (nothing else runs) before exceptions and tests.
+    def severity(job: Dict) -> int:
+        ranked = job["triage"].ranked()
+        return unity_log.KIND_RANK.get(ranked[0].kind, 9) if ranked else 9
+    todo.sort(key=lambda j: (-j["blocks"], severity(j), j["order"]))
+
+    model = (os.environ.get("ANTHROPIC_MODEL") or DEFAULT_MODEL).strip()
+    cache = llm_cache.ResponseCache(bypass=args.no_cache or llm_cache.BYPASS)
+    budget = TokenBudget(args.token_budget)
+    llm_http.POOL.max_idle = max(llm_http.POOL.max_idle, args.concurrency * args.candidates)
+
+    def one(job: Dict) -> None:
+        start = time.monotonic()
+        # upper bound: the whole prompt plus a full answer for every candidate
+        reserved = args.candidates * (prompt_context.estimate_tokens(SYSTEM + job["user"]) + MAX_TOKENS)
+        if not budget.reserve(reserved):
+            job["status"] = "skipped-budget"
+            return
+        with llm_http.tagged(job["id"]), ci_trace.span("batch job", job=job["id"]):
+            try:
+                patch = solve(api_key, model, job["user"], args.candidates, cache, job["repo"],
+                              str(out_dir / f"{job['id']}.patch"), f"[{job['id']}] ")
+                job["status"] = "llm" if patch else "no-patch"
+            except llm_http.LLMError as e:
+                patch, job["status"], job["error"] = "", "error", str(e)
+        job["tokens"] = llm_http.tokens(job["id"])
+        budget.settle(reserved, job["tokens"])
+        write(job, patch)
+        job["seconds"] = round(time.monotonic() - start, 2)
+        print(f"[{job['id']}] {job['status']} in {job['seconds']:.1f}s ({job['tokens']} tokens)")
+
+    with ci_trace.span("batch solve", jobs=len(todo)), ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        # the executor's queue is FIFO: submission order is the priority order
+        for f in [pool.submit(one, j) for j in todo]:
+            f.result()
+
+    summary = {
+        "jobs": [{k: j.get(k) for k in ("id", "project", "platform", "status", "patch", "blocks", "tokens",
+                                       "seconds", "error") if j.get(k) is not None}
+                 for j in sorted(jobs, key=lambda j: j["order"])],
+        "priority": [j["id"] for j in todo],
+        "tokens": llm_http.tokens(),
+        "token_budget": args.token_budget or None,
+        "seconds": round(time.monotonic() - t0, 2),
+    }
+    (out_dir / "summary.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    print(cache.summary())
+    print(llm_http.summary())
+    cost_ledger.spool_calls("claude_autofix")
+    counts: Dict[str, int] = {}
+    for j in jobs:
+        counts[j["status"]] = counts.get(j["status"], 0) + 1
+    print(f"Batch of {len(jobs)} job(s) in {summary['seconds']:.1f}s: {counts}; summary in {out_dir / 'summary.json'}")
+    return 3 if counts.get("error") else 0
 
 def main():
     ap = argparse.ArgumentParser()
-    ap.add_argument("--title", required=True)
-    ap.add_argument("--log-file", required=True)
-    ap.add_argument("--out", required=True)
+    ap.add_argument("--title")
+    ap.add_argument("--log-file", help="Unity Editor log, or a triage saved by fix_loop.py (*.triage.json)")
+    ap.add_argument("--test-results", help="Unity NUnit results XML; its failures are added to the triage")
+    ap.add_argument("--out")
+    ap.add_argument("--no-cache", action="store_true", help="Bypass the LLM response cache")
+    ap.add_argument("--candidates", type=int, default=int(os.environ.get("AUTOFIX_CANDIDATES") or 1),
+                    help="Generate N patches concurrently and keep the best validated one")
+    ap.add_argument("--repo", default=".", help="Repository the patches are validated against")
+    ap.add_argument("--no-memory", action="store_true", help="Do not replay or suggest remembered fixes")
+    ap.add_argument("--meta-out", help="Write {source, prompt_key, fix_id} as JSON (used by fix_loop.py)")
+    batch = ap.add_argument_group("batch mode")
+    batch.add_argument("--batch", help="Manifest of {id, project, platform, log, results, title, depends_on} jobs")
+    batch.add_argument("--out-dir", default="autofix-batch", help="Where <id>.patch files and summary.json go")
+    batch.add_argument("--concurrency", type=int, default=int(os.environ.get("AUTOFIX_CONCURRENCY") or 4),
+                       help="Jobs in flight at once (requests/min are capped by LLM_RPM)")
+    batch.add_argument("--token-budget", type=int, default=int(os.environ.get("AUTOFIX_TOKEN_BUDGET") or 0),
+                       help="Skip jobs whose worst-case tokens no longer fit in this budget (0 = no limit)")
     args = ap.parse_args()
+    ci_trace.install("claude_autofix")
+
+    if args.batch:
+        sys.exit(run_batch(args))
+    if not (args.title and args.log_file and args.out):
+        ap.error("--title, --log-file and --out are required without --batch")
+
+    repo = Path(args.repo).resolve()
+    try:
+        job = prepare(args.title, args.log_file, repo, args.no_memory, args.test_results)
+    except FileNotFoundError as e:
+        print(f"Log file not found: {e.filename or args.log_file}", file=sys.stderr)
+        sys.exit(2)
+    sigs, replayed = job["sigs"], job["replayed"]
+    if replayed is not None:
+        fix_memory.write_pending(sigs, replayed.patch, args.title, replayed.id)
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(replayed.patch)
+        write_meta(args.meta_out, source="memory", prompt_key=None, fix_id=replayed.id)
+        print(f"Replayed remembered fix #{replayed.id} ({replayed.successes} success(es)) to {args.out}")
+        return
 
     api_key = os.environ.get("ANTHROPIC_API_KEY", "").strip()
     if not api_key:
@@ -74,26 +462,27 @@ def main():
         sys.exit(2)
 
     model = (os.environ.get("ANTHROPIC_MODEL") or DEFAULT_MODEL).strip()
+    print(f"Triaged {job['triage'].lines} log lines: {job['triage'].counts() or 'no diagnostics'}")
+    print(f"Source context: ~{job['context_tokens']} tokens")
+    user = job["user"]
+    cache = llm_cache.ResponseCache(bypass=args.no_cache or llm_cache.BYPASS)
 
     try:
-        log = open(args.log_file, "r", encoding="utf-8", errors="ignore").read()
-    except FileNotFoundError:
-        print(f"Log file not found: {args.log_file}", file=sys.stderr)
-        sys.exit(2)
-
-    # keep request small-ish
-    if len(log) > 35000:
-        log = log[-35000:]
-
-    user = USER_TEMPLATE.format(title=args.title, log=log)
-    patch = call_anthropic(api_key, model, user)
-
-    # guard: ensure it looks like a diff
-    if "diff --git" not in patch and not patch.startswith("--- "):
-        patch = ""
+        patch = solve(api_key, model, user, args.candidates, cache, repo, args.out)
+    except llm_http.LLMError as e:
+        print(f"Anthropic call failed: {e}", file=sys.stderr)
+        cost_ledger.spool_calls("claude_autofix")
+        sys.exit(3)
+    print(cache.summary())
+    print(llm_http.summary())
+    cost_ledger.spool_calls("claude_autofix")
 
     with open(args.out, "w", encoding="utf-8") as f:
         f.write(patch)
+    if patch:
+        # confirmed into the fix memory by `fix_memory.py confirm` once the build is green
+        fix_memory.write_pending(sigs, patch, args.title)
+    write_meta(args.meta_out, source="llm", prompt_key=cache.key(model, SYSTEM, user, temperature=VARIANTS[0][0]), fix_id=None)
 
     print(f"Wrote patch to {args.out} (len={len(patch)})")
 
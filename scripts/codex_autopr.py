@@ -1,5 +1,6 @@
-import os, subprocess, textwrap
-from openai import OpenAI
+import os, sys, time
+
+import ci_trace
 
 MODEL = os.getenv("CODEX_MODEL", "gpt-5-codex")
 
@@ -17,26 +18,97 @@ Rules:
 - Output MUST be a unified diff patch (git apply compatible), and nothing else.
 """
 
-def sh(cmd: str) -> str:
-    return subprocess.check_output(cmd, shell=True, text=True).strip()
-
-def read_file(p: str) -> str:
-    try:
-        with open(p, "r", encoding="utf-8") as f:
-            return f.read()
-    except FileNotFoundError:
-        return ""
+BRANCH = "codex/ci-autotune"
+BOT = ("codex-bot", "codex-bot@users.noreply.github.com")
+
+def git(*args: str, input: bytes = None) -> bytes:
+    import subprocess  # ~25 ms of startup, only paid once there is an API key
+    return subprocess.run(["git", *args], input=input, capture_output=True, check=True).stdout
+
+def read_targets():
+    """HEAD commit and {path: (mode, content)} for TARGET_FILES, in two git calls total."""
+    modes = {}
+    for line in git("ls-tree", "HEAD", "--", *TARGET_FILES).decode().splitlines():
+        meta, path = line.split("\t", 1)
+        modes[path] = meta.split()[0]
+    specs = ["HEAD"] + [f"HEAD:{p}" for p in TARGET_FILES]
+    out = git("cat-file", "--batch", input="".join(s + "\n" for s in specs).encode())
+    head, files, pos = "", {}, 0
+    for path in [None] + TARGET_FILES:
+        eol = out.index(b"\n", pos)
+        header = out[pos:eol].decode().split()
+        pos = eol + 1
+        if header[-1] == "missing":
+            continue
+        size = int(header[2])
+        body = out[pos:pos + size]
+        pos += size + 1  # content is followed by a newline
+        if path is None:
+            head = header[0]
+        else:
+            files[path] = (modes.get(path, "100644"), body.decode("utf-8", errors="replace"))
+    return head, files
+
+def apply_patch(patch: str, files):
+    """Apply per file, keeping hunks that match; returns ({path: new content}, rejects text).
+
+    A deleted file maps to None.
+    """
+    import unidiff
+    changed, rejects = {}, []
+    for fp in unidiff.parse(patch):
+        if fp.path not in TARGET_FILES:
+            rejects.append(f"--- {fp.path}: not in TARGET_FILES, ignored\n")
+            continue
+        if fp.is_deleted:
+            if fp.path in files:
+                changed[fp.path] = None
+            else:
+                rejects.append(f"--- {fp.path}: deleted but not in HEAD, ignored\n")
+            continue
+        _, old = files.get(fp.path, ("100644", ""))
+        new, applied, rejected = unidiff.apply_partial(old, fp, fuzz=200)
+        for h in rejected:
+            rejects.append(f"--- {fp.path}\n" + unidiff.format_hunk(h))
+        if applied and new != old:
+            changed[fp.path] = new
+    return changed, "".join(rejects)
+
+def commit(head: str, files, changed, message: str) -> None:
+    """Create the branch commit on top of HEAD in one `git fast-import` run (no checkout, no index)."""
+    ts = int(time.time())
+    stream = [f"commit refs/heads/{BRANCH}", f"committer {BOT[0]} <{BOT[1]}> {ts} +0000",
+              f"data {len(message.encode())}", message, f"from {head}"]
+    chunks = ["\n".join(stream).encode() + b"\n"]
+    for path, content in sorted(changed.items()):
+        if content is None:
+            chunks.append(f"D {path}\n".encode())
+            continue
+        data = content.encode("utf-8")
+        mode = files.get(path, ("100644", ""))[0]
+        chunks.append(f"M {mode} inline {path}\ndata {len(data)}\n".encode() + data + b"\n")
+    git("fast-import", "--quiet", "--force", input=b"".join(chunks) + b"\n")
 
 def main():
+    ci_trace.install("codex_autopr")
     if not os.getenv("ANTHROPIC_API_KEY"):
         print("ANTHROPIC_API_KEY missing -> skipping codex step.")
         return
+    # imported past the key check: a skipped step costs only the interpreter start
+    import subprocess
+    import textwrap
 
-    client = OpenAI()
+    import cost_ledger
+    import llm_http
+    import unidiff
 
-    repo_state = "\n\n".join(
-        f"--- {p} ---\n{read_file(p)}" for p in TARGET_FILES
-    )
+    client = llm_http.OpenAIClient()
+
+    with ci_trace.span("prompt build"):
+        head, files = read_targets()
+        repo_state = "\n\n".join(
+            f"--- {p} ---\n{files.get(p, ('', ''))[1]}" for p in TARGET_FILES
+        )
 
     prompt = textwrap.dedent(f"""
     Here are the current files. Propose improvements (reliability, caching, clarity, security).
@@ -45,43 +117,53 @@ def main():
     {repo_state}
     """)
 
-    resp = client.responses.create(
-        model=MODEL,
-        input=[
-            {"role": "system", "content": SYSTEM},
-            {"role": "user", "content": prompt},
-        ],
-    )
-
-    patch = (resp.output_text or "").strip()
-    if not patch.startswith("diff --git"):
+    try:
+        patch = client.respond(
+            MODEL,
+            [
+                {"role": "system", "content": SYSTEM},
+                {"role": "user", "content": prompt},
+            ],
+        )
+    except llm_http.LLMError as e:
+        print(f"Codex call failed: {e}", file=sys.stderr)
+        cost_ledger.spool_calls("codex_autopr")
+        sys.exit(3)
+    print(llm_http.summary())
+    cost_ledger.spool_calls("codex_autopr")
+
+    patch = unidiff.extract_diff(patch)
+    if not patch:
         print("No valid diff patch produced -> skipping.")
         return
 
     with open("codex.patch", "w", encoding="utf-8") as f:
-        f.write(patch + "\n")
-
-    sh("git config user.name 'codex-bot'")
-    sh("git config user.email 'codex-bot@users.noreply.github.com'")
-
-    branch = "codex/ci-autotune"
-    sh(f"git checkout -B {branch}")
-
-    subprocess.check_call("git apply codex.patch", shell=True)
-
-    if sh("git status --porcelain") == "":
+        f.write(patch)
+
+    with ci_trace.span("apply hunks"):
+        try:
+            changed, rejects = apply_patch(patch, files)
+        except unidiff.PatchError as e:
+            print(f"Unparseable patch: {e} -> skipping.")
+            return
+    if rejects:
+        with open("codex.rej", "w", encoding="utf-8") as f:
+            f.write(rejects)
+        print(f"Some hunks were rejected, see codex.rej:\n{rejects}", file=sys.stderr)
+    if not changed:
         print("No changes after applying patch.")
         return
+    print(f"Applied changes to: {', '.join(sorted(changed))}")
 
-    sh("git add " + " ".join(TARGET_FILES))
-    sh("git commit -m 'chore(ci): auto-tune pipeline'")
-    sh(f"git push -f origin {branch}")
+    with ci_trace.span("git commit+push"):
+        commit(head, files, changed, "chore(ci): auto-tune pipeline\n")
+        git("push", "-f", "origin", f"refs/heads/{BRANCH}:refs/heads/{BRANCH}")
 
     # PR via GitHub CLI (déjà dispo sur ubuntu-latest)
     subprocess.check_call(
         'gh pr create --title "chore(ci): auto-tune pipeline (Codex)" '
         '--body "Automated small CI improvements proposed by Codex agent." '
-        "--base main --head codex/ci-autotune || true",
+        f"--base main --head {BRANCH} || true",
         shell=True,
     )
 
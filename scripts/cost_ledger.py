@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""Cost accounting from real token usage and runner minutes.
+
+Scripts that call an LLM spool the usage recorded by llm_http (one JSON line
+per call, appended with a single O_APPEND write so concurrent steps never
+interleave) and steps spool their measured duration the same way. `fold()`
+then prices the whole spool with .github/config/costs.json, adds it to the
+running `totals`, appends one `history` entry per workflow run and rewrites
+costs.json once, atomically and under an exclusive lock (kept next to the
+spool, out of the tracked config directory).
+
+    cost_ledger.py minutes --step build --start-ts 1700000000
+    cost_ledger.py fold
+    cost_ledger.py spent            # EUR spent this month
+"""
+import argparse
+import fcntl
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+COSTS_FILE = Path(os.environ.get("COSTS_FILE", ".github/config/costs.json"))
+SPOOL_FILE = Path(os.environ.get("COST_SPOOL", ".ci_cache/cost_spool.jsonl"))
+RUNNER = os.environ.get("COST_RUNNER", "ubuntu_latest")
+# Keep costs.json bounded; totals still cover everything.
+HISTORY_MAX = 500
+# llm_http.CALLS already spooled by this process (ci.py runs several scripts in one)
+_spooled = {"calls": 0}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _append(records: Iterable[Dict], spool: Path = SPOOL_FILE) -> int:
+    data = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records).encode()
+    if not data:
+        return 0
+    spool.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(spool, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    try:
+        os.write(fd, data)
+    finally:
+        os.close(fd)
+    return data.count(b"\n")
+
+
+def spool_calls(script: str, calls: Optional[List[Dict]] = None, spool: Path = SPOOL_FILE) -> int:
+    """Spool the token usage of the LLM calls this process made since its last spool."""
+    if calls is None:
+        import llm_http
+        calls = llm_http.CALLS[_spooled["calls"]:]
+        _spooled["calls"] += len(calls)
+    run = os.environ.get("GITHUB_RUN_ID", "")
+    return _append(({"kind": "llm", "ts": _now(), "run_id": run, "script": script, "provider": c["provider"],
+                     "model": c["model"], "input_tokens": c["input_tokens"], "output_tokens": c["output_tokens"]}
+                    for c in calls if c["input_tokens"] or c["output_tokens"]), spool)
+
+
+def spool_minutes(step: str, minutes: float, spool: Path = SPOOL_FILE) -> int:
+    run = os.environ.get("GITHUB_RUN_ID", "")
+    return _append([{"kind": "minutes", "ts": _now(), "run_id": run, "step": step, "minutes": round(minutes, 3)}], spool)
+
+
+def price(pricing: Dict, provider: str, model: str) -> Optional[Dict]:
+    """Per-1k-token prices for a model, matched by longest configured prefix."""
+    table = pricing.get(provider, {})
+    best = max((k for k in table if model.startswith(k)), key=len, default=None)
+    return table[best] if best else None
+
+
+def cost_usd(pricing: Dict, rec: Dict) -> float:
+    if rec["kind"] == "minutes":
+        return rec["minutes"] * pricing.get("github_actions", {}).get(f"{RUNNER}_per_minute", 0.0)
+    p = price(pricing, rec["provider"], rec["model"])
+    if p is None:
+        print(f"⚠️ no pricing for {rec['provider']}/{rec['model']} in {COSTS_FILE}", file=sys.stderr)
+        return 0.0
+    return rec["input_tokens"] / 1000 * p["input_per_1k_tokens"] + rec["output_tokens"] / 1000 * p["output_per_1k_tokens"]
+
+
+def _take_spool(spool: Path) -> List[Dict]:
+    """Atomically detach the spool so calls spooled meanwhile go to a fresh file."""
+    taken = spool.with_name(f"{spool.name}.{os.getpid()}")
+    try:
+        os.replace(spool, taken)
+    except FileNotFoundError:
+        return []
+    records = []
+    with open(taken, encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    taken.unlink()
+    return records
+
+
+def _write_json(path: Path, data: Dict) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        os.replace(tmp, path)
+    except OSError:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def fold(costs_file: Path = COSTS_FILE, spool: Path = SPOOL_FILE) -> Dict[str, float]:
+    """Price the spool into costs.json; returns {run_id: cost_eur} for what was folded."""
+    costs_file.parent.mkdir(parents=True, exist_ok=True)
+    spool.parent.mkdir(parents=True, exist_ok=True)
+    with open(spool.with_name(costs_file.name + ".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        records = _take_spool(spool)
+        if not records:
+            return {}
+        data = json.loads(costs_file.read_text(encoding="utf-8"))
+        pricing = data["pricing"]
+        rate = pricing.get("exchange_rate", {}).get("USD_to_EUR", 1.0)
+        totals = data.setdefault("totals", {})
+        runs: Dict[str, Dict] = {}
+        for rec in records:
+            usd = cost_usd(pricing, rec)
+            run = runs.setdefault(rec.get("run_id", ""), {"run_id": rec.get("run_id", ""), "date": rec["ts"],
+                                                          "minutes": 0.0, "llm_calls": 0, "cost_usd": 0.0})
+            run["cost_usd"] += usd
+            if rec["kind"] == "minutes":
+                run["minutes"] += rec["minutes"]
+                totals["github_minutes"] = round(totals.get("github_minutes", 0) + rec["minutes"], 3)
+                totals["github_cost_usd"] = round(totals.get("github_cost_usd", 0) + usd, 6)
+            else:
+                pv = rec["provider"]
+                run["llm_calls"] += 1
+                for k in ("input_tokens", "output_tokens"):
+                    run[f"{pv}_{k}"] = run.get(f"{pv}_{k}", 0) + rec[k]
+                    totals[f"{pv}_{k}"] = totals.get(f"{pv}_{k}", 0) + rec[k]
+                totals[f"{pv}_cost_usd"] = round(totals.get(f"{pv}_cost_usd", 0) + usd, 6)
+            totals["total_cost_usd"] = round(totals.get("total_cost_usd", 0) + usd, 6)
+        totals["total_cost_eur"] = round(totals["total_cost_usd"] * rate, 6)
+        history = data.setdefault("history", [])
+        known = {h.get("run_id") for h in history if h.get("run_id")}
+        # records without GITHUB_RUN_ID come from local runs: they cost money but are not CI runs
+        totals["total_runs"] = totals.get("total_runs", 0) + sum(1 for r in runs if r and r not in known)
+        totals["first_run"] = totals.get("first_run") or min(r["date"] for r in runs.values())
+        totals["last_run"] = max(r["date"] for r in runs.values())
+        for run in runs.values():
+            run["minutes"] = round(run["minutes"], 3)
+            run["cost_usd"] = round(run["cost_usd"], 6)
+            run["cost_eur"] = round(run["cost_usd"] * rate, 6)
+            history.append(run)
+        del history[:-HISTORY_MAX]
+        _write_json(costs_file, data)
+    return {k: r["cost_eur"] for k, r in runs.items()}
+
+
+def spent_eur(month: str, costs_file: Path = COSTS_FILE) -> float:
+    data = json.loads(costs_file.read_text(encoding="utf-8"))
+    return round(sum(h.get("cost_eur", 0.0) for h in data.get("history", []) if h.get("date", "").startswith(month)), 2)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Spool and fold CI cost records into costs.json")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    m = sub.add_parser("minutes", help="Spool a measured step duration")
+    m.add_argument("--step", required=True)
+    m.add_argument("--start-ts", type=float, required=True, help="Step start (epoch seconds)")
+    sub.add_parser("fold", help="Price the spool into costs.json totals and history")
+    sub.add_parser("spent", help="EUR spent in the current month")
+    args = ap.parse_args()
+
+    if args.cmd == "minutes":
+        spool_minutes(args.step, max(0.0, (time.time() - args.start_ts) / 60))
+    elif args.cmd == "fold":
+        for run, eur in fold().items():
+            print(f"run {run or '(local)'}: {eur:.4f} €")
+    elif args.cmd == "spent":
+        print(f"{spent_eur(datetime.now(timezone.utc).strftime('%Y-%m')):.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""Fast C# syntax pre-check for patched scripts.
+
+Not a compiler: a single-pass lexer that catches what typically breaks an
+LLM patch before the Unity Editor is ever started -- unbalanced braces,
+parentheses and brackets, unterminated strings/chars/comments, and blocks in
+the wrong place (a method outside a type, a statement directly in a class
+body, a namespace inside a type). Results are cached per file content hash.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import cache_file
+import unidiff
+
+CACHE_FILE = Path(os.environ.get("CS_SYNTAX_CACHE", ".ci_cache/cs_syntax.json"))
+SCRIPTS_DIR = "Assets/Scripts"
+# Bump when the checker changes so stale cache entries are ignored.
+VERSION = "2"
+
+TYPE_KEYWORDS = {"class", "struct", "interface", "enum", "record"}
+STATEMENT_KEYWORDS = {"if", "else", "for", "foreach", "while", "do", "switch", "try", "catch", "finally", "using", "lock", "fixed", "unsafe", "checked", "unchecked"}
+MODIFIERS = {"public", "private", "protected", "internal", "static", "sealed", "abstract", "partial", "readonly", "unsafe", "new", "ref", "file", "]"}
+ACCESSORS = {"get", "set", "init", "add", "remove"}
+PAIRS = {")": "(", "]": "[", "}": "{"}
+
+
+@dataclass
+class Issue:
+    line: int
+    col: int
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.line}:{self.col}: {self.message}"
+
+
+class Lexer:
+    def __init__(self, src: str):
+        self.s = src
+        self.i = 0
+        self.line = 1
+        self.col = 1
+        self.issues: List[Issue] = []
+        # #if nesting; only the first branch of each conditional is lexed, so
+        # braces duplicated across #if/#else are not counted twice.
+        self.pp: List[bool] = []
+
+    def err(self, msg: str, line: Optional[int] = None, col: Optional[int] = None) -> None:
+        self.issues.append(Issue(line or self.line, col or self.col, msg))
+
+    def adv(self, n: int = 1) -> None:
+        for _ in range(n):
+            if self.i >= len(self.s):
+                return
+            if self.s[self.i] == "\n":
+                self.line += 1
+                self.col = 1
+            else:
+                self.col += 1
+            self.i += 1
+
+    def peek(self, k: int = 0) -> str:
+        j = self.i + k
+        return self.s[j] if j < len(self.s) else ""
+
+    def tokens(self, stop_at_brace: bool = False):
+        """Yield (kind, text, line, col); kind in {'id', 'punct'}. Literals and comments are skipped."""
+        s = self.s
+        at_line_start = True
+        depth = 0
+        while self.i < len(s):
+            c = s[self.i]
+            if c == "\n":
+                at_line_start = True
+                self.adv()
+                continue
+            if c in " \t\r\f﻿":
+                self.adv()
+                continue
+            if c == "#" and at_line_start:
+                end = s.find("\n", self.i)
+                end = len(s) if end < 0 else end
+                self.directive(s[self.i + 1:end].strip())
+                self.adv(end - self.i)
+                continue
+            if self.pp and not all(self.pp):
+                end = s.find("\n", self.i)
+                self.adv((len(s) if end < 0 else end) - self.i)
+                continue
+            at_line_start = False
+            if c == "/" and self.peek(1) == "/":
+                while self.i < len(s) and s[self.i] != "\n":
+                    self.adv()
+                continue
+            if c == "/" and self.peek(1) == "*":
+                line, col = self.line, self.col
+                end = s.find("*/", self.i + 2)
+                if end < 0:
+                    self.err("unterminated block comment", line, col)
+                    self.adv(len(s) - self.i)
+                else:
+                    self.adv(end + 2 - self.i)
+                continue
+            if c in "$@" or c == '"':
+                j = self.i
+                prefix = ""
+                while j < len(s) and s[j] in "$@" and len(prefix) < 3:
+                    prefix += s[j]
+                    j += 1
+                if j < len(s) and s[j] == '"':
+                    self.adv(len(prefix))
+                    self.string("@" in prefix, "$" in prefix)
+                    continue
+            if c == "'":
+                self.char()
+                continue
+            if c.isalnum() or c == "_":
+                line, col = self.line, self.col
+                j = self.i
+                while j < len(s) and (s[j].isalnum() or s[j] == "_"):
+                    j += 1
+                text = s[self.i:j]
+                self.adv(j - self.i)
+                yield "id", text, line, col
+                continue
+            if stop_at_brace:
+                if c == "{":
+                    depth += 1
+                elif c == "}":
+                    if depth == 0:
+                        return
+                    depth -= 1
+            yield "punct", c, self.line, self.col
+            self.adv()
+
+    def directive(self, text: str) -> None:
+        word = text.split(None, 1)[0] if text else ""
+        if word == "if":
+            self.pp.append(True)
+        elif word in ("elif", "else") and self.pp:
+            self.pp[-1] = False
+        elif word == "endif":
+            if self.pp:
+                self.pp.pop()
+            else:
+                self.err("#endif without #if")
+
+    def string(self, verbatim: bool, interpolated: bool) -> None:
+        s = self.s
+        line, col = self.line, self.col
+        if s.startswith('"""', self.i):
+            end = s.find('"""', self.i + 3)
+            if end < 0:
+                self.err("unterminated raw string literal", line, col)
+                self.adv(len(s) - self.i)
+            else:
+                self.adv(end + 3 - self.i)
+            return
+        self.adv()
+        while self.i < len(s):
+            c = s[self.i]
+            if c == "\n" and not verbatim:
+                self.err("unterminated string literal", line, col)
+                return
+            if c == "\\" and not verbatim:
+                self.adv(2)
+                continue
+            if c == '"':
+                if verbatim and self.peek(1) == '"':
+                    self.adv(2)
+                    continue
+                self.adv()
+                return
+            if interpolated and c == "{":
+                if self.peek(1) == "{":
+                    self.adv(2)
+                    continue
+                self.adv()
+                # Interpolation hole: lex nested code until its closing brace.
+                for _ in self.tokens(stop_at_brace=True):
+                    pass
+                if self.i >= len(s):
+                    break
+                self.adv()
+                continue
+            if interpolated and c == "}" and self.peek(1) == "}":
+                self.adv(2)
+                continue
+            self.adv()
+        self.err("unterminated string literal", line, col)
+
+    def char(self) -> None:
+        line, col = self.line, self.col
+        self.adv()
+        if self.peek() == "\\":
+            self.adv(2)
+            while self.i < len(self.s) and self.s[self.i] not in "'\n":
+                self.adv()
+        elif self.peek() not in ("\n", ""):
+            self.adv()
+        if self.peek() != "'":
+            self.err("unterminated character literal", line, col)
+            return
+        self.adv()
+
+
+def block_kind(head: List[str]) -> str:
+    """Classify a '{' from the tokens since the previous ';', '{' or '}'."""
+    if not head:
+        return "block"
+    ids = set(head)
+    last = head[-1]
+    if "namespace" in ids:
+        return "namespace"
+    if last in ACCESSORS:
+        return "accessor"
+    if head[0] in STATEMENT_KEYWORDS:
+        return "statement"
+    for k, tok in enumerate(head):
+        if tok in ("=", "=>", "("):
+            break
+        if tok in TYPE_KEYWORDS and (k == 0 or head[k - 1] in MODIFIERS):
+            return "type"
+    # default parameter values and `where T : new()` constraints are not initializers
+    top, depth = set(), 0
+    for k, tok in enumerate(head):
+        if tok in "([":
+            depth += 1
+        elif tok in ")]":
+            depth -= 1
+        elif depth == 0 and not (tok == "new" and k and head[k - 1] in (":", ",")):
+            top.add(tok)
+    if top & {"=", "=>", "new", "return"} or last in (",", "(", "[", "?", ":", "switch"):
+        return "initializer"
+    if ")" in ids:
+        return "method"
+    return "member"  # property / event / indexer body
+
+
+def check_source(src: str) -> List[Issue]:
+    lx = Lexer(src)
+    stack: List[Tuple[str, int, int, str]] = []  # (bracket, line, col, block kind)
+    head: List[str] = []
+    for kind, text, line, col in lx.tokens():
+        if kind == "id":
+            head.append(text)
+            continue
+        if text in "([":
+            # A '[' that starts a declaration is an attribute list; it must not
+            # influence the classification of the block that follows.
+            stack.append((text, line, col, "attr" if text == "[" and not head else ""))
+            head.append(text)
+        elif text == "{":
+            parent = next((k for b, _, _, k in reversed(stack) if b == "{"), "top")
+            in_parens = bool(stack) and stack[-1][0] in "(["
+            bk = "initializer" if in_parens else block_kind(head)
+            if bk == "namespace" and parent not in ("top", "namespace"):
+                lx.err("namespace declared inside a type or method", line, col)
+            elif bk == "method" and parent in ("top", "namespace"):
+                lx.err("method body outside of a type", line, col)
+            elif bk == "statement" and parent in ("top", "namespace", "type"):
+                lx.err(f"'{head[0]}' statement outside of a method", line, col)
+            stack.append(("{", line, col, bk))
+            head = []
+        elif text in ")]}":
+            if not stack:
+                lx.err(f"unexpected '{text}'", line, col)
+            elif stack[-1][0] != PAIRS[text]:
+                b, bl, bc, _ = stack[-1]
+                lx.err(f"'{text}' does not match '{b}' opened at {bl}:{bc}", line, col)
+                # Resynchronise: drop to the matching opener if there is one.
+                for k in range(len(stack) - 1, -1, -1):
+                    if stack[k][0] == PAIRS[text]:
+                        del stack[k:]
+                        break
+            else:
+                if stack.pop()[3] == "attr":
+                    head = []
+                    continue
+            if text == "}":
+                head = []
+            else:
+                head.append(text)
+        elif text == ";":
+            if stack and stack[-1][0] == "{" and stack[-1][3] == "type" and head[:1] and head[0] in STATEMENT_KEYWORDS - {"using", "fixed", "unsafe"}:
+                lx.err(f"'{head[0]}' statement outside of a method", line, col)
+            if not stack or stack[-1][0] == "{":
+                head = []
+            else:
+                head.append(text)
+        elif text in "=,?:<>":
+            head.append("=>" if text == ">" and head[-1:] == ["="] else text)
+    for b, line, col, _ in stack:
+        lx.err(f"unclosed '{b}'", line, col)
+    if lx.pp:
+        lx.err("unterminated #if")
+    return sorted(lx.issues, key=lambda i: (i.line, i.col))
+
+
+class SyntaxCache:
+    def __init__(self, path: Path = CACHE_FILE):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            self.entries: Dict[str, List] = data.get("entries", {}) if data.get("version") == VERSION else {}
+        except (OSError, ValueError):
+            self.entries = {}
+        self.dirty = False
+
+    def check(self, src: str) -> List[Issue]:
+        h = hashlib.sha256(src.encode("utf-8")).hexdigest()
+        got = self.entries.get(h)
+        if got is not None:
+            self.hits += 1
+            return [Issue(*x) for x in got]
+        self.misses += 1
+        issues = check_source(src)
+        self.entries[h] = [[i.line, i.col, i.message] for i in issues]
+        self.dirty = True
+        return issues
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        # several candidates or batch jobs save at once: merge what they wrote under the lock
+        with cache_file.locked(self.path):
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+                if data.get("version") == VERSION:
+                    self.entries = {**data.get("entries", {}), **self.entries}
+            except (OSError, ValueError):
+                pass
+            cache_file.write_json(self.path, {"version": VERSION, "entries": self.entries})
+        self.dirty = False
+
+
+def patched_sources(patch: str, repo: Path) -> Dict[str, str]:
+    """Post-patch content of every .cs file the patch touches (deleted files excluded)."""
+    out: Dict[str, str] = {}
+    for fp in unidiff.parse(patch):
+        if fp.is_deleted or not fp.path.endswith(".cs"):
+            continue
+        old = "" if fp.is_new else (repo / fp.old_path).read_text(encoding="utf-8", errors="replace")
+        out[fp.path] = unidiff.apply_file(old, fp)
+    return out
+
+
+def check_patch(patch: str, repo: Path, cache: Optional[SyntaxCache] = None) -> Dict[str, List[Issue]]:
+    cache = cache or SyntaxCache()
+    return {p: cache.check(src) for p, src in patched_sources(patch, repo).items()}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Syntax pre-check for C# scripts (no Unity needed)")
+    ap.add_argument("paths", nargs="*", help=f"Files or directories (default: {SCRIPTS_DIR})")
+    ap.add_argument("--patch", help="Check only the .cs files touched by this patch, with the patch applied")
+    ap.add_argument("--repo", default=".")
+    ap.add_argument("--no-cache", action="store_true")
+    ap.add_argument("--timings", action="store_true", help="Print per-file timing")
+    args = ap.parse_args()
+
+    repo = Path(args.repo)
+    cache = SyntaxCache(Path(os.devnull) if args.no_cache else CACHE_FILE)
+    t0 = time.perf_counter()
+    if args.patch:
+        try:
+            sources = patched_sources(Path(args.patch).read_text(encoding="utf-8"), repo)
+        except (unidiff.PatchError, OSError) as e:
+            print(f"❌ patch: {e}")
+            return 1
+    else:
+        files: List[Path] = []
+        for p in [Path(x) for x in args.paths] or [repo / SCRIPTS_DIR]:
+            files.extend(sorted(p.rglob("*.cs")) if p.is_dir() else [p])
+        sources = {str(f): f.read_text(encoding="utf-8", errors="replace") for f in files}
+
+    bad = 0
+    for path, src in sources.items():
+        t = time.perf_counter()
+        issues = cache.check(src)
+        dt = (time.perf_counter() - t) * 1000
+        if args.timings:
+            print(f"{dt:8.2f} ms  {path}")
+        for i in issues:
+            print(f"{path}:{i}")
+        bad += bool(issues)
+    if not args.no_cache:
+        cache.save()
+    total = (time.perf_counter() - t0) * 1000
+    print(f"{'❌' if bad else '✅'} {len(sources)} file(s), {bad} with issues, {total:.1f} ms (cache: {cache.hits} hit / {cache.misses} miss)")
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
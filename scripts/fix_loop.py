@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""Resumable compile -> fix -> apply loop around claude_autofix.py.
+
+Each iteration moves through explicit steps and is checkpointed after every
+one of them:
+
+    iteration 0:  compile
+    iteration k:  generate -> apply -> compile
+
+What is kept per iteration: digest of the triaged log and the triage itself
+(iterN.triage.json: deduplicated diagnostics and the log tail, bounded
+whatever the log size; claude_autofix reads it as a log), prompt key and source of the patch (memory / llm),
+patch sha1 and file, `git apply` result and compile verdict. The checkpoint
+directory (FIX_LOOP_DIR, default .ci_cache/fix_loop) is mirrored into a zip
+(--checkpoint-zip) after each step, ready for actions/upload-artifact or
+actions/cache with `if: always()`.
+
+On a rerun for the same base commit (after cancel-in-progress, a timeout or
+a retry) the loop re-applies the patches that were already applied, then
+resumes at the first step that has no recorded result: a compile that
+already has a verdict is never run again, and a generated patch that was
+already evaluated is not compiled a second time. A claude_autofix failure
+(missing key, API error after retries) ends the run with status `error` but
+leaves its iteration unfinished, so the rerun asks for the patch again.
+
+The Unity log is followed while it is written (log_follow.py): once the
+compiler errors are complete the run is stopped and the next patch is
+generated while the Editor shuts down; `apply` waits for it to be gone.
+
+    fix_loop.py --compile-cmd "./ci/unity_compile.sh {log}" [--max-iters 5]
+    fix_loop.py --status
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import time
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import ci_trace
+import fix_memory
+import log_follow
+
+STATE_DIR = Path(os.environ.get("FIX_LOOP_DIR", ".ci_cache/fix_loop"))
+MAX_ITERS = int(os.environ.get("MAX_AI_ITERS") or 5)
+COMPILE_CMD = os.environ.get("UNITY_COMPILE_CMD", "")
+LOG_DIR = Path(os.environ.get("UNITY_LOG_DIR", ".ci_logs"))
+AUTOFIX = Path(__file__).resolve().parent / "claude_autofix.py"
+VERSION = 2
+
+
+def _sha1(text: str) -> str:
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def _git(*args: str, input: Optional[str] = None) -> subprocess.CompletedProcess:
+    return subprocess.run(["git", *args], input=input, capture_output=True, text=True)
+
+
+class Checkpoint:
+    """state.json + per-iteration files, written atomically after each step."""
+
+    def __init__(self, root: Path = STATE_DIR, zip_path: Optional[Path] = None):
+        self.root = root
+        self.zip_path = zip_path
+        self.state: Dict = {}
+
+    def load(self, base: str) -> bool:
+        """True when a checkpoint for this base commit exists (restoring it from the zip if needed)."""
+        if not (self.root / "state.json").exists() and self.zip_path and self.zip_path.exists():
+            with zipfile.ZipFile(self.zip_path) as z:
+                z.extractall(self.root)
+        try:
+            state = json.loads((self.root / "state.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            state = {}
+        if state.get("version") == VERSION and state.get("base") == base:
+            self.state = state
+            return True
+        shutil.rmtree(self.root, ignore_errors=True)
+        self.state = {"version": VERSION, "base": base, "status": "running", "runs": 0, "iterations": []}
+        return False
+
+    @property
+    def iterations(self) -> List[Dict]:
+        return self.state["iterations"]
+
+    def file(self, name: str) -> Path:
+        return self.root / name
+
+    def write(self, name: str, text: str) -> str:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / f".{name}.tmp"
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, self.root / name)
+        return name
+
+    def save(self) -> None:
+        self.state["updated"] = time.time()
+        self.write("state.json", json.dumps(self.state, indent=1))
+        if self.zip_path:
+            tmp = self.zip_path.with_name(self.zip_path.name + ".tmp")
+            with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as z:
+                for p in sorted(self.root.iterdir()):
+                    if p.is_file() and not p.name.startswith("."):
+                        z.write(p, p.name)
+            os.replace(tmp, self.zip_path)
+
+    def evaluated(self) -> Dict[str, str]:
+        """patch sha1 -> verdict for every patch that already went through a compile."""
+        return {it["patch_sha"]: it["verdict"] for it in self.iterations if it.get("patch_sha") and it.get("verdict")}
+
+
+class FixLoop:
+    def __init__(self, ckpt: Checkpoint, compile_cmd: str, max_iters: int, title: str, autofix_args: List[str],
+                 abort_early: bool = True):
+        self.ckpt = ckpt
+        self.compile_cmd = compile_cmd
+        self.max_iters = max_iters
+        self.title = title
+        self.autofix_args = autofix_args
+        self.abort_early = abort_early
+        # run stopped early on a fatal error, still shutting down while the next patch is generated
+        self.stopping: Optional[log_follow.Watch] = None
+        # claude_autofix failed in this run: retried by the next run, not in a loop here
+        self.failed = False
+
+    # -- steps ------------------------------------------------------------
+
+    @ci_trace.traced("compile")
+    def compile(self, it: Dict) -> None:
+        LOG_DIR.mkdir(parents=True, exist_ok=True)
+        log = LOG_DIR / f"unity-iter{it['n']}.log"
+        cmd = [a.replace("{log}", str(log)) for a in shlex.split(self.compile_cmd)]
+        t0 = time.time()
+        # the log is triaged while it is written; a run with compiler errors is stopped right away
+        watch = log_follow.follow(log_follow.start(cmd, str(log)), str(log), abort=self.abort_early)
+        triage = watch.triage
+        it["compile_rc"] = None if watch.aborted else watch.proc.returncode
+        it["compile_s"] = round(time.time() - t0, 1)
+        if watch.aborted:
+            it["aborted_after_s"] = watch.fatal_after_s
+            self.stopping = watch
+        # the triage, not its excerpt: an excerpt fed back to the triage loses diagnostics and signatures
+        it["triage_file"] = self.ckpt.write(f"iter{it['n']}.triage.json", json.dumps(triage.to_json()))
+        it["log_digest"] = _sha1("\n".join(d.text for d in triage.ranked()))
+        it["verdict"] = "green" if it["compile_rc"] == 0 and not triage.has_errors() else "red"
+        if not watch.aborted:
+            self.keep_log(it["n"])
+        if it.get("patch_sha"):
+            print(fix_memory.settle(it["verdict"] == "green"))
+        it["step"] = "compiled"
+
+    def keep_log(self, n: int) -> None:
+        log = LOG_DIR / f"unity-iter{n}.log"
+        if log.exists():
+            # full log kept compressed next to the checkpoint, outside the artifact zip
+            with open(log, "rb") as src, gzip.open(self.ckpt.file(f".iter{n}.log.gz"), "wb") as dst:
+                shutil.copyfileobj(src, dst)
+
+    def wait_stopped(self) -> None:
+        """Wait for an aborted Unity run to be gone before the tree is touched again."""
+        if self.stopping is None:
+            return
+        with ci_trace.span("wait for unity stop"):
+            self.stopping.wait()
+        self.keep_log(next(it["n"] for it in reversed(self.ckpt.iterations) if it.get("aborted_after_s") is not None))
+        self.stopping = None
+
+    @ci_trace.traced("generate")
+    def generate(self, it: Dict, log_file: Path) -> None:
+        out = self.ckpt.file(f".iter{it['n']}.patch.tmp")
+        meta = self.ckpt.file(f".iter{it['n']}.meta.tmp")
+        evaluated = self.ckpt.evaluated()
+        for extra in ([], ["--no-cache", "--no-memory"]):
+            cmd = [sys.executable, str(AUTOFIX), "--title", self.title, "--log-file", str(log_file),
+                   "--out", str(out), "--meta-out", str(meta), *self.autofix_args, *extra]
+            rc = subprocess.run(cmd).returncode
+            patch = out.read_text(encoding="utf-8") if rc == 0 and out.exists() else ""
+            sha = _sha1(patch) if patch else ""
+            if sha not in evaluated:
+                break
+            # same patch as an earlier iteration: its verdict is known, ask for a fresh one
+            print(f"Patch {sha[:10]} already evaluated ({evaluated[sha]}), regenerating without caches")
+        it["autofix_rc"] = rc
+        if rc != 0:
+            # no verdict: the iteration stays open and the next run generates it again
+            self.failed = True
+            it["step"] = "failed"
+            return
+        info = json.loads(meta.read_text(encoding="utf-8")) if meta.exists() else {}
+        it["source"] = info.get("source", "")
+        it["prompt_key"] = info.get("prompt_key")
+        if not patch or sha in evaluated:
+            it["step"] = "generated"
+            it["verdict"] = "no-patch" if not patch else evaluated[sha]
+            return
+        it["patch_sha"] = sha
+        it["patch_file"] = self.ckpt.write(f"iter{it['n']}.patch", patch)
+        it["step"] = "generated"
+
+    @ci_trace.traced("apply")
+    def apply(self, it: Dict) -> None:
+        self.wait_stopped()
+        r = _git("apply", "--whitespace=nowarn", str(self.ckpt.file(it["patch_file"])))
+        it["apply"] = "ok" if r.returncode == 0 else (r.stderr.strip() or "git apply failed")
+        if it["apply"] != "ok":
+            it["verdict"] = "not-applied"
+            print(fix_memory.settle(False))
+        it["step"] = "applied"
+
+    # -- driver -----------------------------------------------------------
+
+    def replay_applied(self) -> int:
+        """Re-apply patches already applied by a previous run (skipped when already in the tree)."""
+        n = 0
+        for it in self.ckpt.iterations:
+            if it.get("apply") != "ok":
+                continue
+            path = str(self.ckpt.file(it["patch_file"]))
+            if _git("apply", "--reverse", "--check", path).returncode == 0:
+                continue
+            r = _git("apply", "--whitespace=nowarn", path)
+            if r.returncode != 0:
+                raise SystemExit(f"Cannot re-apply checkpointed patch of iteration {it['n']}: {r.stderr.strip()}")
+            n += 1
+        return n
+
+    def step(self) -> bool:
+        """Run the next missing step; False once the loop is finished."""
+        its = self.ckpt.iterations
+        last = its[-1] if its else None
+        if last is None:
+            its.append({"n": 0, "step": "new"})
+            self.compile(its[-1])
+        elif last["step"] == "generated" and last.get("patch_file"):
+            self.apply(last)
+        elif last["step"] == "applied" and last["apply"] == "ok":
+            self.compile(last)
+        elif last["step"] == "failed":
+            if self.failed:
+                self.ckpt.state["status"] = "error"
+                return False
+            self.generate(last, self.ckpt.file(its[last["from_log"]]["triage_file"]))
+        elif last.get("verdict") == "green":
+            self.ckpt.state["status"] = "green"
+            return False
+        elif last.get("verdict") == "no-patch":
+            self.ckpt.state["status"] = "no-patch"
+            return False
+        elif len(its) > self.max_iters:
+            self.ckpt.state["status"] = "exhausted"
+            return False
+        else:
+            # red, not applied or an already-evaluated patch: fix from the latest compile log
+            log = next(it for it in reversed(its) if it.get("triage_file"))
+            its.append({"n": len(its), "step": "new", "from_log": log["n"]})
+            self.generate(its[-1], self.ckpt.file(log["triage_file"]))
+        return True
+
+    def run(self) -> str:
+        while self.step():
+            self.ckpt.save()
+            it = self.ckpt.iterations[-1]
+            print(f"[iter {it['n']}] {it['step']}" + (f" -> {it['verdict']}" if it.get("verdict") else ""))
+        self.wait_stopped()
+        self.ckpt.save()
+        return self.ckpt.state["status"]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Checkpointed Unity compile / AI fix loop")
+    ap.add_argument("--compile-cmd", default=COMPILE_CMD, help="Compile command; {log} is replaced by the log path")
+    ap.add_argument("--max-iters", type=int, default=MAX_ITERS)
+    ap.add_argument("--title", default="Unity CI failure")
+    ap.add_argument("--checkpoint-zip", type=Path, help="Mirror the checkpoint into this zip after every step")
+    ap.add_argument("--status", action="store_true", help="Print the checkpoint and exit")
+    ap.add_argument("--no-abort", action="store_true", help="Let Unity run to the end even after fatal compile errors")
+    ap.add_argument("autofix_args", nargs="*", help="Extra claude_autofix.py arguments (after --)")
+    args = ap.parse_args()
+    ci_trace.install("fix_loop")
+
+    base = _git("rev-parse", "HEAD").stdout.strip()
+    ckpt = Checkpoint(STATE_DIR, args.checkpoint_zip)
+    resumed = ckpt.load(base)
+    if args.status:
+        print(json.dumps(ckpt.state, indent=1))
+        return
+    if not args.compile_cmd:
+        sys.exit("Missing --compile-cmd / UNITY_COMPILE_CMD")
+    ckpt.state["runs"] += 1
+    ckpt.state["status"] = "running"
+    loop = FixLoop(ckpt, args.compile_cmd, args.max_iters, args.title, args.autofix_args,
+                   abort_early=not args.no_abort)
+    if resumed:
+        n = loop.replay_applied()
+        print(f"Resuming {base[:10]} at iteration {len(ckpt.iterations) - 1} "
+              f"(run {ckpt.state['runs']}, {n} checkpointed patch(es) re-applied)")
+    status = loop.run()
+    saved = sum(1 for it in ckpt.iterations if it.get("compile_s") is not None)
+    print(f"Fix loop {status} after {len(ckpt.iterations)} iteration(s), {saved} compile(s) on record")
+    out = os.environ.get("GITHUB_OUTPUT")
+    if out:
+        with open(out, "a", encoding="utf-8") as f:
+            f.write(f"status={status}\niterations={len(ckpt.iterations)}\n")
+    sys.exit(0 if status == "green" else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""Memory of past Unity failures and the patches that turned them green.
+
+Each diagnostic from unity_log is reduced to a signature: sha1 of kind, code,
+file and message with line numbers and literals normalised away. A looser
+signature drops the file and quoted identifiers, so the same kind of error
+elsewhere still finds related fixes. Both are stored in an SQLite database
+(FIX_MEMORY, default .ci_cache/fix_memory.sqlite) next to the patch.
+
+Flow in the fix loop:
+
+    claude_autofix.py ...          # looks up the memory before any API call;
+                                   # writes .ci_cache/fix_pending.json with
+                                   # the signatures and the patch it emitted
+    fix_memory.py confirm          # build green: patch stored / success counted
+    fix_memory.py reject           # still red: a replayed patch is demoted
+    fix_memory.py confirm --pending autofix-batch/<id>.pending.json   # batch job
+
+    fix_memory.py record --log-file Editor.log --patch fix.patch   # manual
+    fix_memory.py lookup --log-file Editor.log
+    fix_memory.py stats
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import unity_log
+
+DB_FILE = Path(os.environ.get("FIX_MEMORY", ".ci_cache/fix_memory.sqlite"))
+PENDING_FILE = Path(os.environ.get("FIX_PENDING", ".ci_cache/fix_pending.json"))
+# Kinds that identify a failure; "build" lines are cascades of them.
+SIGNATURE_KINDS = ("compile", "exception", "test")
+
+MSG_PREFIX_RE = re.compile(r"^.*?\b(?:error|warning) CS\d{4}:\s*")
+NUMBER_RE = re.compile(r"\b\d+\b")
+QUOTED_RE = re.compile(r"'[^']*'|\"[^\"]*\"")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fixes (
+    id INTEGER PRIMARY KEY,
+    patch_sha TEXT UNIQUE NOT NULL,
+    patch TEXT NOT NULL,
+    title TEXT NOT NULL DEFAULT '',
+    created REAL NOT NULL,
+    last_used REAL NOT NULL,
+    successes INTEGER NOT NULL DEFAULT 0,
+    failures INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS signatures (
+    fix_id INTEGER NOT NULL REFERENCES fixes(id) ON DELETE CASCADE,
+    sig TEXT NOT NULL,
+    loose TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    code TEXT NOT NULL,
+    file TEXT NOT NULL,
+    message TEXT NOT NULL,
+    PRIMARY KEY (fix_id, sig)
+);
+CREATE INDEX IF NOT EXISTS signatures_sig ON signatures(sig);
+CREATE INDEX IF NOT EXISTS signatures_loose ON signatures(loose);
+"""
+
+
+@dataclass
+class Signature:
+    sig: str
+    loose: str
+    kind: str
+    code: str
+    file: str
+    message: str
+
+    def to_json(self) -> Dict:
+        return self.__dict__.copy()
+
+
+@dataclass
+class Fix:
+    id: int
+    patch: str
+    title: str
+    matched: int
+    successes: int
+    failures: int
+
+
+def _message(d: unity_log.Diagnostic) -> str:
+    msg = MSG_PREFIX_RE.sub("", d.text) if d.kind == "compile" else d.text
+    return NUMBER_RE.sub("N", msg).strip()
+
+
+def signature(d: unity_log.Diagnostic) -> Signature:
+    msg = _message(d)
+    sig = hashlib.sha1("\0".join((d.kind, d.code, d.file, msg)).encode()).hexdigest()
+    loose = hashlib.sha1("\0".join((d.kind, d.code, QUOTED_RE.sub("'_'", msg))).encode()).hexdigest()
+    return Signature(sig, loose, d.kind, d.code, d.file, msg)
+
+
+def signatures(diags: Iterable[unity_log.Diagnostic]) -> List[Signature]:
+    """Signatures of the failing diagnostics, in rank order (the first one is the primary error)."""
+    diags = [d for d in diags if d.kind != "warning"]
+    keep = [d for d in diags if d.kind in SIGNATURE_KINDS] or diags
+    out: Dict[str, Signature] = {}
+    for d in keep:
+        s = signature(d)
+        out.setdefault(s.sig, s)
+    return list(out.values())
+
+
+class FixMemory:
+    def __init__(self, path: Path = DB_FILE):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=30)
+        self.db.execute("PRAGMA foreign_keys = ON")
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.db.close()
+
+    def record(self, sigs: List[Signature], patch: str, title: str = "") -> int:
+        """Store a patch that fixed sigs (or count one more success); returns its id."""
+        now = time.time()
+        sha = hashlib.sha1(patch.encode()).hexdigest()
+        with self.db:
+            self.db.execute(
+                "INSERT INTO fixes (patch_sha, patch, title, created, last_used, successes) VALUES (?, ?, ?, ?, ?, 1) "
+                "ON CONFLICT(patch_sha) DO UPDATE SET successes = successes + 1, last_used = excluded.last_used",
+                (sha, patch, title, now, now))
+            fix_id = self.db.execute("SELECT id FROM fixes WHERE patch_sha = ?", (sha,)).fetchone()[0]
+            self.db.executemany(
+                "INSERT OR IGNORE INTO signatures (fix_id, sig, loose, kind, code, file, message) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(fix_id, s.sig, s.loose, s.kind, s.code, s.file, s.message) for s in sigs])
+        return fix_id
+
+    def demote(self, fix_id: int) -> None:
+        with self.db:
+            self.db.execute("UPDATE fixes SET failures = failures + 1 WHERE id = ?", (fix_id,))
+
+    def _query(self, column: str, keys: List[str], limit: int, exclude: Iterable[int] = ()) -> List[Fix]:
+        if not keys:
+            return []
+        excluded = list(exclude)
+        rows = self.db.execute(
+            f"SELECT f.id, f.patch, f.title, COUNT(DISTINCT s.{column}), f.successes, f.failures "
+            f"FROM signatures s JOIN fixes f ON f.id = s.fix_id "
+            f"WHERE s.{column} IN ({','.join('?' * len(keys))}) AND f.id NOT IN ({','.join('?' * len(excluded))}) "
+            f"GROUP BY f.id ORDER BY COUNT(DISTINCT s.{column}) DESC, f.successes - f.failures DESC, f.last_used DESC "
+            f"LIMIT ?", (*keys, *excluded, limit))
+        return [Fix(*r) for r in rows]
+
+    def exact(self, sigs: List[Signature], limit: int = 3) -> List[Fix]:
+        """Fixes recorded for the primary error, best first; patches that failed more than they worked are skipped."""
+        if not sigs:
+            return []
+        fixes = self._query("sig", [s.sig for s in sigs], limit * 4)
+        primary = {r[0] for r in self.db.execute("SELECT fix_id FROM signatures WHERE sig = ?", (sigs[0].sig,))}
+        return [f for f in fixes if f.id in primary and f.successes > f.failures][:limit]
+
+    def similar(self, sigs: List[Signature], limit: int = 2, exclude: Iterable[int] = ()) -> List[Fix]:
+        """Fixes of errors with the same code and message shape, possibly in other files."""
+        return self._query("loose", sorted({s.loose for s in sigs}), limit, exclude)
+
+    def touch(self, fix_id: int) -> None:
+        with self.db:
+            self.db.execute("UPDATE fixes SET last_used = ? WHERE id = ?", (time.time(), fix_id))
+
+    def stats(self) -> Dict[str, int]:
+        fixes, ok, ko = self.db.execute("SELECT COUNT(*), COALESCE(SUM(successes), 0), COALESCE(SUM(failures), 0) FROM fixes").fetchone()
+        sigs = self.db.execute("SELECT COUNT(DISTINCT sig) FROM signatures").fetchone()[0]
+        return {"fixes": fixes, "signatures": sigs, "successes": ok, "failures": ko}
+
+
+def prompt_section(fixes: List[Fix], budget_chars: int = 4000) -> str:
+    """Past fixes rendered for the prompt, within a character budget."""
+    out: List[str] = []
+    used = 0
+    for f in fixes:
+        block = f"# Past fix #{f.id} ({f.title or 'untitled'}, worked {f.successes}x):\n{f.patch.strip()}"
+        if used + len(block) > budget_chars:
+            break
+        out.append(block)
+        used += len(block)
+    return "\n\n".join(out)
+
+
+def write_pending(sigs: List[Signature], patch: str, title: str, fix_id: Optional[int] = None,
+                  path: Path = PENDING_FILE) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"signatures": [s.to_json() for s in sigs], "patch": patch, "title": title,
+                               "fix_id": fix_id}), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _take_pending(path: Path = PENDING_FILE) -> Optional[Dict]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    path.unlink()
+    return data
+
+
+def settle(green: bool, mem: Optional[FixMemory] = None, path: Path = PENDING_FILE) -> str:
+    """Resolve the pending patch once its build verdict is known; returns what was done."""
+    pending = _take_pending(path)
+    if not pending or not pending["patch"]:
+        return "No pending patch"
+    own = mem is None
+    mem = mem or FixMemory()
+    try:
+        sigs = [Signature(**s) for s in pending["signatures"]]
+        if green:
+            return f"Remembered fix #{mem.record(sigs, pending['patch'], pending['title'])} for {len(sigs)} signature(s)"
+        if pending.get("fix_id"):
+            mem.demote(pending["fix_id"])
+            return f"Demoted replayed fix #{pending['fix_id']}"
+        return "Dropped pending patch"
+    finally:
+        if own:
+            mem.close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Memory of Unity failures and the patches that fixed them")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    for name, text in (("confirm", "The pending patch turned the build green: remember it"),
+                       ("reject", "The pending patch did not fix the build")):
+        sub.add_parser(name, help=text).add_argument(
+            "--pending", type=Path, default=PENDING_FILE, help="Pending file (claude_autofix --batch writes one per job)")
+    rec = sub.add_parser("record", help="Store a patch that fixed the failures of a log")
+    rec.add_argument("--log-file", required=True)
+    rec.add_argument("--patch", required=True)
+    rec.add_argument("--title", default="")
+    look = sub.add_parser("lookup", help="Known fixes for the failures of a log")
+    look.add_argument("--log-file", required=True)
+    sub.add_parser("stats")
+    args = ap.parse_args()
+
+    mem = FixMemory()
+    try:
+        if args.cmd in ("confirm", "reject"):
+            print(settle(args.cmd == "confirm", mem, args.pending))
+        elif args.cmd == "record":
+            sigs = signatures(unity_log.triage_file(args.log_file).ranked())
+            if not sigs:
+                sys.exit(f"No failure in {args.log_file}")
+            patch = Path(args.patch).read_text(encoding="utf-8")
+            print(f"Remembered fix #{mem.record(sigs, patch, args.title)} for {len(sigs)} signature(s)")
+        elif args.cmd == "lookup":
+            sigs = signatures(unity_log.triage_file(args.log_file).ranked())
+            exact = mem.exact(sigs)
+            for f in exact:
+                print(f"exact   #{f.id}: {f.matched}/{len(sigs)} signature(s), {f.successes} ok / {f.failures} ko, {f.title}")
+            for f in mem.similar(sigs, exclude=[f.id for f in exact]):
+                print(f"similar #{f.id}: {f.matched} signature(s), {f.successes} ok / {f.failures} ko, {f.title}")
+        else:
+            print(json.dumps(mem.stats()))
+    finally:
+        mem.close()
+
+
+if __name__ == "__main__":
+    main()
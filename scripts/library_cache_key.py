@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""Cache keys for Unity's Library/ import cache (actions/cache).
+
+The key is tiered so a miss still restores the closest Library/:
+
+    library-<platform>-<unity version>-<packages>-<assets>   exact
+    library-<platform>-<unity version>-<packages>-           same packages
+    library-<platform>-<unity version>-                      same editor
+
+<packages> hashes Packages/manifest.json and packages-lock.json, <assets>
+is a Merkle hash of the Assets/ tree (Unity ignores hidden and `~` entries,
+so do we). File hashes are cached in .ci_cache/library_hashes.json
+(LIBRARY_HASHES) with the mtime+size shortcut: only new or touched files are
+re-read, in a thread pool. The shortcut only pays off on a persistent runner
+or a local checkout: a fresh CI checkout gives every file a new mtime, so the
+cache never hits there and all of Assets/ is re-hashed (about 60 ms for this
+repo's 12 MB, against 13 ms warm).
+
+    library_cache_key.py [key] [--github-output] [--platform StandaloneLinux64]
+    library_cache_key.py report [--github-output]
+
+`key` runs before the restore and writes its plan to .ci_cache/library_plan.json
+(LIBRARY_CURRENT_PLAN). `report` runs after it: it compares that plan with the
+one the restored Library/ was saved with (Library/ci_cache_plan.json,
+LIBRARY_PLAN), prints the subtrees (two levels below Assets/) that Unity will
+re-import, then copies the current plan into Library/ so the cache saved at
+the end of the job carries it. Step order in the workflow:
+
+    - id: libkey
+      run: python3 scripts/library_cache_key.py --github-output
+    - uses: actions/cache@v4
+      with:
+        path: Library
+        key: ${{ steps.libkey.outputs.key }}
+        restore-keys: ${{ steps.libkey.outputs.restore-keys }}
+    - run: python3 scripts/library_cache_key.py report --github-output
+    - ... Unity import / build ...
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+HASH_FILE = Path(os.environ.get("LIBRARY_HASHES", ".ci_cache/library_hashes.json"))
+# Written by `key`, before the restore: Library/ does not exist yet, or is overwritten by it.
+CURRENT_FILE = Path(os.environ.get("LIBRARY_CURRENT_PLAN", ".ci_cache/library_plan.json"))
+# Lives inside Library/ so it is saved and restored with it: the report then
+# compares against what the restored Library/ was actually imported from.
+PLAN_FILE = Path(os.environ.get("LIBRARY_PLAN", "Library/ci_cache_plan.json"))
+PLATFORM = os.environ.get("UNITY_PLATFORM", "StandaloneLinux64")
+PACKAGE_FILES = ("Packages/manifest.json", "Packages/packages-lock.json")
+VERSION_FILE = "ProjectSettings/ProjectVersion.txt"
+ASSETS_DIR = "Assets"
+SUBTREE_DEPTH = 2
+WORKERS = min(16, (os.cpu_count() or 1) * 2)
+CHUNK = 1 << 20
+KEY_LEN = 16
+
+
+def _sha1(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def walk(root: Path, base: str) -> List[Tuple[str, int, int]]:
+    """(rel, mtime_ns, size) for every file Unity imports under base."""
+    out = []
+    stack = [root / base]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for e in it:
+                if e.name.startswith(".") or e.name.endswith("~"):
+                    continue
+                if e.is_dir(follow_symlinks=False):
+                    stack.append(e.path)
+                elif e.is_file():
+                    st = e.stat()
+                    out.append((Path(e.path).relative_to(root).as_posix(), st.st_mtime_ns, st.st_size))
+    return sorted(out)
+
+
+def hash_files(root: Path, files: List[Tuple[str, int, int]], cache: Dict[str, list]) -> Tuple[Dict[str, str], int]:
+    """rel -> sha1, reusing cache entries whose mtime and size match; returns (hashes, files re-read)."""
+    stale = [(rel, m, s) for rel, m, s in files if cache.get(rel, [None, None])[:2] != [m, s]]
+    if stale:
+        with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+            for (rel, m, s), digest in zip(stale, pool.map(lambda f: _sha1(str(root / f[0])), stale)):
+                cache[rel] = [m, s, digest]
+    return {rel: cache[rel][2] for rel, _, _ in files}, len(stale)
+
+
+def subtree(rel: str) -> str:
+    """Assets/Scripts/Core/Foo.cs -> Assets/Scripts/Core; shallower files -> their directory."""
+    parts = rel.split("/")
+    return "/".join(parts[:SUBTREE_DEPTH + 1] if len(parts) > SUBTREE_DEPTH + 1 else parts[:-1])
+
+
+def merkle(hashes: Dict[str, str]) -> Tuple[str, Dict[str, str]]:
+    """(tree hash, subtree -> hash); paths are part of the hash, so renames count."""
+    groups: Dict = {}
+    for rel in sorted(hashes):
+        groups.setdefault(subtree(rel), hashlib.sha1()).update(f"{rel}\0{hashes[rel]}\n".encode())
+    subs = {k: h.hexdigest() for k, h in groups.items()}
+    top = hashlib.sha1("".join(f"{k}\0{v}\n" for k, v in sorted(subs.items())).encode())
+    return top.hexdigest(), subs
+
+
+def _unity_version(root: Path) -> str:
+    try:
+        for line in (root / VERSION_FILE).read_text(encoding="utf-8").splitlines():
+            if line.startswith("m_EditorVersion:"):
+                return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return "unknown"
+
+
+def _write_json(path: Path, data) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def plan(root: Path = Path("."), platform: str = PLATFORM, hash_file: Path = HASH_FILE,
+         current_file: Path = CURRENT_FILE) -> Dict:
+    t0 = time.perf_counter()
+    try:
+        cache = json.loads(hash_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        cache = {}
+    files = walk(root, ASSETS_DIR)
+    extra = [(rel, int(st.st_mtime_ns), st.st_size) for rel in PACKAGE_FILES if (st := _stat(root / rel))]
+    hashes, reread = hash_files(root, files + extra, cache)
+    packages = hashlib.sha1("".join(f"{rel}\0{hashes[rel]}\n" for rel, _, _ in extra).encode()).hexdigest()
+    assets, subs = merkle({rel: hashes[rel] for rel, _, _ in files})
+    version = _unity_version(root)
+
+    prefix = f"library-{platform}-{version}-"
+    result = {
+        "key": f"{prefix}{packages[:KEY_LEN]}-{assets[:KEY_LEN]}",
+        "restore_keys": [f"{prefix}{packages[:KEY_LEN]}-", prefix],
+        "unity_version": version,
+        "packages": packages,
+        "assets": assets,
+        "subtrees": subs,
+        "files": len(files),
+        "rehashed": reread,
+    }
+    live = {rel for rel, _, _ in files + extra}
+    _write_json(hash_file, {k: v for k, v in cache.items() if k in live})
+    _write_json(current_file, result)
+    result["seconds"] = round(time.perf_counter() - t0, 3)
+    return result
+
+
+def _stat(p: Path):
+    try:
+        return p.stat()
+    except FileNotFoundError:
+        return None
+
+
+def report(current_file: Path = CURRENT_FILE, plan_file: Path = PLAN_FILE) -> List[str]:
+    """After the restore: what the restored Library/ lacks; then stamps Library/ with the current plan."""
+    try:
+        cur = json.loads(current_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        raise SystemExit(f"{current_file}: no plan, run `library_cache_key.py key` before the restore")
+    try:
+        prev = json.loads(plan_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        prev = None
+    out = invalidated(prev, cur)
+    _write_json(plan_file, cur)
+    return out
+
+
+def invalidated(prev, cur: Dict) -> List[str]:
+    """What changed since the previous plan, coarsest first."""
+    if not prev:
+        return ["(no restored Library/ plan)"]
+    if prev["unity_version"] != cur["unity_version"]:
+        return [f"Unity {prev['unity_version']} -> {cur['unity_version']}"]
+    out = ["Packages/"] if prev["packages"] != cur["packages"] else []
+    old, new = prev.get("subtrees", {}), cur["subtrees"]
+    out += sorted(k for k in old.keys() | new.keys() if old.get(k) != new.get(k))
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Tiered actions/cache keys for Unity's Library/")
+    ap.add_argument("command", nargs="?", choices=("key", "report"), default="key",
+                    help="key: before the restore (default); report: after it")
+    ap.add_argument("--root", default=".")
+    ap.add_argument("--platform", default=PLATFORM)
+    ap.add_argument("--github-output", action="store_true", help="Write key / restore-keys (or invalidated) to GITHUB_OUTPUT")
+    args = ap.parse_args()
+    out = os.environ.get("GITHUB_OUTPUT") if args.github_output else None
+
+    if args.command == "report":
+        inv = report()
+        if inv:
+            shown = inv[:20]
+            more = len(inv) - len(shown)
+            print("invalidated by: " + ", ".join(shown) + (f" (+{more})" if more > 0 else ""))
+        else:
+            print("invalidated by: nothing (exact Library/ restored)")
+        if out:
+            with open(out, "a", encoding="utf-8") as f:
+                f.write(f"invalidated={json.dumps(inv)}\n")
+        return
+
+    p = plan(Path(args.root), args.platform)
+    print(f"key: {p['key']}")
+    for k in p["restore_keys"]:
+        print(f"restore: {k}")
+    print(f"{p['files']} asset file(s), {p['rehashed']} re-hashed, {p['seconds']:.3f} s")
+    if out:
+        with open(out, "a", encoding="utf-8") as f:
+            f.write(f"key={p['key']}\n")
+            f.write("restore-keys<<EOF\n" + "\n".join(p["restore_keys"]) + "\nEOF\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""Content-addressed on-disk cache for LLM responses.
+
+Entries are keyed by sha256(model, params, system prompt, normalized prompt)
+and stored one file per key under LLM_CACHE_DIR (default .ci_cache/llm), a
+directory meant to be restored/saved with actions/cache. Writes are atomic
+(tmp file + os.replace) so concurrent runners sharing the directory never see
+a torn entry; eviction (age first, then least-recently-used until under the
+size cap) runs under an exclusive lock and is skipped if another process
+already holds it.
+"""
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+CACHE_DIR = Path(os.environ.get("LLM_CACHE_DIR", ".ci_cache/llm"))
+MAX_BYTES = int(float(os.environ.get("LLM_CACHE_MAX_MB", "64")) * 1024 * 1024)
+MAX_AGE_S = float(os.environ.get("LLM_CACHE_MAX_AGE_DAYS", "14")) * 86400
+BYPASS = os.environ.get("LLM_CACHE_BYPASS", "").strip().lower() in ("1", "true", "yes")
+
+# Run-specific noise that must not change the key of an otherwise identical prompt.
+NOISE = [
+    (re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?"), "<ts>"),
+    (re.compile(r"\b\d{2}:\d{2}:\d{2}(?:\.\d+)?\b"), "<time>"),
+    (re.compile(r"\b0x[0-9a-fA-F]+\b"), "<addr>"),
+    (re.compile(r"\b\d+(?:\.\d+)?\s?(?:ms|s|sec|seconds)\b"), "<dur>"),
+    (re.compile(r"(?:/github/workspace|/home/runner/work/[^/\s]+/[^/\s]+)/"), ""),
+    (re.compile(r"\(last \d+ of \d+ lines\)"), "(tail)"),
+    (re.compile(r"[ \t]+"), " "),
+    (re.compile(r"\n\s*\n+"), "\n"),
+]
+
+
+def normalize(prompt: str) -> str:
+    for rx, repl in NOISE:
+        prompt = rx.sub(repl, prompt)
+    return prompt.strip()
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        root: Optional[Path] = None,
+        max_bytes: int = MAX_BYTES,
+        max_age: float = MAX_AGE_S,
+        bypass: bool = BYPASS,
+    ):
+        self.root = Path(root or CACHE_DIR)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.bypass = bypass
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0, "evicted": 0}
+
+    def key(self, model: str, system: str, prompt: str, **params) -> str:
+        h = hashlib.sha256()
+        for part in (model, json.dumps(params, sort_keys=True), system, normalize(prompt)):
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        if self.bypass:
+            return None
+        p = self._path(key)
+        try:
+            entry = json.loads(p.read_text(encoding="utf-8"))
+            if time.time() - entry.get("created", 0) > self.max_age:
+                raise FileNotFoundError
+            os.utime(p)  # mtime doubles as the LRU clock
+        except (OSError, ValueError):
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return entry.get("response")
+
+    def put(self, key: str, response: str, **meta) -> None:
+        if self.bypass or not response:
+            return
+        p = self._path(key)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        entry = dict(meta, created=time.time(), response=response)
+        fd, tmp = tempfile.mkstemp(dir=p.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp, p)
+        except OSError:
+            Path(tmp).unlink(missing_ok=True)
+            return
+        self.stats["stores"] += 1
+        self.evict()
+
+    def cached(self, model: str, system: str, prompt: str, fn: Callable[[], str], **params) -> str:
+        """Return the cached response for this request, or call fn() and store its result."""
+        k = self.key(model, system, prompt, **params)
+        hit = self.get(k)
+        if hit is not None:
+            return hit
+        out = fn()
+        self.put(k, out, model=model)
+        return out
+
+    def evict(self) -> int:
+        if not self.root.exists():
+            return 0
+        with open(self.root / ".lock", "a") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return 0  # another runner is already evicting
+            entries = []
+            for p in self.root.glob("*/*.json"):
+                try:
+                    st = p.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, p))
+            now = time.time()
+            total = sum(e[1] for e in entries)
+            removed = 0
+            for mtime, size, p in sorted(entries):
+                if now - mtime <= self.max_age and total <= self.max_bytes:
+                    break
+                p.unlink(missing_ok=True)
+                total -= size
+                removed += 1
+        self.stats["evicted"] += removed
+        return removed
+
+    def summary(self) -> str:
+        s = self.stats
+        state = " (bypassed)" if self.bypass else ""
+        return f"LLM cache{state}: {s['hits']} hit(s), {s['misses']} miss(es), {s['stores']} stored, {s['evicted']} evicted"
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Inspect or prune the LLM response cache")
+    ap.add_argument("command", choices=["stats", "evict", "clear"])
+    args = ap.parse_args()
+
+    cache = ResponseCache()
+    if args.command == "clear":
+        cache.max_bytes = 0
+        cache.evict()
+    elif args.command == "evict":
+        cache.evict()
+    files = list(cache.root.glob("*/*.json")) if cache.root.exists() else []
+    size = sum(p.stat().st_size for p in files)
+    print(f"{cache.root}: {len(files)} entr(y/ies), {size / 1024:.1f} KiB, {cache.stats['evicted']} evicted")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
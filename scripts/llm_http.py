@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""Shared HTTP layer for the LLM scripts (Anthropic + OpenAI).
+
+- keep-alive connections pooled per host and shared by every client in the process
+- exponential backoff with full jitter on 408/409/429/5xx/529 and connection errors,
+  honouring Retry-After
+- SSE streaming: responses are consumed incrementally as events arrive
+- a per-call deadline covering all attempts and every streamed read (LLM_DEADLINE_S,
+  default 180 s); a stream that ends before its final event is retried
+- a pooled connection the server already closed is replaced without using up an attempt
+- an optional process-wide request rate limit (LLM_RPM requests per minute)
+- per-request latency, attempts and token usage recorded in CALLS, optionally
+  tagged per thread (tagged()) so a batch can account tokens per job
+
+Base URLs can be pointed at a local stub server with ANTHROPIC_BASE_URL /
+OPENAI_BASE_URL (plain http:// is accepted).
+"""
+import http.client
+import json
+import os
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import ci_trace
+
+ANTHROPIC_BASE_URL = os.environ.get("ANTHROPIC_BASE_URL", "https://api.anthropic.com")
+OPENAI_BASE_URL = os.environ.get("OPENAI_BASE_URL", "https://api.openai.com")
+ANTHROPIC_VERSION = "2023-06-01"
+
+DEADLINE_S = float(os.environ.get("LLM_DEADLINE_S", "180"))
+READ_TIMEOUT_S = float(os.environ.get("LLM_READ_TIMEOUT_S", "60"))
+MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "4"))
+BACKOFF_BASE_S = 1.0
+BACKOFF_MAX_S = 30.0
+RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+# what a keep-alive connection closed by the server raises on reuse
+STALE_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+CALLS: List[Dict] = []
+_calls_lock = threading.Lock()
+_local = threading.local()
+
+
+class LLMError(RuntimeError):
+    def __init__(self, message: str, status: int = 0, body: str = "", retryable: bool = False):
+        super().__init__(message)
+        self.status = status
+        self.body = body
+        self.retryable = retryable
+
+
+class Deadline:
+    """Per-call deadline, enforced between attempts and before every streamed read."""
+
+    def __init__(self, end: float, conn: Optional[http.client.HTTPConnection] = None):
+        self.end = end
+        self.conn = conn
+
+    def remaining(self) -> float:
+        return self.end - time.monotonic()
+
+    def check(self) -> None:
+        """Raise once the deadline has passed; otherwise cap the next socket read to what is left."""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise TimeoutError("deadline reached while reading the response")
+        if self.conn is not None and self.conn.sock is not None:
+            self.conn.sock.settimeout(min(remaining, READ_TIMEOUT_S))
+
+
+class ConnectionPool:
+    """Idle keep-alive connections, keyed by (scheme, host, port)."""
+
+    def __init__(self, max_idle: int = 8):
+        self.max_idle = max_idle
+        self._idle: Dict[Tuple[str, str, int], List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, scheme: str, host: str, port: int, timeout: float, fresh: bool = False) -> http.client.HTTPConnection:
+        """An idle connection to the host, or a new one (always new with fresh)."""
+        with self._lock:
+            idle = self._idle.get((scheme, host, port))
+            conn = idle.pop() if idle and not fresh else None
+        if conn is None:
+            cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            conn = cls(host, port, timeout=timeout)
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn
+
+    def release(self, scheme: str, host: str, port: int, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle.setdefault((scheme, host, port), [])
+            if len(idle) < self.max_idle:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def discard(self, scheme: str, host: str, port: int) -> None:
+        """Close the idle connections to one host (the server dropped one, the others are suspect too)."""
+        with self._lock:
+            idle = self._idle.pop((scheme, host, port), [])
+        for conn in idle:
+            conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            for idle in self._idle.values():
+                for conn in idle:
+                    conn.close()
+            self._idle.clear()
+
+
+POOL = ConnectionPool()
+
+
+class RateLimiter:
+    """Spaces request starts to at most `rpm` per minute across threads (0 = unlimited)."""
+
+    def __init__(self, rpm: float = 0.0):
+        self.rpm = rpm
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until the next slot; returns the time waited."""
+        if self.rpm <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + 60.0 / self.rpm
+        if start > now:
+            time.sleep(start - now)
+        return start - now
+
+
+LIMITER = RateLimiter(float(os.environ.get("LLM_RPM", "0")))
+
+
+def iter_sse(resp: http.client.HTTPResponse, deadline: Optional[Deadline] = None) -> Iterator[Tuple[str, str]]:
+    """Yield (event, data) pairs from a text/event-stream response, within the deadline if given."""
+    event, data = "", []
+    while True:
+        if deadline is not None:
+            # a stream trickling one line per read timeout must not outlive the call
+            deadline.check()
+        raw = resp.readline()
+        if not raw:
+            break
+        line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+        if not line:
+            if data:
+                yield event, "\n".join(data)
+            event, data = "", []
+        elif line.startswith(":"):
+            continue
+        elif line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data.append(line[5:].lstrip())
+    if data:
+        yield event, "\n".join(data)
+
+
+class LLMClient:
+    provider = ""
+
+    def __init__(
+        self,
+        base_url: str,
+        headers: Dict[str, str],
+        deadline: float = DEADLINE_S,
+        retries: int = MAX_RETRIES,
+        pool: ConnectionPool = POOL,
+        limiter: RateLimiter = LIMITER,
+    ):
+        u = urlsplit(base_url)
+        self.scheme = u.scheme or "https"
+        self.host = u.hostname or ""
+        self.port = u.port or (443 if self.scheme == "https" else 80)
+        self.prefix = u.path.rstrip("/")
+        self.headers = dict(headers, **{"content-type": "application/json"})
+        self.deadline = deadline
+        self.retries = retries
+        self.pool = pool
+        self.limiter = limiter
+
+    def _backoff(self, attempt: int, retry_after: Optional[str]) -> float:
+        if retry_after:
+            try:
+                return min(float(retry_after), BACKOFF_MAX_S)
+            except ValueError:
+                pass
+        return random.uniform(0, min(BACKOFF_MAX_S, BACKOFF_BASE_S * 2 ** attempt))
+
+    def post(self, path: str, payload: Dict, parse: Callable[[http.client.HTTPResponse, Deadline], Tuple[str, Dict]],
+             model: str = "") -> str:
+        """POST payload and hand the 2xx response to parse(); retries the whole exchange."""
+        body = json.dumps(payload).encode("utf-8")
+        start = time.monotonic()
+        end = start + self.deadline
+        attempt = 0
+        fresh = False
+        while True:
+            attempt += 1
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                self._record(model, start, attempt - 1, 0, {}, "deadline")
+                raise LLMError(f"{self.provider}: deadline of {self.deadline:.0f}s exceeded after {attempt - 1} attempt(s)")
+            self.limiter.acquire()
+            conn = self.pool.acquire(self.scheme, self.host, self.port, min(remaining, READ_TIMEOUT_S), fresh)
+            reused = conn.sock is not None
+            resp = None
+            retry_after = None
+            try:
+                conn.request("POST", self.prefix + path, body=body, headers=self.headers)
+                resp = conn.getresponse()
+                if 200 <= resp.status < 300:
+                    text, usage = parse(resp, Deadline(end, conn))
+                    resp.read()
+                    if resp.will_close:
+                        conn.close()
+                    else:
+                        self.pool.release(self.scheme, self.host, self.port, conn)
+                    self._record(model, start, attempt, resp.status, usage, "ok")
+                    return text
+                err = resp.read().decode("utf-8", errors="replace")
+                conn.close()
+                retry_after = resp.getheader("retry-after")
+                failure = LLMError(f"{self.provider}: HTTP {resp.status}: {err[:500]}", resp.status, err)
+                if resp.status not in RETRY_STATUS:
+                    self._record(model, start, attempt, resp.status, {}, "error")
+                    raise failure
+            except LLMError as e:
+                conn.close()
+                if not e.retryable:
+                    raise
+                failure = e
+            except (OSError, ValueError, http.client.HTTPException) as e:
+                # OSError covers socket timeouts; ValueError a truncated JSON/SSE body.
+                conn.close()
+                if reused and resp is None and not fresh and isinstance(e, STALE_ERRORS):
+                    # the server closed an idle keep-alive connection: not an attempt
+                    self.pool.discard(self.scheme, self.host, self.port)
+                    attempt -= 1
+                    fresh = True
+                    continue
+                failure = LLMError(f"{self.provider}: {type(e).__name__}: {e}")
+            if attempt > self.retries:
+                self._record(model, start, attempt, failure.status, {}, "error")
+                raise failure
+            delay = min(self._backoff(attempt, retry_after), max(0.0, end - time.monotonic()))
+            print(f"⚠️ {failure} -> retry {attempt}/{self.retries} in {delay:.1f}s", file=sys.stderr)
+            time.sleep(delay)
+
+    def _record(self, model: str, start: float, attempts: int, status: int, usage: Dict, outcome: str) -> None:
+        latency = time.monotonic() - start
+        ci_trace.complete(f"http {self.provider}", latency, model=model, attempts=attempts, status=status, outcome=outcome)
+        with _calls_lock:
+            CALLS.append({
+                "provider": self.provider,
+                "model": model,
+                "latency_s": round(latency, 3),
+                "attempts": attempts,
+                "status": status,
+                "outcome": outcome,
+                "input_tokens": int(usage.get("input_tokens") or 0),
+                "output_tokens": int(usage.get("output_tokens") or 0),
+                "tag": getattr(_local, "tag", ""),
+            })
+
+
+class AnthropicClient(LLMClient):
+    provider = "anthropic"
+
+    def __init__(self, api_key: Optional[str] = None, base_url: str = ANTHROPIC_BASE_URL, **kw):
+        key = api_key if api_key is not None else os.environ.get("ANTHROPIC_API_KEY", "")
+        super().__init__(base_url, {"x-api-key": key.strip(), "anthropic-version": ANTHROPIC_VERSION}, **kw)
+
+    def message(
+        self,
+        model: str,
+        user: str,
+        system: str = "",
+        max_tokens: int = 2000,
+        temperature: Optional[float] = None,
+        stream: bool = True,
+    ) -> str:
+        payload: Dict = {
+            "model": model,
+            "max_tokens": max_tokens,
+            "messages": [{"role": "user", "content": user}],
+            "stream": stream,
+        }
+        if system:
+            payload["system"] = system
+        if temperature is not None:
+            payload["temperature"] = temperature
+        return self.post("/v1/messages", payload, _anthropic_stream if stream else _anthropic_json, model).strip()
+
+
+def _anthropic_json(resp, deadline: Optional[Deadline] = None) -> Tuple[str, Dict]:
+    j = json.loads(resp.read().decode("utf-8", errors="replace"))
+    text = "".join(b.get("text", "") for b in j.get("content") or [] if b.get("type") == "text")
+    return text, j.get("usage") or {}
+
+
+def _anthropic_stream(resp, deadline: Optional[Deadline] = None) -> Tuple[str, Dict]:
+    parts: List[str] = []
+    usage: Dict = {}
+    for event, data in iter_sse(resp, deadline):
+        ev = json.loads(data)
+        kind = ev.get("type") or event
+        if kind == "content_block_delta":
+            parts.append((ev.get("delta") or {}).get("text", ""))
+        elif kind == "message_start":
+            usage.update((ev.get("message") or {}).get("usage") or {})
+        elif kind == "message_delta":
+            usage.update(ev.get("usage") or {})
+        elif kind == "error":
+            raise http.client.HTTPException(f"stream error: {ev.get('error')}")
+        elif kind == "message_stop":
+            return "".join(parts), usage
+    # the connection ended mid-answer: partial text is not a result
+    raise LLMError("anthropic: stream ended before message_stop", retryable=True)
+
+
+class OpenAIClient(LLMClient):
+    provider = "openai"
+
+    def __init__(self, api_key: Optional[str] = None, base_url: str = OPENAI_BASE_URL, **kw):
+        key = api_key if api_key is not None else os.environ.get("OPENAI_API_KEY", "")
+        super().__init__(base_url, {"authorization": f"Bearer {key.strip()}"}, **kw)
+
+    def respond(self, model: str, input: List[Dict], stream: bool = True) -> str:
+        payload = {"model": model, "input": input, "stream": stream}
+        return self.post("/v1/responses", payload, _openai_stream if stream else _openai_json, model).strip()
+
+
+def _openai_json(resp, deadline: Optional[Deadline] = None) -> Tuple[str, Dict]:
+    j = json.loads(resp.read().decode("utf-8", errors="replace"))
+    text = j.get("output_text") or "".join(
+        c.get("text", "")
+        for item in j.get("output") or []
+        for c in item.get("content") or []
+        if c.get("type") == "output_text"
+    )
+    return text, j.get("usage") or {}
+
+
+def _openai_stream(resp, deadline: Optional[Deadline] = None) -> Tuple[str, Dict]:
+    parts: List[str] = []
+    usage: Dict = {}
+    for event, data in iter_sse(resp, deadline):
+        if data == "[DONE]":
+            return "".join(parts), usage
+        ev = json.loads(data)
+        kind = ev.get("type") or event
+        if kind == "response.output_text.delta":
+            parts.append(ev.get("delta", ""))
+        elif kind in ("response.completed", "response.incomplete"):
+            usage = (ev.get("response") or {}).get("usage") or {}
+            return "".join(parts), usage
+        elif kind in ("error", "response.failed"):
+            raise http.client.HTTPException(f"stream error: {ev}")
+    raise LLMError("openai: stream ended before response.completed", retryable=True)
+
+
+@contextmanager
+def tagged(tag: str):
+    """Calls made by the current thread inside the block are recorded with this tag."""
+    prev = getattr(_local, "tag", "")
+    _local.tag = tag
+    try:
+        yield
+    finally:
+        _local.tag = prev
+
+
+def tokens(tag: Optional[str] = None) -> int:
+    """Input + output tokens reported so far (only the calls with this tag if given)."""
+    with _calls_lock:
+        return sum(c["input_tokens"] + c["output_tokens"] for c in CALLS if tag is None or c["tag"] == tag)
+
+
+def summary() -> str:
+    with _calls_lock:
+        calls = list(CALLS)
+    if not calls:
+        return "LLM calls: none"
+    lat = sum(c["latency_s"] for c in calls)
+    tin = sum(c["input_tokens"] for c in calls)
+    tout = sum(c["output_tokens"] for c in calls)
+    failed = sum(1 for c in calls if c["outcome"] != "ok")
+    return f"LLM calls: {len(calls)} ({failed} failed), {lat:.1f}s total latency, {tin} input / {tout} output tokens"
+
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""Follow a Unity Editor log while it is written and stop the run at the first fatal error.
+
+Unity prints `error CS....` within the first minute of a batchmode run, then
+keeps going (domain reload, package resolution, license return) for minutes
+before it exits. The follower polls the growing file, feeds complete lines
+into unity_log's single-pass triage and, once compiler errors were seen,
+waits for the burst to end ("Scripts have compiler errors." or SETTLE_S of
+quiet) so the whole batch of errors is captured. The run is then stopped
+(SIGTERM to its process group, or UNITY_STOP_CMD such as
+`docker stop -t 10 unity`) and reaped in the background: the caller can
+build its prompt while the Editor is still shutting down.
+
+Truncated or recreated files are read again from the start; a log that does
+not exist yet is waited for.
+
+    log_follow.py --log .ci_logs/unity.log [--excerpt-out triage.txt] -- ./ci/unity_compile.sh .ci_logs/unity.log
+"""
+import argparse
+import os
+import shlex
+import signal
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, Iterator, List, Optional
+
+import unity_log
+
+POLL_S = float(os.environ.get("LOG_FOLLOW_POLL_S", "0.2"))
+SETTLE_S = float(os.environ.get("LOG_FOLLOW_SETTLE_S", "3"))
+STOP_GRACE_S = float(os.environ.get("UNITY_STOP_GRACE_S", "30"))
+STOP_CMD = os.environ.get("UNITY_STOP_CMD", "")
+MAX_READ = 1 << 20  # per read: a large existing log is consumed in bounded steps
+
+
+class LogFollower:
+    """Incremental reader of a log file that is still growing."""
+
+    def __init__(self, path: str, poll: float = POLL_S):
+        self.path = path
+        self.poll = poll
+        self.offset = 0
+        self.inode = None
+        self.partial = b""
+        self.behind = False
+
+    def read(self, final: bool = False) -> List[str]:
+        """Complete lines appended since the last call, at most MAX_READ bytes of them.
+
+        `behind` tells whether more data was already waiting; with final, the
+        trailing partial line is returned too once the end is reached.
+        """
+        self.behind = False
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return []
+        if st.st_ino != self.inode or st.st_size < self.offset:
+            # new file or truncated in place: start over
+            self.inode, self.offset, self.partial = st.st_ino, 0, b""
+        out: List[str] = []
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read(MAX_READ)
+            self.offset += len(data)
+            self.behind = len(data) == MAX_READ
+            *done, self.partial = (self.partial + data).split(b"\n")
+            out += [self._decode(l) for l in done]
+        if final and not self.behind and self.partial:
+            out.append(self._decode(self.partial))
+            self.partial = b""
+        return out
+
+    @staticmethod
+    def _decode(raw: bytes) -> str:
+        return raw.decode("utf-8", errors="ignore").rstrip("\r")[:unity_log.MAX_LINE]
+
+    def lines(self, done: Callable[[], bool]) -> Iterator[str]:
+        """Yield lines as they are written until done() is true, then drain what is left."""
+        while True:
+            new = self.read()
+            yield from new
+            if self.behind:
+                continue
+            if done():
+                while True:
+                    yield from self.read(final=True)
+                    if not self.behind:
+                        return
+            if not new:
+                time.sleep(self.poll)
+
+
+class LiveTriage(unity_log.Triage):
+    """Triage that notes when compiler errors start and when their burst is over."""
+
+    def __init__(self, settle: float = SETTLE_S):
+        super().__init__()
+        self.settle = settle
+        self.first_fatal: Optional[float] = None
+        self.last_fatal = 0.0
+        self.burst_done = False
+
+    def add(self, d: unity_log.Diagnostic) -> None:
+        super().add(d)
+        if d.kind == "compile":
+            self.last_fatal = time.monotonic()
+            self.first_fatal = self.first_fatal or self.last_fatal
+        elif d.kind == "build" and self.first_fatal:
+            # "Scripts have compiler errors." closes the compilation that failed
+            self.burst_done = True
+
+    def fatal(self) -> bool:
+        return bool(self.first_fatal) and (self.burst_done or time.monotonic() - self.last_fatal >= self.settle)
+
+
+class Watch:
+    """Result of following one run; `reaper` finishes stopping the process in the background."""
+
+    def __init__(self, triage: LiveTriage, aborted: bool, fatal_after_s: Optional[float], proc: subprocess.Popen):
+        self.triage = triage
+        self.aborted = aborted
+        self.fatal_after_s = fatal_after_s
+        self.proc = proc
+        self.reaper: Optional[threading.Thread] = None
+
+    def wait(self) -> int:
+        """Block until the run has really exited; returns its exit code."""
+        if self.reaper is not None:
+            self.reaper.join()
+        return self.proc.wait()
+
+
+def start(cmd: List[str], log: Optional[str] = None) -> subprocess.Popen:
+    """Launch the run in its own process group (stopping it also stops what it started)."""
+    if log:
+        # a log left by an earlier run would be read as this run's errors
+        try:
+            os.unlink(log)
+        except FileNotFoundError:
+            pass
+    return subprocess.Popen(cmd, start_new_session=True)
+
+
+def stop(proc: subprocess.Popen, grace: float = STOP_GRACE_S, stop_cmd: str = STOP_CMD) -> threading.Thread:
+    """Ask the run to stop now and reap it from a thread (SIGKILL after the grace period)."""
+    def reap():
+        if stop_cmd:
+            subprocess.run(shlex.split(stop_cmd), capture_output=True)
+        else:
+            _signal(proc, signal.SIGTERM)
+        try:
+            proc.wait(timeout=grace)
+        except subprocess.TimeoutExpired:
+            _signal(proc, signal.SIGKILL)
+            proc.wait()
+
+    t = threading.Thread(target=reap, name="unity-stop", daemon=True)
+    t.start()
+    return t
+
+
+def _signal(proc: subprocess.Popen, sig: int) -> None:
+    try:
+        os.killpg(proc.pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def follow(proc: subprocess.Popen, log: str, abort: bool = True, settle: float = SETTLE_S, poll: float = POLL_S) -> Watch:
+    """Triage `log` while `proc` writes it; with abort, stop proc once the compile errors are complete."""
+    live = LiveTriage(settle)
+    t0 = time.monotonic()
+    live.feed(LogFollower(log, poll).lines(lambda: proc.poll() is not None or (abort and live.fatal())))
+    aborted = abort and proc.poll() is None and live.fatal()
+    watch = Watch(live, aborted, round(live.first_fatal - t0, 1) if live.first_fatal else None, proc)
+    if aborted:
+        watch.reaper = stop(proc)
+    return watch
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Run a Unity command, follow its log and stop it at the first fatal error")
+    ap.add_argument("--log", required=True, help="Log file the command writes")
+    ap.add_argument("--excerpt-out", help="Write the triaged excerpt here as soon as the errors are known")
+    ap.add_argument("--no-abort", action="store_true", help="Only follow, let the command run to the end")
+    ap.add_argument("--settle", type=float, default=SETTLE_S, help="Quiet seconds that end a burst of compiler errors")
+    ap.add_argument("cmd", nargs=argparse.REMAINDER, help="Command to run (after --)")
+    args = ap.parse_args()
+    cmd = args.cmd[1:] if args.cmd[:1] == ["--"] else args.cmd
+    if not cmd:
+        ap.error("missing command")
+
+    w = follow(start(cmd, args.log), args.log, abort=not args.no_abort, settle=args.settle)
+    if args.excerpt_out:
+        with open(args.excerpt_out, "w", encoding="utf-8") as f:
+            f.write(w.triage.excerpt())
+    if w.aborted:
+        print(f"Fatal compile errors after {w.fatal_after_s}s ({w.triage.counts()}), stopping the run", file=sys.stderr)
+    rc = w.wait()
+    sys.exit(1 if w.aborted else rc)
+
+
+if __name__ == "__main__":
+    main()
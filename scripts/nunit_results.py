@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""Unity test results (NUnit 3 XML): failures, duration history, shards and flaky tests.
+
+The results file is read with iterparse and every <test-case> is detached
+from its parent once handled, so memory stays flat whatever the suite size.
+Each run updates .ci_cache/test_history.json (TEST_HISTORY), per test mode
+(EditMode / PlayMode):
+
+    full test name -> [duration EWMA (s), last outcomes "PPFP...", last run, fixture]
+
+The history drives two things:
+
+- shards: fixtures (or tests) are spread over N runners with the longest
+  processing time first rule (always onto the lightest shard), so the wall
+  time follows the runner count; the lightest shard also runs whatever is
+  not in the history yet
+- flaky tests: at least FLAKY_FLIPS pass/fail changes in the last
+  FLAKY_WINDOW runs (a test that started failing and stays red is a
+  regression, not flaky)
+
+Failures are also turned into unity_log diagnostics (message + stack with
+source locations) so claude_autofix sees them like log failures.
+
+A sharded run is recorded once, from all of its results files, in a job
+that runs after the shards: a runner that recorded only its own shard
+would save a history missing every other shard, and the next plan would
+be built from whichever runner saved last. Workflow wiring:
+
+    plan     (history restored with actions/cache, restore-keys test-history-)
+             nunit_results.py shard --mode PlayMode --shards 4 --github-output
+    test     matrix: ${{ fromJSON(needs.plan.outputs.shards) }}
+             Unity -testFilter "${{ matrix.filter }}", upload results-<index>.xml
+    history  needs: test, if: always(); download every results-*.xml
+             nunit_results.py record --mode PlayMode results-*.xml
+             actions/cache save, key test-history-${{ github.run_id }}
+
+    nunit_results.py record results-editmode.xml --mode EditMode
+    nunit_results.py record results-playmode-*.xml --mode PlayMode   # all shards, one run
+    nunit_results.py shard --mode PlayMode --shards 4 [--index 2] [--github-output]
+    nunit_results.py flaky [--mode PlayMode]
+    nunit_results.py failures results-playmode.xml
+"""
+import argparse
+import heapq
+import json
+import os
+import re
+import sys
+import time
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import unity_log
+
+HISTORY_FILE = Path(os.environ.get("TEST_HISTORY", ".ci_cache/test_history.json"))
+ALPHA = 0.3
+FLAKY_WINDOW = 20
+FLAKY_FLIPS = 2
+STALE_RUNS = 30
+MAX_MESSAGE = 2000
+VERSION = 1
+OUTCOMES = {"Passed": "P", "Failed": "F"}
+FIXTURE_RE = re.compile(r"^(?P<fixture>[^(]*?)\.[^.(]+(?:\(.*\))?$")
+
+
+@dataclass
+class TestCase:
+    name: str
+    fixture: str
+    result: str
+    duration: float
+    message: str = ""
+    stack: str = ""
+
+    @property
+    def failed(self) -> bool:
+        return self.result == "Failed"
+
+
+def _text(elem: Optional[ET.Element], path: str) -> str:
+    node = elem.find(path) if elem is not None else None
+    return (node.text or "").strip()[:MAX_MESSAGE] if node is not None else ""
+
+
+def parse(path: str) -> Iterator[TestCase]:
+    """Test cases of a results file, streamed; handled elements are dropped right away.
+
+    A file cut short (the Editor was stopped mid-run) yields the cases written before the cut.
+    """
+    stack: List[ET.Element] = []
+    events = ET.iterparse(path, events=("start", "end"))
+    while True:
+        try:
+            event, elem = next(events)
+        except StopIteration:
+            return
+        except ET.ParseError as e:
+            print(f"{path}: truncated or invalid results ({e}), keeping what was read", file=sys.stderr)
+            return
+        if event == "start":
+            stack.append(elem)
+            continue
+        stack.pop()
+        if elem.tag != "test-case":
+            continue
+        name = elem.get("fullname") or elem.get("name") or ""
+        classname = elem.get("classname")
+        m = FIXTURE_RE.match(name)
+        failure = elem.find("failure")
+        yield TestCase(
+            name=name,
+            fixture=classname or (m.group("fixture") if m else name),
+            result=elem.get("result", ""),
+            duration=float(elem.get("duration") or 0),
+            message=_text(failure, "message"),
+            stack=_text(failure, "stack-trace"),
+        )
+        if stack:
+            stack[-1].remove(elem)
+        elem.clear()
+
+
+def diagnostics(path: str, history: Optional["History"] = None, mode: str = "") -> Iterator[unity_log.Diagnostic]:
+    """Failed tests as unity_log diagnostics (kind "test"), located at their first user stack frame."""
+    flaky = set(history.flaky(mode)) if history else set()
+    for n, t in enumerate(parse(path), 1):
+        if not t.failed:
+            continue
+        d = unity_log.Diagnostic(kind="test", text=f"Failed: {t.name}" + (" [known flaky]" if t.name in flaky else ""),
+                                 first_seen=10 ** 9 + n)
+        d.detail = ([t.message.splitlines()[0]] if t.message else []) + [l.strip() for l in t.stack.splitlines()[:unity_log.MAX_STACK]]
+        for line in t.stack.splitlines():
+            m = unity_log.STACK_AT_RE.search(line)
+            if m:
+                d.file, d.line = unity_log.normalize_path(m.group("file")), int(m.group("line"))
+                break
+        yield d
+
+
+class History:
+    def __init__(self, path: Path = HISTORY_FILE):
+        self.path = path
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            data = {}
+        self.modes: Dict[str, Dict] = data.get("modes", {}) if data.get("version") == VERSION else {}
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"version": VERSION, "modes": self.modes}, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def _mode(self, mode: str) -> Dict:
+        return self.modes.setdefault(mode, {"runs": 0, "tests": {}})
+
+    def record(self, mode: str, *paths: str) -> Dict:
+        """Fold the results files of one run (one per shard) into the history; returns counts, failures and the slowest tests."""
+        m = self._mode(mode)
+        m["runs"] += 1
+        run, tests = m["runs"], m["tests"]
+        counts: Dict[str, int] = {}
+        failures: List[TestCase] = []
+        slowest: List = []
+        for t in (t for path in paths for t in parse(path)):
+            counts[t.result] = counts.get(t.result, 0) + 1
+            if t.failed:
+                failures.append(TestCase(t.name, t.fixture, t.result, t.duration, t.message[:300]))
+            heapq.heappush(slowest, (t.duration, t.name))
+            if len(slowest) > 10:
+                heapq.heappop(slowest)
+            entry = tests.get(t.name)
+            outcome = OUTCOMES.get(t.result, "S")
+            if entry is None:
+                tests[t.name] = [t.duration, outcome, run, t.fixture]
+                continue
+            if outcome != "S":
+                # skipped tests take no time and say nothing about stability
+                entry[0] = round(ALPHA * t.duration + (1 - ALPHA) * entry[0], 4)
+                entry[1] = (entry[1] + outcome)[-FLAKY_WINDOW:]
+            entry[2], entry[3] = run, t.fixture
+        for name in [k for k, v in tests.items() if run - v[2] > STALE_RUNS]:
+            del tests[name]
+        return {"counts": counts, "failures": failures, "slowest": sorted(slowest, reverse=True)}
+
+    def durations(self, mode: str, unit: str = "fixture") -> Dict[str, float]:
+        """Expected seconds per test or per fixture."""
+        out: Dict[str, float] = {}
+        for name, (dur, _, _, fixture) in self._mode(mode)["tests"].items():
+            key = fixture if unit == "fixture" else name
+            out[key] = out.get(key, 0.0) + dur
+        return out
+
+    def flaky(self, mode: str = "") -> Dict[str, str]:
+        """name -> recent outcomes, for tests that flipped between pass and fail at least FLAKY_FLIPS times."""
+        out = {}
+        for m in ([mode] if mode else list(self.modes)):
+            for name, (_, outcomes, _, _) in self._mode(m)["tests"].items():
+                seq = outcomes.replace("S", "")
+                if sum(a != b for a, b in zip(seq, seq[1:])) >= FLAKY_FLIPS:
+                    out[name] = outcomes
+        return out
+
+
+def shard(durations: Dict[str, float], n: int) -> List[Dict]:
+    """Longest processing time first: each item goes to the currently lightest of n shards."""
+    heap = [(0.0, i) for i in range(n)]
+    shards: List[Dict] = [{"index": i, "expected_s": 0.0, "items": []} for i in range(n)]
+    for name, dur in sorted(durations.items(), key=lambda kv: (-kv[1], kv[0])):
+        load, i = heapq.heappop(heap)
+        shards[i]["items"].append(name)
+        shards[i]["expected_s"] = round(load + dur, 3)
+        heapq.heappush(heap, (load + dur, i))
+    return shards
+
+
+def _alternation(items: List[str], unit: str) -> str:
+    end = r"\." if unit == "fixture" else "$"
+    return "(?:" + "|".join(re.escape(i) for i in sorted(items)) + ")" + end
+
+
+def with_filters(shards: List[Dict], unit: str = "fixture") -> List[Dict]:
+    """Add each shard's Unity -testFilter (a regex on the full test name).
+
+    The lightest shard is a catch-all: it runs everything the other shards do
+    not list, so tests that are not in the history yet still run somewhere.
+    """
+    catch_all = min(shards, key=lambda s: (s["expected_s"], s["index"]))
+    others = [i for s in shards if s is not catch_all for i in s["items"]]
+    for s in shards:
+        if s is catch_all:
+            s["filter"] = f"^(?!{_alternation(others, unit)})" if others else ".*"
+        else:
+            s["filter"] = f"^{_alternation(s['items'], unit)}" if s["items"] else "^$"
+    return shards
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Unity NUnit results: history, shards, flaky tests")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    rec = sub.add_parser("record", help="Fold the results files of a run into the duration/outcome history")
+    rec.add_argument("results", nargs="+", help="Results of every shard of the run")
+    rec.add_argument("--mode", default="EditMode")
+    sh = sub.add_parser("shard", help="Balanced shards from the duration history")
+    sh.add_argument("--mode", default="EditMode")
+    sh.add_argument("--shards", type=int, required=True)
+    sh.add_argument("--index", type=int, help="Print only the -testFilter of this shard")
+    sh.add_argument("--unit", choices=("fixture", "test"), default="fixture",
+                    help="Split by fixture (keeps one-time setups together) or by test")
+    sh.add_argument("--github-output", action="store_true", help="Write the shard matrix to GITHUB_OUTPUT")
+    fl = sub.add_parser("flaky", help="Tests flipping between pass and fail")
+    fl.add_argument("--mode", default="")
+    fa = sub.add_parser("failures", help="Failed tests as triaged diagnostics (appendable to the Unity log)")
+    fa.add_argument("results")
+    fa.add_argument("--mode", default="")
+    args = ap.parse_args()
+    history = History()
+
+    if args.cmd == "record":
+        t0 = time.perf_counter()
+        r = history.record(args.mode, *args.results)
+        history.save()
+        flaky = history.flaky(args.mode)
+        print(f"{args.mode}: {r['counts']} in {time.perf_counter() - t0:.2f}s")
+        for t in r["failures"]:
+            print(f"  FAILED {t.name}" + (" (known flaky)" if t.name in flaky else "") + (f": {t.message}" if t.message else ""))
+        for dur, name in r["slowest"][:5]:
+            print(f"  slow {dur:8.2f}s {name}")
+    elif args.cmd == "shard":
+        shards = with_filters(shard(history.durations(args.mode, args.unit), args.shards), args.unit)
+        if args.index is not None:
+            print(shards[args.index]["filter"])
+        else:
+            for s in shards:
+                print(f"shard {s['index']}: {len(s['items'])} item(s), ~{s['expected_s']:.1f}s")
+        if args.github_output and os.environ.get("GITHUB_OUTPUT"):
+            matrix = [{k: s[k] for k in ("index", "filter", "expected_s")} for s in shards]
+            with open(os.environ["GITHUB_OUTPUT"], "a", encoding="utf-8") as f:
+                f.write(f"shards={json.dumps(matrix)}\n")
+    elif args.cmd == "flaky":
+        for name, outcomes in sorted(history.flaky(args.mode).items()):
+            print(f"{outcomes:>{FLAKY_WINDOW}}  {name}")
+    else:
+        for d in diagnostics(args.results, history, args.mode):
+            print(d.render())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""Targeted source context for the autofix prompt.
+
+Instead of fixed "tree hints", each ranked diagnostic is mapped to its source
+file and line (from the compiler location or an exception stack frame), and
+the prompt gets:
+
+  1. the line window around the error, widened to the whole enclosing method
+     when that method is short,
+  2. the declarations of the types/members those lines mention (from the
+     symbol index), with "did you mean" hints for names that do not exist,
+  3. the scenes/prefabs that use the failing component.
+
+Sections are packed in priority order under a token budget (AUTOFIX_CONTEXT_TOKENS,
+estimated as chars/4), so the prompt stays small however noisy the log is.
+"""
+import argparse
+import difflib
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import symbol_index
+import unity_log
+import unity_yaml
+
+DEFAULT_TOKENS = int(os.environ.get("AUTOFIX_CONTEXT_TOKENS") or 6000)
+WINDOW = 12
+# A method shorter than this is shown whole instead of as a window.
+MAX_METHOD_LINES = 60
+MAX_DEFINITION_LINES = 40
+MAX_DIAGNOSTICS = 8
+
+FRAME_RE = re.compile(r"(Assets/[^:()\[\]]+?\.cs):(\d+)")
+QUOTED_RE = re.compile(r"'([A-Za-z_][\w.]*)'")
+IDENT_RE = re.compile(r"\b[A-Z_][A-Za-z0-9_]*\b")
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+
+def locations(d: unity_log.Diagnostic) -> List[Tuple[str, int]]:
+    """Source locations for a diagnostic: its own, else the user frames of its stack."""
+    if d.file.endswith(".cs") and d.line:
+        return [(d.file, d.line)]
+    return [(m.group(1), int(m.group(2))) for m in map(FRAME_RE.search, d.detail) if m][:2]
+
+
+def _merge(spans: List[Tuple[int, int]], gap: int = 3) -> List[Tuple[int, int]]:
+    out: List[Tuple[int, int]] = []
+    for a, b in sorted(spans):
+        if out and a <= out[-1][1] + gap:
+            out[-1] = (out[-1][0], max(out[-1][1], b))
+        else:
+            out.append((a, b))
+    return out
+
+
+def render(rel: str, lines: List[str], a: int, b: int, marks: Set[int] = frozenset(), label: str = "") -> str:
+    body = "\n".join(f"{'>' if n in marks else ' '}{n:5d} | {lines[n - 1]}" for n in range(a, b + 1))
+    return f"// {rel}:{a}-{b}{'  ' + label if label else ''}\n{body}"
+
+
+class ContextBuilder:
+    def __init__(self, root: Path = Path("."), index: Optional[symbol_index.SymbolIndex] = None,
+                 unity_index: Optional[unity_yaml.UnityIndex] = None):
+        self.root = root
+        self.index = index or symbol_index.load(root)
+        self.unity_index = unity_index
+        self._lines: Dict[str, List[str]] = {}
+
+    def lines(self, rel: str) -> List[str]:
+        if rel not in self._lines:
+            try:
+                self._lines[rel] = (self.root / rel).read_text(encoding="utf-8", errors="replace").splitlines()
+            except OSError:
+                self._lines[rel] = []
+        return self._lines[rel]
+
+    def windows(self, diags: List[unity_log.Diagnostic]) -> Tuple[List[Tuple[str, int, int, str]], Set[str], Set[str]]:
+        """(file, start, end, rendered) error windows, identifiers they mention, and types containing errors."""
+        spans: Dict[str, List[Tuple[int, int]]] = {}
+        marks: Dict[str, Set[int]] = {}
+        owners: Set[str] = set()
+        for d in diags:
+            for rel, line in locations(d):
+                src = self.lines(rel)
+                if not src:
+                    continue
+                line = min(max(line, 1), len(src))
+                a, b = max(1, line - WINDOW), min(len(src), line + WINDOW)
+                sym = self.index.enclosing(rel, line)
+                if sym and sym.kind in ("method", "property") and sym.end - sym.line < MAX_METHOD_LINES:
+                    a, b = min(a, sym.line), max(b, sym.end)
+                if sym:
+                    owners.add(sym.name if sym.is_type else sym.parent)
+                spans.setdefault(rel, []).append((a, b))
+                marks.setdefault(rel, set()).add(line)
+        out: List[Tuple[str, int, int, str]] = []
+        idents: Set[str] = set()
+        for rel, ss in spans.items():
+            src = self.lines(rel)
+            for a, b in _merge(ss):
+                out.append((rel, a, b, render(rel, src, a, b, marks[rel])))
+                for n in range(a, b + 1):
+                    idents.update(IDENT_RE.findall(src[n - 1]))
+        return out, idents, owners - {""}
+
+    def definitions(self, names: Set[str], skip: Set[Tuple[str, int]], types_only: bool = False) -> List[str]:
+        """Declaration headers (whole body when short) for the named types and members."""
+        by_name = self.index.by_name()
+        out = []
+        for name in sorted(names):
+            for rel, sym in by_name.get(name, [])[:2]:
+                if (rel, sym.line) in skip or (types_only and not sym.is_type):
+                    continue
+                skip.add((rel, sym.line))
+                src = self.lines(rel)
+                if not src:
+                    continue
+                end = sym.end if sym.end - sym.line < MAX_DEFINITION_LINES else sym.line + 2
+                label = f"{sym.kind} {sym.parent + '.' if sym.parent else ''}{sym.name}"
+                if sym.bases:
+                    label += " : " + ", ".join(sym.bases)
+                out.append(render(rel, src, sym.line, min(end, len(src)), label=label))
+        return out
+
+    def suggestions(self, diags: List[unity_log.Diagnostic]) -> List[str]:
+        """'Did you mean' hints for quoted names the index does not know."""
+        by_name = self.index.by_name()
+        known = list(by_name)
+        out = []
+        for d in diags:
+            for name in QUOTED_RE.findall(d.text):
+                last = name.rpartition(".")[2]
+                if last in by_name or len(last) < 3:
+                    continue
+                close = difflib.get_close_matches(last, known, n=3, cutoff=0.75)
+                if close:
+                    where = ", ".join(f"{c} ({by_name[c][0][0]})" for c in close)
+                    out.append(f"- '{last}' is not declared in Assets/Scripts; did you mean {where}?")
+        return sorted(set(out))
+
+    def scene_usage(self, types: Set[str]) -> List[str]:
+        if self.unity_index is None:
+            self.unity_index = unity_yaml.load(self.root)
+        idx = self.unity_index
+        out = []
+        for t in sorted(types):
+            hits = idx.find_component(t, (".unity", ".prefab"))
+            if hits:
+                where = ", ".join(sorted({h["file"] + (f" (via {h['via']})" if h["via"] else "") for h in hits})[:6])
+                out.append(f"- {t}: {where}")
+        return out
+
+    def build(self, diags: List[unity_log.Diagnostic], budget_tokens: int = DEFAULT_TOKENS) -> str:
+        diags = [d for d in diags if d.kind != "warning"][:MAX_DIAGNOSTICS]
+        wins, idents, owners = self.windows(diags)
+        quoted = {q.rpartition(".")[2] for d in diags for q in QUOTED_RE.findall(d.text)}
+        # declarations already visible in a window are not repeated
+        shown = {(rel, s.line) for rel, a, b, _ in wins for s in self.index.symbols(rel) if a <= s.line <= b}
+        # (priority, section title, body): lower priority is packed first
+        sections: List[Tuple[int, str, str]] = []
+        sections += [(0, "Source around the errors", w) for _, _, _, w in wins]
+        hints = self.suggestions(diags)
+        if hints:
+            sections.append((1, "Unknown names", "\n".join(hints)))
+        sections += [(2, "Referenced definitions", d) for d in self.definitions(quoted, shown)]
+        sections += [(3, "Referenced definitions", d) for d in self.definitions(idents - quoted - owners, shown, types_only=True)]
+        usage = self.scene_usage(owners)
+        if usage:
+            sections.append((4, "Scenes/prefabs using the failing components", "\n".join(usage)))
+        return pack(sections, budget_tokens)
+
+
+def pack(sections: List[Tuple[int, str, str]], budget_tokens: int) -> str:
+    """Greedy packing by priority; a section that does not fit is skipped, not cut."""
+    out: List[str] = []
+    title = None
+    used = 0
+    for _, t, body in sorted(sections, key=lambda s: s[0]):
+        chunk = (f"### {t}\n" if t != title else "") + body + "\n"
+        cost = estimate_tokens(chunk)
+        if used + cost > budget_tokens:
+            continue
+        out.append(chunk)
+        used += cost
+        title = t
+    return "\n".join(out).rstrip("\n")
+
+
+def load_indexes(root: Path = Path(".")) -> Dict:
+    """Both indexes of a project, refreshed and saved: load them before sharing them between threads."""
+    return {"index": symbol_index.load(root), "unity_index": unity_yaml.load(root)}
+
+
+def build_context(diags: List[unity_log.Diagnostic], root: Path = Path("."), budget_tokens: int = DEFAULT_TOKENS,
+                  indexes: Optional[Dict] = None) -> str:
+    return ContextBuilder(root, **(indexes or {})).build(diags, budget_tokens)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Build the targeted source context for a Unity log")
+    ap.add_argument("log_file")
+    ap.add_argument("--root", default=".")
+    ap.add_argument("--tokens", type=int, default=DEFAULT_TOKENS)
+    ap.add_argument("--bench", action="store_true", help="Time cold index build, warm refresh and packing")
+    args = ap.parse_args()
+    root = Path(args.root)
+    diags = unity_log.triage_file(args.log_file).ranked()
+
+    if args.bench:
+        scratch = Path(os.environ.get("RUNNER_TEMP", "/tmp")) / "symbols.bench.json"
+        scratch.unlink(missing_ok=True)
+        t0 = time.perf_counter()
+        idx = symbol_index.SymbolIndex(root, scratch).refresh()
+        idx.save()
+        t1 = time.perf_counter()
+        idx = symbol_index.SymbolIndex(root, scratch).refresh()
+        t2 = time.perf_counter()
+        text = ContextBuilder(root, idx).build(diags, args.tokens)
+        t3 = time.perf_counter()
+        scratch.unlink(missing_ok=True)
+        n = sum(len(f["symbols"]) for f in idx.files.values())
+        print(f"index cold: {1000 * (t1 - t0):.1f} ms ({len(idx.files)} files, {n} symbols)", file=sys.stderr)
+        print(f"index warm: {1000 * (t2 - t1):.1f} ms {idx.stats}", file=sys.stderr)
+        print(f"context:    {1000 * (t3 - t2):.1f} ms, ~{estimate_tokens(text)} tokens for {len(diags)} diagnostic(s)", file=sys.stderr)
+        return
+    print(build_context(diags, root, args.tokens))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""Declaration index over the C# scripts (Assets/Scripts/**/*.cs).
+
+Built on the cs_syntax lexer: every namespace, type, method and property is
+recorded with its line span, enclosing type, base types and attributes (so
+`[ServerRpc]`/`[ClientRpc]` methods are visible). The index is persisted in
+.ci_cache/symbols.json (SYMBOL_INDEX, relative to the project root) and
+refreshed incrementally by mtime/size, then content hash.
+"""
+import hashlib
+import json
+import os
+from dataclasses import astuple, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import cache_file
+import cs_syntax
+
+INDEX_FILE = Path(os.environ.get("SYMBOL_INDEX", ".ci_cache/symbols.json"))
+SCRIPTS_DIR = "Assets/Scripts"
+# Bump when the symbol layout changes so stale indexes are rebuilt.
+VERSION = 2
+
+
+@dataclass
+class Symbol:
+    name: str
+    kind: str  # namespace | class | struct | interface | enum | record | method | property
+    line: int
+    end: int
+    parent: str = ""
+    namespace: str = ""
+    bases: List[str] = field(default_factory=list)
+    attrs: List[str] = field(default_factory=list)
+
+    @property
+    def is_type(self) -> bool:
+        return self.kind in cs_syntax.TYPE_KEYWORDS
+
+
+def _name_before_paren(head: List[str]) -> str:
+    i = head.index("(")
+    depth = 0
+    for tok in reversed(head[:i]):
+        if tok == ">":
+            depth += 1
+        elif tok == "<":
+            depth -= 1
+        elif depth == 0 and (tok[:1].isalpha() or tok[:1] == "_"):
+            return tok
+    return ""
+
+
+def _bases(head: List[str]) -> List[str]:
+    """Base types after `:` (generic arguments skipped, stops at `where`)."""
+    if ":" not in head:
+        return []
+    out: List[str] = []
+    depth = 0
+    prev = ":"
+    for tok in head[head.index(":") + 1:]:
+        if tok == "where" and depth == 0:
+            break
+        if tok == "<":
+            depth += 1
+        elif tok == ">":
+            depth -= 1
+        elif depth == 0:
+            if prev in (":", ",") and tok != ",":
+                out.append(tok)
+            prev = tok
+    return out
+
+
+def scan(src: str) -> List[Symbol]:
+    """Declarations in one source file, outermost first."""
+    lx = cs_syntax.Lexer(src)
+    symbols: List[Symbol] = []
+    stack: List[Tuple[str, Optional[Symbol], bool]] = []  # (bracket, symbol, is_attribute)
+    head: List[str] = []
+    head_line = 0
+    attrs: List[str] = []
+    file_ns = ""
+
+    def scope() -> Tuple[str, str]:
+        ns = [s.name for b, s, _ in stack if s and s.kind == "namespace"]
+        types = [s.name for b, s, _ in stack if s and s.is_type]
+        return (types[-1] if types else ""), ".".join([file_ns] + ns if file_ns else ns)
+
+    def in_type() -> bool:
+        for b, s, _ in reversed(stack):
+            if b == "{":
+                return bool(s and s.is_type)
+        return False
+
+    for kind, text, line, _ in lx.tokens():
+        if kind == "id" or text in "=,?:<>":
+            if not head:
+                head_line = line
+            head.append("=>" if text == ">" and head[-1:] == ["="] else text)
+            continue
+        if text in "([":
+            attr = text == "[" and not head
+            stack.append((text, None, attr))
+            head.append(text)
+        elif text in ")]":
+            if stack and stack[-1][0] in "([":
+                _, _, attr = stack.pop()
+                if attr:
+                    seg = head[head.index("[") + 1:] if "[" in head else []
+                    attrs += [t for i, t in enumerate(seg) if (i == 0 or seg[i - 1] == ",") and t[:1].isalpha()]
+                    head = []
+                    continue
+            head.append(text)
+        elif text == "{":
+            in_parens = bool(stack) and stack[-1][0] in "(["
+            bk = "initializer" if in_parens else cs_syntax.block_kind(head)
+            sym = None
+            parent, ns = scope()
+            if bk == "namespace":
+                sym = Symbol(".".join(t for t in head[head.index("namespace") + 1:] if t[:1].isalpha()), "namespace", head_line, line)
+            elif bk == "type":
+                k = next(i for i, t in enumerate(head) if t in cs_syntax.TYPE_KEYWORDS)
+                name = head[k + 1] if k + 1 < len(head) else ""
+                sym = Symbol(name, head[k], head_line, line, parent, ns, _bases(head), attrs)
+            elif bk == "method" and "(" in head:
+                sym = Symbol(_name_before_paren(head), "method", head_line, line, parent, ns, [], attrs)
+            elif bk == "member" and in_type() and head:
+                sym = Symbol(head[-1], "property", head_line, line, parent, ns, [], attrs)
+            if sym and sym.name:
+                symbols.append(sym)
+            stack.append(("{", sym, False))
+            head, attrs = [], []
+        elif text == "}":
+            if stack:
+                _, sym, _ = stack.pop()
+                if sym:
+                    sym.end = line
+            head, attrs = [], []
+        elif text == ";":
+            if not stack or stack[-1][0] == "{":
+                if head[:1] == ["namespace"]:
+                    file_ns = ".".join(t for t in head[1:] if t[:1].isalpha())
+                elif in_type() and "(" in head and ("=" not in head or head.index("(") < head.index("=")):
+                    # abstract / interface / expression-bodied method
+                    parent, ns = scope()
+                    name = _name_before_paren(head)
+                    if name:
+                        symbols.append(Symbol(name, "method", head_line, line, parent, ns, [], attrs))
+                head, attrs = [], []
+            else:
+                head.append(text)
+    return symbols
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+
+class SymbolIndex:
+    def __init__(self, root: Path = Path("."), index_file: Optional[Path] = None):
+        self.root = root
+        # paths in the index are relative to root: each project keeps its own
+        self.index_file = index_file or root / INDEX_FILE
+        self.files: Dict[str, Dict] = {}
+        self.stats = {"parsed": 0, "rehashed": 0, "reused": 0, "removed": 0}
+        try:
+            data = json.loads(self.index_file.read_text(encoding="utf-8"))
+            if data.get("version") == VERSION:
+                self.files = data.get("files", {})
+        except (OSError, ValueError):
+            pass
+        self._by_name: Optional[Dict[str, List[Tuple[str, Symbol]]]] = None
+
+    def refresh(self, scripts_dir: str = SCRIPTS_DIR) -> "SymbolIndex":
+        seen: Set[str] = set()
+        for p in sorted((self.root / scripts_dir).rglob("*.cs")):
+            rel = p.relative_to(self.root).as_posix()
+            seen.add(rel)
+            st = p.stat()
+            cached = self.files.get(rel)
+            if cached and cached["mtime"] == st.st_mtime_ns and cached["size"] == st.st_size:
+                self.stats["reused"] += 1
+                continue
+            data = p.read_bytes()
+            digest = _digest(data)
+            if cached and cached["sha1"] == digest:
+                cached["mtime"], cached["size"] = st.st_mtime_ns, st.st_size
+                self.stats["rehashed"] += 1
+                continue
+            syms = scan(data.decode("utf-8", errors="replace"))
+            self.files[rel] = {"mtime": st.st_mtime_ns, "size": st.st_size, "sha1": digest, "symbols": [list(astuple(s)) for s in syms]}
+            self.stats["parsed"] += 1
+        for rel in set(self.files) - seen:
+            del self.files[rel]
+            self.stats["removed"] += 1
+        self._by_name = None
+        return self
+
+    def save(self) -> None:
+        cache_file.atomic_write_json(self.index_file, {"version": VERSION, "files": self.files})
+
+    def symbols(self, rel: str) -> List[Symbol]:
+        entry = self.files.get(rel)
+        return [Symbol(*s) for s in entry["symbols"]] if entry else []
+
+    def all(self) -> Iterator[Tuple[str, Symbol]]:
+        for rel in sorted(self.files):
+            for s in self.symbols(rel):
+                yield rel, s
+
+    def by_name(self) -> Dict[str, List[Tuple[str, Symbol]]]:
+        if self._by_name is None:
+            self._by_name = {}
+            for rel, s in self.all():
+                if s.kind != "namespace":
+                    self._by_name.setdefault(s.name, []).append((rel, s))
+        return self._by_name
+
+    def enclosing(self, rel: str, line: int) -> Optional[Symbol]:
+        """Innermost non-namespace declaration whose span contains line."""
+        best = None
+        for s in self.symbols(rel):
+            if s.kind != "namespace" and s.line <= line <= s.end:
+                if best is None or s.line >= best.line:
+                    best = s
+        return best
+
+
+def load(root: Path = Path("."), save: bool = True) -> SymbolIndex:
+    idx = SymbolIndex(root).refresh()
+    if save and idx.stats["parsed"] + idx.stats["rehashed"] + idx.stats["removed"]:
+        idx.save()
+    return idx
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""Minimal unified-diff parser for LLM-generated patches.
+
+Only what the CI scripts need: extract the diff from a model answer, split it
+into per-file hunks, and run cheap static checks against the working tree
+before anything is handed to git.
+"""
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+HUNK_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+FENCE_RE = re.compile(r"^```[\w-]*\s*$")
+
+
+@dataclass
+class Hunk:
+    old_start: int
+    old_len: int
+    new_start: int
+    new_len: int
+    lines: List[str] = field(default_factory=list)
+
+    def old_lines(self) -> List[str]:
+        return [l[1:] for l in self.lines if l[:1] in (" ", "-")]
+
+    def new_lines(self) -> List[str]:
+        return [l[1:] for l in self.lines if l[:1] in (" ", "+")]
+
+
+@dataclass
+class FilePatch:
+    old_path: Optional[str]
+    new_path: Optional[str]
+    hunks: List[Hunk] = field(default_factory=list)
+
+    @property
+    def path(self) -> str:
+        return self.new_path or self.old_path or ""
+
+    @property
+    def is_new(self) -> bool:
+        return self.old_path is None
+
+    @property
+    def is_deleted(self) -> bool:
+        return self.new_path is None
+
+
+class PatchError(ValueError):
+    pass
+
+
+def extract_diff(text: str) -> str:
+    """Drop markdown fences and prose around the first diff header."""
+    lines = [l for l in text.splitlines() if not FENCE_RE.match(l)]
+    for i, l in enumerate(lines):
+        if l.startswith("diff --git ") or l.startswith("--- "):
+            return "\n".join(lines[i:]).rstrip("\n") + "\n"
+    return ""
+
+
+def _strip_prefix(p: str) -> Optional[str]:
+    p = p.split("\t", 1)[0].strip()
+    if p == "/dev/null":
+        return None
+    return p[2:] if p[:2] in ("a/", "b/") else p
+
+
+def parse(text: str) -> List[FilePatch]:
+    files: List[FilePatch] = []
+    cur: Optional[FilePatch] = None
+    hunk: Optional[Hunk] = None
+    remaining = [0, 0]
+    for line in text.splitlines():
+        if hunk is not None and (remaining[0] > 0 or remaining[1] > 0):
+            tag = line[:1]
+            if tag == "\\":
+                continue
+            if tag not in (" ", "-", "+", ""):
+                raise PatchError(f"{cur.path}: hunk truncated at {line[:60]!r}")
+            line = line if tag else " "
+            hunk.lines.append(line)
+            if line[0] in (" ", "-"):
+                remaining[0] -= 1
+            if line[0] in (" ", "+"):
+                remaining[1] -= 1
+            if remaining[0] < 0 or remaining[1] < 0:
+                raise PatchError(f"{cur.path}: hunk longer than its header")
+            continue
+        if line.startswith("\\"):
+            continue
+        hunk = None
+        if line.startswith("diff --git "):
+            cur = None
+        elif line.startswith("--- "):
+            cur = FilePatch(_strip_prefix(line[4:]), None)
+        elif line.startswith("+++ ") and cur is not None and not cur.hunks:
+            cur.new_path = _strip_prefix(line[4:])
+            files.append(cur)
+        elif line.startswith("@@"):
+            m = HUNK_RE.match(line)
+            if not m or cur is None:
+                raise PatchError(f"malformed hunk header {line[:60]!r}")
+            old_len = int(m.group(2)) if m.group(2) is not None else 1
+            new_len = int(m.group(4)) if m.group(4) is not None else 1
+            hunk = Hunk(int(m.group(1)), old_len, int(m.group(3)), new_len)
+            cur.hunks.append(hunk)
+            remaining = [old_len, new_len]
+    if hunk is not None and (remaining[0] > 0 or remaining[1] > 0):
+        raise PatchError(f"{cur.path}: hunk truncated at end of patch")
+    if not files:
+        raise PatchError("no file headers found")
+    return files
+
+
+def find_block(haystack: List[str], needle: List[str], hint: int, fuzz: int = -1) -> int:
+    """Index where needle occurs in haystack, searching outward from hint; -1 if absent."""
+    if not needle:
+        return max(0, min(hint, len(haystack)))
+    n = len(needle)
+    limit = len(haystack) - n
+    # a header pointing past the end (stale line numbers) searches back from the end
+    hint = max(0, min(hint, limit))
+    span = limit + 1 if fuzz < 0 else fuzz
+    for d in range(0, span + 1):
+        for pos in (hint - d, hint + d) if d else (hint,):
+            if 0 <= pos <= limit and haystack[pos:pos + n] == needle:
+                return pos
+    return -1
+
+
+def static_check(files: List[FilePatch], root: Path) -> Tuple[int, List[str]]:
+    """Cheap pre-git checks; returns (score, problems). Higher score is better."""
+    problems: List[str] = []
+    score = 0
+    for fp in files:
+        target = root / (fp.old_path or fp.path)
+        if fp.is_new:
+            if (root / fp.path).exists():
+                problems.append(f"{fp.path}: created but already exists")
+            continue
+        if not target.is_file():
+            problems.append(f"{fp.old_path}: file does not exist")
+            continue
+        lines = target.read_text(encoding="utf-8", errors="replace").splitlines()
+        for h in fp.hunks:
+            if find_block(lines, h.old_lines(), h.old_start - 1) < 0:
+                problems.append(f"{fp.path}: hunk @@ -{h.old_start} does not match file content")
+            else:
+                score += 1
+    # fewer touched files is better for a minimal fix
+    return score * 10 - len(problems) * 100 - len(files), problems
+
+
+def _find_fuzzy(lines: List[str], before: List[str], hint: int, fuzz: int) -> int:
+    """find_block, falling back to a match that ignores trailing whitespace."""
+    pos = find_block(lines, before, hint, fuzz)
+    if pos < 0 and before:
+        pos = find_block([l.rstrip() for l in lines], [l.rstrip() for l in before], hint, fuzz)
+    return pos
+
+
+def apply_partial(old: str, fp: FilePatch, fuzz: int = -1) -> Tuple[str, List[Hunk], List[Hunk]]:
+    """Apply the hunks that match, skip the others; returns (content, applied, rejected)."""
+    if fp.is_deleted:
+        return "", list(fp.hunks), []
+    lines = old.splitlines()
+    offset = 0
+    applied: List[Hunk] = []
+    rejected: List[Hunk] = []
+    for h in fp.hunks:
+        before = h.old_lines()
+        pos = _find_fuzzy(lines, before, h.old_start - 1 + offset, fuzz)
+        if pos < 0:
+            rejected.append(h)
+            continue
+        # context lines keep the file's text (they may have matched only up to trailing whitespace)
+        after, k = [], pos
+        for l in h.lines:
+            if l[:1] == "+":
+                after.append(l[1:])
+            else:
+                if l[:1] == " ":
+                    after.append(lines[k])
+                k += 1
+        lines[pos:pos + len(before)] = after
+        offset = pos - (h.old_start - 1) + len(after) - len(before)
+        applied.append(h)
+    return "\n".join(lines) + ("\n" if lines else ""), applied, rejected
+
+
+def apply_file(old: str, fp: FilePatch, fuzz: int = -1) -> str:
+    """Apply fp's hunks to old content in memory, tolerating line offsets."""
+    new, _, rejected = apply_partial(old, fp, fuzz)
+    if rejected:
+        raise PatchError(f"{fp.path}: hunk @@ -{rejected[0].old_start} does not match file content")
+    return new
+
+
+def format_hunk(h: Hunk) -> str:
+    """The hunk as unified-diff text (for .rej reports)."""
+    return f"@@ -{h.old_start},{h.old_len} +{h.new_start},{h.new_len} @@\n" + "\n".join(h.lines) + "\n"
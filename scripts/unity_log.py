@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""Streaming triage of Unity Editor logs.
+
+The log is consumed line by line in a single pass, so memory stays flat no
+matter how large the file is. Compiler diagnostics, exception stacks, test
+failures and build errors are extracted, deduplicated and ranked, then packed
+into a size-budgeted excerpt for the autofix prompt.
+
+A Triage can be saved as JSON (diagnostics, counts and the log tail, bounded
+like the Triage itself) to a *.triage.json file; triage_file() reads those
+back as is, so a saved triage gives the same diagnostics and signatures as
+the log it came from.
+"""
+import argparse
+import json
+import re
+import sys
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional
+
+DEFAULT_BUDGET = 35000
+TAIL_LINES = 400
+MAX_LINE = 2000
+MAX_UNIQUE = 2000
+MAX_STACK = 12
+TRIAGE_SUFFIX = ".triage.json"
+
+# Assets/Scripts/Foo.cs(12,5): error CS0246: The type or namespace name ...
+COMPILER_RE = re.compile(
+    r"(?P<file>[^\s():][^():]*?\.cs)\((?P<line>\d+),(?P<col>\d+)\):\s*"
+    r"(?P<level>error|warning)\s+(?P<code>CS\d{4}):\s*(?P<msg>.*)$"
+)
+# error CS1705: Assembly ... (no source location)
+BARE_COMPILER_RE = re.compile(r"\b(?P<level>error)\s+(?P<code>CS\d{4}):\s*(?P<msg>.*)$")
+# NullReferenceException: Object reference not set to an instance of an object
+EXCEPTION_RE = re.compile(r"^(?:[\w.`]+\.)?(?P<type>\w*Exception)(?::\s*(?P<msg>.*))?$")
+# Foo.Bar () (at Assets/Scripts/Foo.cs:12) / UnityEngine.Debug:Log (object) / at Foo.Bar ()
+STACK_RE = re.compile(r"^(?:\s+at\s|\S+?[:.][\w<>`$|]+\s?\(.*\)|\s*\(at\s)")
+STACK_AT_RE = re.compile(r"\(at (?P<file>[^:()]+\.cs):(?P<line>\d+)\)")
+TEST_FAIL_RE = re.compile(r"^\s*(?:Test\s+)?(?:Failed|FAILED)\s*[:\-]\s*(?P<name>\S.*)$")
+BUILD_ERROR_RE = re.compile(
+    r"(?P<msg>Error building Player.*|Build Failed.*|BuildFailedException.*|"
+    r"Scripts have compiler errors\..*|Aborting batchmode due to failure.*)$"
+)
+ABS_ASSETS_RE = re.compile(r"^.*?[\\/](?=(?:Assets|Packages)[\\/])")
+
+KIND_RANK = {"compile": 0, "build": 1, "exception": 2, "test": 3, "warning": 4}
+KIND_TITLES = {
+    "compile": "Compiler errors",
+    "build": "Build errors",
+    "exception": "Exceptions",
+    "test": "Test failures",
+    "warning": "Compiler warnings",
+}
+
+
+@dataclass
+class Diagnostic:
+    kind: str
+    text: str
+    file: str = ""
+    line: int = 0
+    code: str = ""
+    first_seen: int = 0
+    count: int = 1
+    detail: List[str] = field(default_factory=list)
+
+    def key(self) -> tuple:
+        return (self.kind, self.file, self.line, self.code, self.text)
+
+    def render(self) -> str:
+        head = self.text + (f"  [x{self.count}]" if self.count > 1 else "")
+        if not self.detail:
+            return head
+        return "\n".join([head] + ["    " + d for d in self.detail])
+
+
+def normalize_path(p: str) -> str:
+    """Strip runner-specific prefixes so the same file always has the same key."""
+    return ABS_ASSETS_RE.sub("", p.strip().replace("\\", "/"))
+
+
+def iter_lines(path: str) -> Iterator[str]:
+    """Yield the lines of a (possibly huge) log without loading it in memory."""
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            yield line.rstrip("\r\n")[:MAX_LINE]
+
+
+def scan(lines: Iterable[str]) -> Iterator[Diagnostic]:
+    """Single-pass extractor; yields one Diagnostic per occurrence (not deduplicated)."""
+    pending: Optional[Diagnostic] = None
+    for n, line in enumerate(lines, 1):
+        if pending is not None:
+            if (
+                line.strip()
+                and STACK_RE.match(line)
+                and not COMPILER_RE.search(line)
+                and len(pending.detail) < MAX_STACK
+            ):
+                pending.detail.append(line.strip())
+                if not pending.file:
+                    m = STACK_AT_RE.search(line)
+                    if m:
+                        pending.file = normalize_path(m.group("file"))
+                        pending.line = int(m.group("line"))
+                continue
+            yield pending
+            pending = None
+
+        # Cheap substring gates first: the vast majority of lines match nothing.
+        if " CS" in line:
+            m = COMPILER_RE.search(line)
+            if m:
+                f = normalize_path(m.group("file"))
+                level = m.group("level")
+                yield Diagnostic(
+                    kind="compile" if level == "error" else "warning",
+                    text=f"{f}({m.group('line')},{m.group('col')}): {level} {m.group('code')}: {m.group('msg').strip()}",
+                    file=f,
+                    line=int(m.group("line")),
+                    code=m.group("code"),
+                    first_seen=n,
+                )
+                continue
+            m = BARE_COMPILER_RE.search(line)
+            if m:
+                yield Diagnostic(
+                    kind="compile",
+                    text=f"error {m.group('code')}: {m.group('msg').strip()}",
+                    code=m.group("code"),
+                    first_seen=n,
+                )
+                continue
+        if "Exception" in line:
+            m = EXCEPTION_RE.match(line.strip())
+            if m:
+                pending = Diagnostic(kind="exception", text=line.strip(), code=m.group("type"), first_seen=n)
+                continue
+        if "ailed" in line or "FAILED" in line or "rror" in line or "Abort" in line:
+            m = TEST_FAIL_RE.match(line)
+            if m:
+                yield Diagnostic(kind="test", text=f"Failed: {m.group('name').strip()}", first_seen=n)
+                continue
+            m = BUILD_ERROR_RE.search(line)
+            if m:
+                yield Diagnostic(kind="build", text=m.group("msg").strip(), first_seen=n)
+    if pending is not None:
+        yield pending
+
+
+class Triage:
+    """Deduplicating accumulator over scan() output, plus a bounded log tail."""
+
+    def __init__(self, tail_lines: int = TAIL_LINES):
+        self.unique: Dict[tuple, Diagnostic] = {}
+        self.dropped = 0
+        self.lines = 0
+        self.tail: deque = deque(maxlen=tail_lines)
+
+    def add(self, d: Diagnostic) -> None:
+        k = d.key()
+        seen = self.unique.get(k)
+        if seen is not None:
+            seen.count += 1
+        elif len(self.unique) < MAX_UNIQUE:
+            self.unique[k] = d
+        else:
+            self.dropped += 1
+
+    def feed(self, lines: Iterable[str]) -> "Triage":
+        def counted():
+            for line in lines:
+                self.lines += 1
+                self.tail.append(line)
+                yield line
+
+        for d in scan(counted()):
+            self.add(d)
+        return self
+
+    def ranked(self, include_warnings: bool = False) -> List[Diagnostic]:
+        ds = [d for d in self.unique.values() if include_warnings or d.kind != "warning"]
+        # First occurrence wins within a kind: the first compiler error is usually the root cause.
+        return sorted(ds, key=lambda d: (KIND_RANK.get(d.kind, 9), d.first_seen))
+
+    def counts(self) -> Dict[str, int]:
+        c: Dict[str, int] = {}
+        for d in self.unique.values():
+            c[d.kind] = c.get(d.kind, 0) + 1
+        return c
+
+    def has_errors(self) -> bool:
+        return any(d.kind != "warning" for d in self.unique.values())
+
+    def excerpt(self, budget: int = DEFAULT_BUDGET) -> str:
+        """Ranked sections, then warnings and the log tail while room remains."""
+        out: List[str] = []
+        used = 0
+        omitted = 0
+
+        def push(text: str) -> bool:
+            nonlocal used
+            if used + len(text) + 1 > budget:
+                return False
+            out.append(text)
+            used += len(text) + 1
+            return True
+
+        current = None
+        for d in self.ranked(include_warnings=True):
+            if d.kind != current:
+                total = sum(x.count for x in self.unique.values() if x.kind == d.kind)
+                n = sum(1 for x in self.unique.values() if x.kind == d.kind)
+                if not push(f"## {KIND_TITLES.get(d.kind, d.kind)} ({n} unique, {total} total)"):
+                    # no section without its header: the next one of this kind tries again
+                    omitted += 1
+                    continue
+                current = d.kind
+            if not push(d.render()):
+                omitted += 1
+        if omitted or self.dropped:
+            push(f"... {omitted + self.dropped} diagnostic(s) omitted")
+
+        header = "## Log tail (last {} of {} lines)"
+        room = budget - used - len(header.format(len(self.tail), self.lines)) - 1
+        kept: List[str] = []
+        for line in reversed(self.tail):
+            if room - len(line) - 1 < 0:
+                break
+            kept.append(line)
+            room -= len(line) + 1
+        if kept:
+            out.append(header.format(len(kept), self.lines))
+            out.extend(reversed(kept))
+        return "\n".join(out)
+
+    def to_json(self) -> Dict:
+        return {"lines": self.lines, "dropped": self.dropped, "tail": list(self.tail),
+                "diagnostics": [d.__dict__ for d in self.unique.values()]}
+
+    @classmethod
+    def from_json(cls, data: Dict, tail_lines: int = TAIL_LINES) -> "Triage":
+        t = cls(tail_lines)
+        t.lines, t.dropped = data["lines"], data["dropped"]
+        t.tail.extend(data["tail"])
+        for raw in data["diagnostics"]:
+            d = Diagnostic(**raw)
+            t.unique[d.key()] = d
+        return t
+
+
+def triage_file(path: str, tail_lines: int = TAIL_LINES) -> Triage:
+    """Triage of a Unity log, or of a triage saved with to_json() (*.triage.json)."""
+    if path.endswith(TRIAGE_SUFFIX):
+        with open(path, encoding="utf-8") as f:
+            return Triage.from_json(json.load(f), tail_lines)
+    return Triage(tail_lines).feed(iter_lines(path))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Extract ranked diagnostics from a Unity Editor log")
+    ap.add_argument("log_file")
+    ap.add_argument("--budget", type=int, default=DEFAULT_BUDGET)
+    ap.add_argument("--json", action="store_true", help="Dump diagnostics as JSON instead of an excerpt")
+    args = ap.parse_args()
+
+    t = triage_file(args.log_file)
+    if args.json:
+        json.dump([d.__dict__ for d in t.ranked(include_warnings=True)], sys.stdout, indent=2)
+        print()
+    else:
+        print(t.excerpt(args.budget))
+    print(f"{t.lines} lines, {t.counts()}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
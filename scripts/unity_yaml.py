@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""Streaming reader and persistent index for Unity YAML scenes, prefabs and assets.
+
+Unity serializes each object as one YAML document headed by
+`--- !u!<classID> &<fileID>`. The reader walks those documents line by line
+and keeps only what structure queries need: GameObjects and their components,
+MonoBehaviour script GUIDs (resolved to script paths through the `.meta`
+files, or to the class named in m_EditorClassIdentifier for package scripts),
+prefab instances and every GUID referenced.
+
+The index is stored in .ci_cache/unity_index.json (UNITY_INDEX, relative to
+the project root) and refreshed incrementally: files whose mtime and size are
+unchanged are not reopened, and files whose content hash is unchanged are not
+reparsed.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import cache_file
+
+INDEX_FILE = Path(os.environ.get("UNITY_INDEX", ".ci_cache/unity_index.json"))
+ASSETS_DIR = "Assets"
+YAML_SUFFIXES = (".unity", ".prefab", ".asset")
+# Bump when the record layout changes so stale indexes are rebuilt.
+VERSION = 1
+
+HEADER_RE = re.compile(r"^--- !u!(\d+) &(-?\d+)( stripped)?")
+GUID_RE = re.compile(r"guid: ([0-9a-f]{32})")
+FILEID_RE = re.compile(r"fileID: (-?\d+)")
+META_GUID_RE = re.compile(r"^guid: ([0-9a-f]{32})", re.M)
+
+
+def iter_documents(path: Path) -> Iterator[Tuple[int, str, str, bool, List[str]]]:
+    """Yield (class_id, file_id, type_name, stripped, body_lines) per YAML document."""
+    header: Optional[Tuple[int, str, bool]] = None
+    body: List[str] = []
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            m = HEADER_RE.match(line)
+            if m:
+                if header:
+                    yield header[0], header[1], body[0].rstrip(":") if body else "", header[2], body[1:]
+                header = (int(m.group(1)), m.group(2), bool(m.group(3)))
+                body = []
+            elif header:
+                body.append(line)
+    if header:
+        yield header[0], header[1], body[0].rstrip(":") if body else "", header[2], body[1:]
+
+
+def _field(lines: List[str], key: str) -> Optional[str]:
+    prefix = f"  {key}:"
+    for line in lines:
+        if line.startswith(prefix):
+            return line[len(prefix):].strip()
+    return None
+
+
+def parse_file(path: Path) -> Dict:
+    """Reduce one Unity YAML file to the structure used by the index."""
+    objects: Dict[str, Dict] = {}
+    components: Dict[str, Dict] = {}
+    prefabs: List[Dict] = []
+    guids: Set[str] = set()
+    for class_id, file_id, type_name, stripped, lines in iter_documents(path):
+        for line in lines:
+            if "guid: " in line:
+                guids.update(GUID_RE.findall(line))
+        if stripped:
+            continue
+        if type_name == "GameObject":
+            comps = [FILEID_RE.search(l).group(1) for l in lines if l.startswith("  - component:")]
+            objects[file_id] = {"name": _field(lines, "m_Name") or "", "components": comps}
+        elif type_name == "PrefabInstance":
+            src = _field(lines, "m_SourcePrefab") or ""
+            g = GUID_RE.search(src)
+            name = ""
+            for i, line in enumerate(lines):
+                if line.strip() == "propertyPath: m_Name" and i + 1 < len(lines):
+                    name = lines[i + 1].strip().partition("value:")[2].strip()
+                    break
+            prefabs.append({"file_id": file_id, "guid": g.group(1) if g else "", "name": name})
+        else:
+            go = FILEID_RE.search(_field(lines, "m_GameObject") or "")
+            comp = {"class_id": class_id, "type": type_name, "go": go.group(1) if go else "0"}
+            if type_name == "MonoBehaviour":
+                script = GUID_RE.search(_field(lines, "m_Script") or "")
+                comp["script_guid"] = script.group(1) if script else ""
+                ident = _field(lines, "m_EditorClassIdentifier") or ""
+                comp["class"] = ident.rpartition("::")[2].rpartition(".")[2]
+                if comp["go"] == "0":
+                    comp["name"] = _field(lines, "m_Name") or ""
+            components[file_id] = comp
+    return {"objects": objects, "components": components, "prefabs": prefabs, "guids": sorted(guids)}
+
+
+def _digest(path: Path) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class UnityIndex:
+    def __init__(self, root: Path = Path("."), index_file: Optional[Path] = None):
+        self.root = root
+        # paths in the index are relative to root: each project keeps its own
+        self.index_file = index_file or root / INDEX_FILE
+        self.files: Dict[str, Dict] = {}
+        self.metas: Dict[str, List] = {}
+        self.stats = {"parsed": 0, "rehashed": 0, "reused": 0, "removed": 0}
+        try:
+            data = json.loads(self.index_file.read_text(encoding="utf-8"))
+            if data.get("version") == VERSION:
+                self.files = data.get("files", {})
+                self.metas = data.get("metas", {})
+        except (OSError, ValueError):
+            pass
+        self._guid_map: Optional[Dict[str, str]] = None
+
+    # -- refresh --------------------------------------------------------
+
+    def refresh(self) -> "UnityIndex":
+        seen_files: Set[str] = set()
+        seen_metas: Set[str] = set()
+        for dirpath, dirnames, filenames in os.walk(self.root / ASSETS_DIR):
+            dirnames.sort()
+            for name in filenames:
+                p = Path(dirpath) / name
+                rel = p.relative_to(self.root).as_posix()
+                if name.endswith(".meta"):
+                    seen_metas.add(rel)
+                    self._refresh_meta(p, rel)
+                elif name.endswith(YAML_SUFFIXES):
+                    seen_files.add(rel)
+                    self._refresh_file(p, rel)
+        for rel in set(self.files) - seen_files:
+            del self.files[rel]
+            self.stats["removed"] += 1
+        for rel in set(self.metas) - seen_metas:
+            del self.metas[rel]
+        self._guid_map = None
+        return self
+
+    def _refresh_meta(self, p: Path, rel: str) -> None:
+        st = p.stat()
+        cached = self.metas.get(rel)
+        if cached and cached[0] == st.st_mtime_ns:
+            return
+        m = META_GUID_RE.search(p.read_text(encoding="utf-8", errors="replace")[:512])
+        self.metas[rel] = [st.st_mtime_ns, m.group(1) if m else ""]
+
+    def _refresh_file(self, p: Path, rel: str) -> None:
+        st = p.stat()
+        cached = self.files.get(rel)
+        if cached and cached["mtime"] == st.st_mtime_ns and cached["size"] == st.st_size:
+            self.stats["reused"] += 1
+            return
+        digest = _digest(p)
+        if cached and cached["sha1"] == digest:
+            cached["mtime"], cached["size"] = st.st_mtime_ns, st.st_size
+            self.stats["rehashed"] += 1
+            return
+        with open(p, "rb") as f:
+            is_yaml = f.read(5) == b"%YAML"
+        record = parse_file(p) if is_yaml else None
+        self.files[rel] = {"mtime": st.st_mtime_ns, "size": st.st_size, "sha1": digest, "record": record}
+        self.stats["parsed"] += 1
+
+    def save(self) -> None:
+        cache_file.atomic_write_json(self.index_file, {"version": VERSION, "files": self.files, "metas": self.metas})
+
+    # -- queries ----------------------------------------------------------
+
+    def guid_map(self) -> Dict[str, str]:
+        """guid -> asset path (the .meta path without its suffix)."""
+        if self._guid_map is None:
+            self._guid_map = {g: rel[:-5] for rel, (_, g) in self.metas.items() if g}
+        return self._guid_map
+
+    def component_name(self, comp: Dict) -> str:
+        if comp["type"] != "MonoBehaviour":
+            return comp["type"]
+        if comp.get("class"):
+            return comp["class"]
+        script = self.guid_map().get(comp.get("script_guid", ""), "")
+        if script.endswith(".cs"):
+            return Path(script).name[:-3]
+        return f"MonoBehaviour({comp.get('script_guid', '')[:8]})"
+
+    def record(self, rel: str) -> Optional[Dict]:
+        entry = self.files.get(rel)
+        return entry and entry["record"]
+
+    def game_objects(self, rel: str, _seen: Optional[Set[str]] = None) -> Iterator[Tuple[str, str, List[str]]]:
+        """(via, gameobject name, component names) for a file, following prefab instances."""
+        rec = self.record(rel)
+        if not rec:
+            return
+        seen = _seen if _seen is not None else set()
+        if rel in seen:
+            return
+        seen.add(rel)
+        for go in rec["objects"].values():
+            names = [self.component_name(rec["components"][c]) for c in go["components"] if c in rec["components"]]
+            yield rel, go["name"], names
+        for pi in rec["prefabs"]:
+            src = self.guid_map().get(pi["guid"])
+            if src:
+                yield from self.game_objects(src, seen)
+
+    def find_component(self, name: str, suffixes: Tuple[str, ...] = (".unity",)) -> List[Dict]:
+        hits = []
+        for rel in sorted(self.files):
+            if not rel.endswith(suffixes):
+                continue
+            for via, go, comps in self.game_objects(rel):
+                if name in comps:
+                    hits.append({"file": rel, "via": via if via != rel else "", "game_object": go})
+        return hits
+
+    def references(self, rel: str) -> List[str]:
+        """Asset paths referenced by GUID from rel (unresolvable GUIDs are skipped)."""
+        rec = self.record(rel)
+        if not rec:
+            return []
+        gm = self.guid_map()
+        return sorted({gm[g] for g in rec["guids"] if g in gm})
+
+
+def load(root: Path = Path("."), save: bool = True) -> UnityIndex:
+    idx = UnityIndex(root).refresh()
+    if save:
+        idx.save()
+    return idx
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Query the Unity scene/prefab/asset index")
+    ap.add_argument("--root", default=".")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("refresh", help="Update the on-disk index")
+    f = sub.add_parser("find", help="Scenes containing a component (e.g. NetworkManager)")
+    f.add_argument("component")
+    f.add_argument("--prefabs", action="store_true", help="Search prefabs as well as scenes")
+    s = sub.add_parser("show", help="GameObjects and components of a scene/prefab")
+    s.add_argument("path")
+    r = sub.add_parser("refs", help="Assets referenced by GUID from a file")
+    r.add_argument("path")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    idx = load(Path(args.root))
+    t1 = time.perf_counter()
+    if args.cmd == "refresh":
+        print(f"✅ {len(idx.files)} file(s) indexed, {idx.stats}")
+    elif args.cmd == "find":
+        suffixes = (".unity", ".prefab") if args.prefabs else (".unity",)
+        for h in idx.find_component(args.component, suffixes):
+            via = f" (via {h['via']})" if h["via"] else ""
+            print(f"{h['file']}: {h['game_object']}{via}")
+    elif args.cmd == "show":
+        for via, go, comps in idx.game_objects(args.path):
+            prefix = f"[{via}] " if via != args.path else ""
+            print(f"{prefix}{go}: {', '.join(comps)}")
+    elif args.cmd == "refs":
+        print("\n".join(idx.references(args.path)))
+    print(f"(refresh {1000 * (t1 - t0):.1f} ms, query {1000 * (time.perf_counter() - t1):.1f} ms)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+# the CI scripts import each other by module name, as when run from their directory
+sys.path[:0] = [str(ROOT / "scripts"), str(ROOT / ".github" / "scripts")]
@@ -0,0 +1,78 @@
+import os
+import zlib
+
+import pytest
+
+import backup_store
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return backup_store.Store(tmp_path / ".patch-backups")
+
+
+def write(path, text, mtime):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    os.utime(path, (mtime, mtime))
+
+
+def objects(store):
+    return sorted(p.name for p in store.objects.rglob("*") if p.is_file())
+
+
+def test_save_dedupes_and_skips_unchanged(store, tmp_path):
+    write(tmp_path / "ci.yml", "a: 1\n", 1000)
+    write(tmp_path / "copy.yml", "a: 1\n", 1000)
+    name, n, new = store.save(["ci.yml", "copy.yml", "missing.yml"], "patch", ts=1_700_000_000)
+    assert name == "20231114T221320Z-patch" and (n, new) == (2, 1)
+    assert store.save(["ci.yml", "copy.yml"], "patch", ts=1_700_000_100) == (None, 2, 0)
+    write(tmp_path / "ci.yml", "a: 2\n", 2000)
+    name, n, new = store.save(["ci.yml", "copy.yml"], "patch", ts=1_700_000_200)
+    assert name and new == 1 and len(objects(store)) == 2
+
+
+def test_restore_as_of_a_time(store, tmp_path):
+    write(tmp_path / "ci.yml", "v1\n", 1000)
+    store.save(["ci.yml"], "patch", ts=backup_store.parse_ts("2026-01-14T10:00:00Z"))
+    write(tmp_path / "ci.yml", "v2\n", 2000)
+    store.save(["ci.yml"], "patch", ts=backup_store.parse_ts("20260114_120000"))
+    name = store.at(backup_store.parse_ts("2026-01-14T11:00"), "patch")
+    assert store.restore(name) == ["ci.yml"]
+    assert (tmp_path / "ci.yml").read_text() == "v1\n"
+    assert store.restore(name) == []  # already identical
+    assert store.restore(store.at(None), to=tmp_path / "out") == ["ci.yml"]
+    assert (tmp_path / "out" / "ci.yml").read_text() == "v2\n"
+    with pytest.raises(backup_store.BackupError):
+        store.at(backup_store.parse_ts("2026-01-13"))
+
+
+def test_restore_rejects_a_corrupt_object(store, tmp_path):
+    write(tmp_path / "ci.yml", "v1\n", 1000)
+    name, _, _ = store.save(["ci.yml"], "patch", ts=1_700_000_000)
+    obj = next(p for p in store.objects.rglob("*") if p.is_file())
+    obj.write_bytes(zlib.compress(b"tampered"))
+    (tmp_path / "ci.yml").write_text("changed\n")
+    with pytest.raises(backup_store.BackupError, match="corrupt"):
+        store.restore(name)
+    assert (tmp_path / "ci.yml").read_text() == "changed\n"
+
+
+def test_gc_keeps_last_per_label_and_sweeps_objects(store, tmp_path):
+    for i in range(4):
+        write(tmp_path / "ci.yml", f"v{i}\n", 1000 + i)
+        store.save(["ci.yml"], "patch", ts=1_700_000_000 + i)
+    write(tmp_path / "other.txt", "kept\n", 1000)
+    store.save(["other.txt"], "bundle", ts=1_600_000_000)
+    leftover = store.objects / "ff" / ".leftover.1.tmp"
+    leftover.parent.mkdir(parents=True)
+    leftover.write_bytes(b"x")
+
+    dropped, removed, freed = store.gc(keep=2)
+    assert dropped == 2 and removed == 3 and freed > 0
+    assert [n.split("-", 1)[1] for n in store.names()] == ["bundle", "patch", "patch"]
+    assert len(objects(store)) == 3
+    # every remaining snapshot still restores
+    for name in store.names():
+        store.restore(name, to=tmp_path / "check" / name)
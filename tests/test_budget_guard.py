@@ -0,0 +1,72 @@
+import importlib
+import json
+
+import pytest
+
+
+@pytest.fixture
+def bg(tmp_path, monkeypatch):
+    monkeypatch.setenv("BUDGET_FILE", str(tmp_path / "actions-budget.jsonl"))
+    monkeypatch.delenv("BUDGET_LEGACY_FILE", raising=False)
+    import budget_guard
+    return importlib.reload(budget_guard)
+
+
+def record(bg, month, cost):
+    f, h = bg.open_store(month)
+    with f:
+        bg.append(f, h, {"ts_utc": f"{month}-05T10:00:00Z", "run_id": "1", "duration_min": 2.0, "cost_eur": cost})
+        f.flush()
+        bg.write_header(f, h)
+    return h
+
+
+def test_header_tracks_appends(bg):
+    record(bg, "2026-01", 1.5)
+    h = record(bg, "2026-01", 2.25)
+    assert bg.peek("2026-01")["total_eur"] == 3.75 and h["runs"] == 2
+
+
+def test_torn_append_is_rebuilt(bg):
+    record(bg, "2026-01", 1.0)
+    with open(bg.BUDGET_FILE, "ab") as f:
+        f.write(json.dumps({"cost_eur": 4.0, "duration_min": 1}).encode() + b"\n")  # header never updated
+        f.write(b'{"cost_eur": 9')  # torn write
+    f, h = bg.open_store("2026-01")
+    f.close()
+    assert h["total_eur"] == 5.0 and h["runs"] == 2
+    assert bg.BUDGET_FILE.read_bytes().endswith(b"}\n")
+
+
+def test_corrupt_header_is_rebuilt_from_records(bg):
+    record(bg, "2026-01", 1.0)
+    record(bg, "2026-01", 2.0)
+    raw = bytearray(bg.BUDGET_FILE.read_bytes())
+    raw[:20] = b"\x00" * 20
+    bg.BUDGET_FILE.write_bytes(bytes(raw))
+    assert bg.peek("2026-01")["total_eur"] == 3.0
+    h = record(bg, "2026-01", 0.5)
+    assert h["total_eur"] == 3.5 and h["runs"] == 3
+
+
+def test_month_rollover_archives(bg):
+    record(bg, "2026-01", 1.0)
+    h = record(bg, "2026-02", 2.0)
+    assert h["total_eur"] == 2.0
+    assert json.loads(bg.ARCHIVE_FILE.read_text())["total_eur"] == 1.0
+
+
+def test_legacy_store_is_migrated_once(bg):
+    bg.LEGACY_FILE.write_text(json.dumps({"month": "2026-01", "total_eur": 7.0, "runs": [{"cost_eur": 7.0}]}))
+    assert bg.peek("2026-01")["total_eur"] == 7.0
+    h = record(bg, "2026-01", 1.0)
+    assert h["total_eur"] == 8.0 and not bg.LEGACY_FILE.exists()
+
+
+def test_store_at_the_legacy_path_is_not_migrated(tmp_path, monkeypatch):
+    monkeypatch.setenv("BUDGET_FILE", str(tmp_path / "actions-budget.json"))
+    import budget_guard
+    bg = importlib.reload(budget_guard)
+    record(bg, "2026-01", 1.0)
+    h = record(bg, "2026-01", 1.0)
+    assert h["total_eur"] == 2.0 and bg.BUDGET_FILE.exists()
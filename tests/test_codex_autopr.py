@@ -0,0 +1,81 @@
+import os
+import subprocess
+
+import codex_autopr
+
+DELETE = """\
+--- a/Dockerfile.ci
++++ /dev/null
+@@ -1,2 +0,0 @@
+-FROM unityci/editor
+-RUN true
+"""
+
+EDIT = """\
+--- a/.github/workflows/ci.yml
++++ b/.github/workflows/ci.yml
+@@ -1,1 +1,2 @@
+ name: CI
++on: push
+"""
+
+
+def test_apply_patch_maps_deletion_to_none():
+    files = {"Dockerfile.ci": ("100644", "FROM unityci/editor\nRUN true\n")}
+    changed, rejects = codex_autopr.apply_patch(DELETE, files)
+    assert changed == {"Dockerfile.ci": None}
+    assert rejects == ""
+    changed, rejects = codex_autopr.apply_patch(DELETE, {})
+    assert changed == {}
+    assert "not in HEAD" in rejects
+
+
+def test_commit_removes_deleted_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    subprocess.run(["git", "init", "-q"], check=True)
+    (tmp_path / ".github" / "workflows").mkdir(parents=True)
+    (tmp_path / ".github" / "workflows" / "ci.yml").write_text("name: CI\n")
+    (tmp_path / "Dockerfile.ci").write_text("FROM unityci/editor\nRUN true\n")
+    subprocess.run(["git", "add", "."], check=True)
+    subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "base"], check=True)
+
+    head, files = codex_autopr.read_targets()
+    changed, _ = codex_autopr.apply_patch(DELETE + EDIT, files)
+    codex_autopr.commit(head, files, changed, "tune\n")
+
+    tree = codex_autopr.git("ls-tree", "-r", "--name-only", codex_autopr.BRANCH).decode().split()
+    assert tree == [".github/workflows/ci.yml"]
+    assert codex_autopr.git("show", f"{codex_autopr.BRANCH}:.github/workflows/ci.yml") == b"name: CI\non: push\n"
+
+
+def test_main_pushes_the_branch_and_opens_the_pr(tmp_path, monkeypatch):
+    import llm_http
+
+    remote, work, bin_dir = tmp_path / "remote.git", tmp_path / "work", tmp_path / "bin"
+    subprocess.run(["git", "init", "-q", "--bare", str(remote)], check=True)
+    work.mkdir()
+    monkeypatch.chdir(work)
+    subprocess.run(["git", "init", "-q"], check=True)
+    subprocess.run(["git", "remote", "add", "origin", str(remote)], check=True)
+    (work / ".github" / "workflows").mkdir(parents=True)
+    (work / ".github" / "workflows" / "ci.yml").write_text("name: CI\n")
+    subprocess.run(["git", "add", "."], check=True)
+    subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "base"], check=True)
+    # gh is stubbed on PATH: it records its arguments
+    bin_dir.mkdir()
+    (bin_dir / "gh").write_text(f'#!/bin/sh\necho "$@" > {tmp_path / "gh.args"}\n')
+    (bin_dir / "gh").chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}:{os.environ['PATH']}")
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "k")
+
+    class Client:
+        def respond(self, model, input):
+            return EDIT
+
+    monkeypatch.setattr(llm_http, "OpenAIClient", Client)
+    codex_autopr.main()
+
+    pushed = subprocess.run(["git", "--git-dir", str(remote), "show", f"{codex_autopr.BRANCH}:.github/workflows/ci.yml"],
+                            capture_output=True, check=True).stdout
+    assert pushed == b"name: CI\non: push\n"
+    assert f"--head {codex_autopr.BRANCH}" in (tmp_path / "gh.args").read_text()
@@ -0,0 +1,36 @@
+import json
+
+import cost_ledger
+
+
+def folded(tmp_path, calls, run_id, monkeypatch):
+    monkeypatch.setenv("GITHUB_RUN_ID", run_id)
+    spool = tmp_path / "spool.jsonl"
+    cost_ledger.spool_calls("test", calls, spool)
+    return cost_ledger.fold(tmp_path / "costs.json", spool)
+
+
+def test_runs_are_counted_once_and_local_runs_never(tmp_path, monkeypatch):
+    (tmp_path / "costs.json").write_text(json.dumps({"pricing": {
+        "anthropic": {"claude": {"input_per_1k_tokens": 0.003, "output_per_1k_tokens": 0.015}},
+        "exchange_rate": {"USD_to_EUR": 0.5}}}))
+    call = {"provider": "anthropic", "model": "claude-x", "input_tokens": 1000, "output_tokens": 1000}
+    assert folded(tmp_path, [call], "42", monkeypatch) == {"42": 0.009}
+    folded(tmp_path, [call], "42", monkeypatch)
+    folded(tmp_path, [call], "", monkeypatch)
+    folded(tmp_path, [call], "", monkeypatch)
+    totals = json.loads((tmp_path / "costs.json").read_text())["totals"]
+    assert totals["total_runs"] == 1
+    assert totals["anthropic_input_tokens"] == 4000
+    assert totals["total_cost_eur"] == 0.036
+
+
+def test_lock_stays_out_of_the_config_directory(tmp_path, monkeypatch):
+    config, cache = tmp_path / "config", tmp_path / "cache"
+    config.mkdir()
+    (config / "costs.json").write_text(json.dumps({"pricing": {}}))
+    monkeypatch.setenv("GITHUB_RUN_ID", "7")
+    cost_ledger.spool_minutes("build", 1.0, cache / "spool.jsonl")
+    cost_ledger.fold(config / "costs.json", cache / "spool.jsonl")
+    assert sorted(p.name for p in config.iterdir()) == ["costs.json"]
+    assert (cache / "costs.json.lock").exists()
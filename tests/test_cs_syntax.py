@@ -0,0 +1,59 @@
+import cs_syntax
+
+GOOD = """using UnityEngine;
+namespace Game
+{
+    [RequireComponent(typeof(Rigidbody))]
+    public class Player : MonoBehaviour
+    {
+        public int Hp { get; private set; } = 10;
+        void Update()
+        {
+            if (Hp > 0) { Hp--; }
+            var s = $"hp {Hp} {{braces}}";
+            // } in a comment
+            var c = '}';
+        }
+    }
+}
+"""
+
+
+def messages(src):
+    return [i.message for i in cs_syntax.check_source(src)]
+
+
+def test_valid_source_has_no_issue():
+    assert cs_syntax.check_source(GOOD) == []
+
+
+def test_unclosed_brace():
+    assert any("unclosed '{'" in m for m in messages(GOOD.rstrip()[:-1]))
+
+
+def test_mismatched_bracket():
+    src = "class A { void F() { var x = (1 + 2]; } }"
+    assert any("does not match" in m for m in messages(src))
+
+
+def test_method_outside_type():
+    assert any("method body outside of a type" in m for m in messages("namespace N { void F() { } }"))
+
+
+def test_statement_outside_method():
+    assert any("statement outside of a method" in m for m in messages("class A { if (x) { } }"))
+
+
+def test_unterminated_string_or_if():
+    assert messages('class A { string s = "abc; }')
+    assert any("#if" in m for m in messages("#if UNITY_EDITOR\nclass A { }\n"))
+
+
+def test_cache_remembers_results(tmp_path):
+    cache = cs_syntax.SyntaxCache(tmp_path / "syntax.json")
+    bad = "class A {"
+    first = cache.check(bad)
+    cache.save()
+    again = cs_syntax.SyntaxCache(tmp_path / "syntax.json")
+    assert [str(i) for i in again.check(bad)] == [str(i) for i in first]
+    assert again.hits == 1 and again.misses == 0
@@ -0,0 +1,117 @@
+import json
+import subprocess
+
+import pytest
+
+import fix_loop
+import unity_log
+
+PATCH = """\
+--- a/a.txt
++++ b/a.txt
+@@ -1 +1 @@
+-broken
++fixed
+"""
+
+# stands in for claude_autofix.py: FAKE_RC fails the call, otherwise PATCH is written
+AUTOFIX = f"""\
+import json, os, sys
+args = sys.argv[1:]
+with open(os.environ["FAKE_CALLS"], "a") as f:
+    f.write("call\\n")
+rc = int(os.environ.get("FAKE_RC", "0"))
+if rc:
+    sys.exit(rc)
+with open(args[args.index("--out") + 1], "w") as f:
+    f.write({PATCH!r})
+with open(args[args.index("--meta-out") + 1], "w") as f:
+    json.dump({{"source": "llm", "prompt_key": "k"}}, f)
+"""
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    work = tmp_path / "repo"
+    work.mkdir()
+    monkeypatch.chdir(work)
+    subprocess.run(["git", "init", "-q"], check=True)
+    (work / "a.txt").write_text("broken\n")
+    subprocess.run(["git", "add", "."], check=True)
+    subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "base"], check=True)
+    script = tmp_path / "autofix.py"
+    script.write_text(AUTOFIX)
+    monkeypatch.setattr(fix_loop, "AUTOFIX", script)
+    monkeypatch.setenv("FAKE_CALLS", str(tmp_path / "calls"))
+    monkeypatch.delenv("FAKE_RC", raising=False)
+    compiles = []
+
+    def compile(self, it):
+        # green once the patch is in the tree
+        green = (work / "a.txt").read_text() == "fixed\n"
+        compiles.append(it["n"])
+        it["triage_file"] = self.ckpt.write(f"iter{it['n']}.triage.json", json.dumps(unity_log.Triage().to_json()))
+        it["compile_rc"], it["compile_s"] = (0 if green else 1), 0.1
+        it["verdict"] = "green" if green else "red"
+        it["step"] = "compiled"
+
+    monkeypatch.setattr(fix_loop.FixLoop, "compile", compile)
+    return work, tmp_path / "state", compiles
+
+
+def calls(tmp_path):
+    path = tmp_path / "calls"
+    return len(path.read_text().splitlines()) if path.exists() else 0
+
+
+def loop(state):
+    ckpt = fix_loop.Checkpoint(state)
+    resumed = ckpt.load(fix_loop._git("rev-parse", "HEAD").stdout.strip())
+    return fix_loop.FixLoop(ckpt, "unity", 3, "t", [], abort_early=False), resumed
+
+
+def test_run_fixes_then_stops_green(repo):
+    work, state, compiles = repo
+    lp, resumed = loop(state)
+    assert not resumed
+    assert lp.run() == "green"
+    assert [it["verdict"] for it in lp.ckpt.iterations] == ["red", "green"]
+    assert lp.ckpt.iterations[1]["apply"] == "ok"
+    assert compiles == [0, 1]
+    assert (work / "a.txt").read_text() == "fixed\n"
+
+
+def test_resume_skips_recorded_steps_and_reapplies_patches(repo):
+    work, state, compiles = repo
+    lp, _ = loop(state)
+    for _ in range(3):  # compile, generate, apply; then the run is cancelled
+        lp.step()
+        lp.ckpt.save()
+    assert lp.ckpt.iterations[-1]["step"] == "applied"
+    subprocess.run(["git", "checkout", "-q", "."], check=True)  # fresh checkout of the rerun
+
+    lp, resumed = loop(state)
+    assert resumed
+    assert lp.replay_applied() == 1
+    assert lp.run() == "green"
+    assert compiles == [0, 1]
+    assert calls(work.parent) == 1
+
+
+@pytest.mark.parametrize("rc", [2, 3])
+def test_autofix_failure_is_retried_by_the_next_run(repo, monkeypatch, rc):
+    work, state, compiles = repo
+    monkeypatch.setenv("FAKE_RC", str(rc))
+    lp, _ = loop(state)
+    assert lp.run() == "error"
+    it = lp.ckpt.iterations[-1]
+    assert it["step"] == "failed" and it["autofix_rc"] == rc and "verdict" not in it
+    assert calls(work.parent) == 1
+
+    monkeypatch.delenv("FAKE_RC")
+    lp, resumed = loop(state)
+    assert resumed
+    assert lp.run() == "green"
+    assert len(lp.ckpt.iterations) == 2
+    assert compiles == [0, 1]
+    assert calls(work.parent) == 2
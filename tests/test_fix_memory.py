@@ -0,0 +1,67 @@
+import fix_memory
+import unity_log
+
+LOG = """\
+Assets/Scripts/Core/Player.cs(12,5): error CS0103: The name 'speed' does not exist in the current context
+Assets/Scripts/Core/Player.cs(12,5): error CS0103: The name 'speed' does not exist in the current context
+Assets/Scripts/Net/Lobby.cs(40,9): error CS0246: The type or namespace name 'Lobby' could not be found
+Assets/Scripts/Core/Player.cs(3,1): warning CS0414: The field 'x' is assigned but its value is never used
+Error building Player because scripts had compiler errors
+"""
+
+
+def sigs_of(text):
+    return fix_memory.signatures(unity_log.scan(text.splitlines()))
+
+
+def test_signatures_skip_warnings_and_cascades_and_dedupe():
+    sigs = sigs_of(LOG)
+    assert [(s.kind, s.code, s.file) for s in sigs] == [
+        ("compile", "CS0103", "Assets/Scripts/Core/Player.cs"),
+        ("compile", "CS0246", "Assets/Scripts/Net/Lobby.cs"),
+    ]
+
+
+def test_signature_ignores_line_numbers():
+    moved = LOG.replace("(12,5)", "(57,13)").replace("(40,9)", "(41,9)")
+    assert [s.sig for s in sigs_of(moved)] == [s.sig for s in sigs_of(LOG)]
+
+
+def test_loose_signature_matches_other_files_and_names():
+    a = sigs_of("Assets/A.cs(1,1): error CS0103: The name 'speed' does not exist in the current context")[0]
+    b = sigs_of("Assets/B.cs(9,2): error CS0103: The name 'health' does not exist in the current context")[0]
+    assert a.sig != b.sig and a.loose == b.loose
+
+
+def test_exact_and_similar_lookup(tmp_path):
+    mem = fix_memory.FixMemory(tmp_path / "m.sqlite")
+    try:
+        sigs = sigs_of(LOG)
+        fix_id = mem.record(sigs, "--- a/x\n+++ b/x\n", "declare speed")
+        assert [f.id for f in mem.exact(sigs)] == [fix_id]
+        # same error elsewhere: no exact hit, found by the loose signature
+        other = sigs_of("Assets/B.cs(9,2): error CS0103: The name 'health' does not exist in the current context")
+        assert mem.exact(other) == []
+        assert [f.id for f in mem.similar(other)] == [fix_id]
+        # an exact hit needs the primary (first) error among the recorded ones
+        assert [f.id for f in mem.exact(sigs[1:])] == [fix_id]
+        assert mem.exact(other + sigs) == []
+        mem.demote(fix_id)
+        assert mem.exact(sigs) == []  # failed as often as it worked
+    finally:
+        mem.close()
+
+
+def test_settle_records_on_green_and_demotes_replay(tmp_path):
+    mem = fix_memory.FixMemory(tmp_path / "m.sqlite")
+    pending = tmp_path / "pending.json"
+    try:
+        sigs = sigs_of(LOG)
+        fix_memory.write_pending(sigs, "patch", "t", path=pending)
+        assert fix_memory.settle(True, mem, pending).startswith("Remembered fix #1")
+        fix_memory.write_pending(sigs, "patch", "t", fix_id=1, path=pending)
+        assert fix_memory.settle(False, mem, pending) == "Demoted replayed fix #1"
+        assert fix_memory.settle(False, mem, pending) == "No pending patch"
+        assert mem.stats() == {"fixes": 1, "signatures": 2, "successes": 1, "failures": 1}
+    finally:
+        mem.close()
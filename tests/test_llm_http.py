@@ -0,0 +1,131 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import llm_http
+
+PATCH = "diff --git a/x b/x\n"
+
+
+def sse(*events):
+    return "".join(f"event: {e}\ndata: {json.dumps(d)}\n\n" for e, d in events).encode()
+
+
+FULL = sse(
+    ("message_start", {"type": "message_start", "message": {"usage": {"input_tokens": 3}}}),
+    ("content_block_delta", {"type": "content_block_delta", "delta": {"type": "text_delta", "text": PATCH}}),
+    ("message_delta", {"type": "message_delta", "usage": {"output_tokens": 5}}),
+    ("message_stop", {"type": "message_stop"}),
+)
+TRUNCATED = FULL[:FULL.index(b"event: message_delta")]
+
+
+class Script(BaseHTTPRequestHandler):
+    """Plays one scripted answer per request: (status, headers, body, per-chunk delay, close after)."""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    answers = []
+    seen = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("content-length") or 0))
+        status, headers, body, delay, close = self.answers.pop(0)
+        self.seen.append(status)
+        self.send_response(status)
+        for k, v in headers.items():
+            self.send_header(k, v)
+        if delay:
+            # trickle without a length: the client reads line by line until the server gives up
+            self.send_header("content-type", "text/event-stream")
+            self.send_header("connection", "close")
+            self.end_headers()
+            try:
+                for _ in range(100):
+                    self.wfile.write(b": keep-alive\n")
+                    self.wfile.flush()
+                    time.sleep(delay)
+            except OSError:
+                pass
+            self.close_connection = True
+            return
+        self.send_header("content-type", "text/event-stream")
+        self.send_header("content-length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        # close without announcing it: the client pools a connection that is already dead
+        self.close_connection = close
+
+
+@pytest.fixture
+def server():
+    handler = type("H", (Script,), {"answers": [], "seen": []})
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    srv.daemon_threads = True
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield handler, f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+    srv.server_close()
+
+
+def client(url, **kw):
+    return llm_http.AnthropicClient("test", base_url=url, pool=llm_http.ConnectionPool(),
+                                    limiter=llm_http.RateLimiter(), **kw)
+
+
+def test_429_retry_after_then_success(server, monkeypatch):
+    handler, url = server
+    handler.answers += [(429, {"retry-after": "0.2"}, b"slow down", 0, False), (200, {}, FULL, 0, False)]
+    slept = []
+    monkeypatch.setattr(llm_http.time, "sleep", slept.append)
+    assert client(url).message("m", "hi") == PATCH.strip()
+    assert handler.seen == [429, 200]
+    assert slept == [0.2]
+    assert llm_http.CALLS[-1]["attempts"] == 2 and llm_http.CALLS[-1]["output_tokens"] == 5
+
+
+def test_deadline_covers_a_trickling_stream(server):
+    handler, url = server
+    handler.answers.append((200, {}, b"", 0.1, True))
+    t0 = time.monotonic()
+    with pytest.raises(llm_http.LLMError, match="deadline"):
+        client(url, deadline=0.5, retries=3).message("m", "hi")
+    assert time.monotonic() - t0 < 2
+
+
+def test_truncated_stream_is_retried(server, monkeypatch):
+    handler, url = server
+    handler.answers += [(200, {}, TRUNCATED, 0, True), (200, {}, FULL, 0, False)]
+    monkeypatch.setattr(llm_http.time, "sleep", lambda s: None)
+    assert client(url).message("m", "hi") == PATCH.strip()
+    assert handler.seen == [200, 200]
+
+
+def test_truncated_stream_without_retries_fails(server):
+    handler, url = server
+    handler.answers.append((200, {}, TRUNCATED, 0, True))
+    with pytest.raises(llm_http.LLMError, match="message_stop"):
+        client(url, retries=0).message("m", "hi")
+
+
+def test_stale_pooled_connection_is_not_an_attempt(server):
+    handler, url = server
+    handler.answers += [(200, {}, FULL, 0, True), (200, {}, FULL, 0, False)]
+    c = client(url, retries=0)
+    assert c.message("m", "one") == PATCH.strip()
+    time.sleep(0.1)  # let the server close its end
+    assert c.message("m", "two") == PATCH.strip()
+    assert llm_http.CALLS[-1]["attempts"] == 1
+
+
+def test_non_retryable_status_fails_at_once(server):
+    handler, url = server
+    handler.answers.append((400, {}, b'{"error": "bad"}', 0, False))
+    with pytest.raises(llm_http.LLMError) as e:
+        client(url).message("m", "hi")
+    assert e.value.status == 400 and handler.seen == [400]
@@ -0,0 +1,50 @@
+import re
+
+import nunit_results
+
+
+def results(path, cases):
+    body = "".join(
+        f'<test-case fullname="{name}" classname="{name.rsplit(".", 1)[0]}" result="{res}" duration="{dur}">'
+        + ("<failure><message>boom</message><stack-trace>at X () (at Assets/Tests/T.cs:7)</stack-trace></failure>"
+           if res == "Failed" else "")
+        + "</test-case>"
+        for name, res, dur in cases)
+    path.write_text(f'<test-run><test-suite type="Assembly">{body}</test-suite></test-run>')
+    return str(path)
+
+
+def test_shard_balances_longest_first():
+    shards = nunit_results.shard({"A": 10, "B": 6, "C": 5, "D": 4, "E": 1}, 2)
+    assert [s["items"] for s in shards] == [["A", "D"], ["B", "C", "E"]]
+    assert [s["expected_s"] for s in shards] == [14, 12]
+
+
+def test_filters_cover_every_test_exactly_once():
+    shards = nunit_results.with_filters(nunit_results.shard({"Game.A": 10, "Game.B": 6, "Game.C": 5}, 3))
+    names = ["Game.A.Runs", "Game.B.Runs(1)", "Game.C.Runs", "Game.New.Runs", "Game.AB.Runs"]
+    for name in names:
+        assert sum(bool(re.match(s["filter"], name)) for s in shards) == 1, name
+    # tests missing from the history go to the lightest shard
+    lightest = min(shards, key=lambda s: s["expected_s"])
+    assert re.match(lightest["filter"], "Game.New.Runs")
+
+
+def test_flaky_needs_flips_not_a_red_streak(tmp_path):
+    h = nunit_results.History(tmp_path / "h.json")
+    runs = [("Passed", "Passed", "Passed"), ("Failed", "Passed", "Failed"), ("Passed", "Failed", "Failed")]
+    for i, (a, b, c) in enumerate(runs):
+        h.record("PlayMode", results(tmp_path / f"r{i}.xml", [("G.T.Flaky", a, 1), ("G.T.Broke", b, 1), ("G.T.Late", c, 1)]))
+    assert h.flaky("PlayMode") == {"G.T.Flaky": "PFP"}
+
+
+def test_shards_of_a_run_are_recorded_as_one_run(tmp_path):
+    h = nunit_results.History(tmp_path / "h.json")
+    a = results(tmp_path / "shard0.xml", [("G.A.One", "Passed", 2.0)])
+    b = results(tmp_path / "shard1.xml", [("G.B.Two", "Failed", 3.0)])
+    r = h.record("PlayMode", a, b)
+    h.save()
+    again = nunit_results.History(tmp_path / "h.json")
+    assert again.modes["PlayMode"]["runs"] == 1
+    assert again.durations("PlayMode") == {"G.A": 2.0, "G.B": 3.0}
+    assert r["counts"] == {"Passed": 1, "Failed": 1} and [t.name for t in r["failures"]] == ["G.B.Two"]
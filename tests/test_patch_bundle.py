@@ -0,0 +1,56 @@
+import importlib.util
+import zipfile
+from pathlib import Path
+
+import pytest
+
+MAIN = Path(__file__).resolve().parents[1] / ".patch_bundle_tmp" / "main.py"
+
+
+@pytest.fixture
+def bundle(tmp_path, monkeypatch):
+    spec = importlib.util.spec_from_file_location("patch_bundle_main", MAIN)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    monkeypatch.setattr(mod, "FILES", [("a.yml", 0o644), ("b.png", 0o644), ("c.sh", 0o755)])
+    src = tmp_path / "bundle"
+    src.mkdir()
+    (src / "a.yml").write_text("name: CI\n" * 50)
+    (src / "b.png").write_bytes(bytes(range(256)) * 8)
+    (src / "c.sh").write_text("#!/bin/sh\necho hi\n")
+    return mod, src
+
+
+def build(mod, src, zip_path):
+    old = mod.read_manifest(zip_path)
+    return mod.build_zip(zip_path, src, mod.scan_bundle(src, old), old)
+
+
+def test_zip_updates_only_changed_members(bundle, tmp_path):
+    mod, src = bundle
+    zip_path = tmp_path / "patch_bundle.zip"
+    assert build(mod, src, zip_path) == (3, 0)
+    with zipfile.ZipFile(zip_path) as z:
+        assert z.getinfo("b.png").compress_type == zipfile.ZIP_STORED
+        assert z.getinfo("a.yml").compress_type == zipfile.ZIP_DEFLATED
+    before = zip_path.stat().st_mtime_ns
+    assert build(mod, src, zip_path) == (0, 0) and zip_path.stat().st_mtime_ns == before
+
+    (src / "c.sh").write_text("#!/bin/sh\necho changed\n")
+    assert build(mod, src, zip_path) == (1, 2)
+    with zipfile.ZipFile(zip_path) as z:
+        assert z.testzip() is None
+        assert z.read("c.sh") == b"#!/bin/sh\necho changed\n"
+        assert z.read("a.yml") == (src / "a.yml").read_bytes()
+        assert (z.getinfo("c.sh").external_attr >> 16) & 0o777 == 0o755
+
+
+def test_install_writes_only_differing_files(bundle, tmp_path):
+    mod, src = bundle
+    repo = tmp_path / "repo"
+    entries = mod.scan_bundle(src, {})
+    assert mod.install(repo, src, entries, overwrite=False) == ["a.yml", "b.png", "c.sh"]
+    (repo / "a.yml").write_text("local edit\n")
+    assert mod.install(repo, src, entries, overwrite=False) == []
+    assert mod.install(repo, src, entries, overwrite=True) == ["a.yml"]
+    assert (repo / "c.sh").stat().st_mode & 0o777 == 0o755
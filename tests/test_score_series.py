@@ -0,0 +1,49 @@
+import importlib
+
+import pytest
+
+
+@pytest.fixture
+def ss(tmp_path, monkeypatch):
+    monkeypatch.setenv("SCORE_REPORTS_DIR", str(tmp_path))
+    import score_series
+    return importlib.reload(score_series)
+
+
+def run(ss, total, ts):
+    ss.append({"Total": total}, ts=ts)
+    return ss.assess(ss.load())
+
+
+def history(ss, n=12):
+    for i in range(n):
+        ss.append({"Total": 70.0 + (i % 3 - 1)}, ts=1000 + i)
+
+
+def test_isolated_low_is_not_confirmed(ss):
+    history(ss)
+    r = run(ss, 40.0, 2000)
+    assert r["low"] and not r["confirmed"]
+    assert not run(ss, 70.0, 2001)["low"]
+
+
+def test_rollback_targets_first_low_run(ss, monkeypatch):
+    history(ss)
+    ss.append({"Total": 40.0}, ts=2000)
+    rollback, results = ss.record_and_assess({m: 41.0 for m in ss.METRICS})
+    total = results[-1]
+    assert rollback and total["revert"] == -2 and total["revert_ts"] == 2000
+    s = ss.load()
+    assert [s.flags[i] for i in (-3, -2, -1)] == [0, ss.FLAG_ROLLED_BACK, ss.FLAG_ROLLED_BACK]
+
+
+def test_flagged_runs_keep_the_regression_confirmed(ss):
+    history(ss)
+    ss.append({"Total": 40.0}, ts=2000)
+    ss.append({"Total": 41.0}, ts=2001)
+    ss.set_flags(-2, ss.FLAG_ROLLED_BACK)
+    ss.set_flags(-1, ss.FLAG_ROLLED_BACK)
+    r = run(ss, 42.0, 2002)
+    # the flagged runs stay out of the baseline but still count as low
+    assert r["baseline"] > 65 and r["confirmed"]
+    assert r["revert"] == -1 and r["revert_ts"] == 2002
@@ -0,0 +1,42 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import cs_syntax
+import symbol_index
+import unity_yaml
+
+
+def project(root, name):
+    d = root / "Assets" / "Scripts"
+    d.mkdir(parents=True)
+    (d / f"{name}.cs").write_text(f"public class {name} {{\n    public void Run() {{ }}\n}}\n")
+    return root
+
+
+def test_projects_keep_their_own_index(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    a = project(tmp_path / "a", "Alpha")
+    b = project(tmp_path / "b", "Beta")
+    symbol_index.load(a)
+    symbol_index.load(b)
+    assert (a / symbol_index.INDEX_FILE).exists() and (b / symbol_index.INDEX_FILE).exists()
+    again = symbol_index.SymbolIndex(a).refresh()
+    assert again.stats["reused"] == 1 and "Alpha" in again.by_name()
+
+
+def test_concurrent_saves_do_not_collide(tmp_path):
+    root = project(tmp_path, "Alpha")
+    sym = symbol_index.SymbolIndex(root).refresh()
+    yml = unity_yaml.UnityIndex(root).refresh()
+
+    def save(i):
+        sym.save()
+        yml.save()
+        cache = cs_syntax.SyntaxCache(tmp_path / "syntax.json")
+        cache.check(f"class C{i} {{ }}")
+        cache.save()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(save, range(32)))
+    # every thread's entry survives: saves merge instead of overwriting each other
+    assert len(cs_syntax.SyntaxCache(tmp_path / "syntax.json").entries) == 32
+    assert not list(tmp_path.rglob(".tmp-*"))
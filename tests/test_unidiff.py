@@ -0,0 +1,56 @@
+import pytest
+
+import unidiff
+
+OLD = "a\nb\nc\nd\ne\n"
+
+
+def one(patch):
+    (fp,) = unidiff.parse(patch)
+    return fp
+
+
+def test_apply_with_line_offset():
+    fp = one("--- a/f.txt\n+++ b/f.txt\n@@ -10,3 +10,3 @@\n b\n-c\n+C\n d\n")
+    new, applied, rejected = unidiff.apply_partial(OLD, fp)
+    assert new == "a\nb\nC\nd\ne\n"
+    assert len(applied) == 1 and not rejected
+
+
+def test_mismatched_hunk_is_rejected_others_applied():
+    fp = one("--- a/f.txt\n+++ b/f.txt\n@@ -1,2 +1,2 @@\n-a\n+A\n b\n@@ -4,1 +4,1 @@\n-zzz\n+Z\n")
+    new, applied, rejected = unidiff.apply_partial(OLD, fp)
+    assert new == "A\nb\nc\nd\ne\n"
+    assert [h.old_start for h in rejected] == [4]
+    with pytest.raises(unidiff.PatchError):
+        unidiff.apply_file(OLD, fp)
+
+
+def test_context_matches_up_to_trailing_whitespace():
+    fp = one("--- a/f.txt\n+++ b/f.txt\n@@ -1,2 +1,2 @@\n a\n-b\n+B\n")
+    new, _, rejected = unidiff.apply_partial("a   \nb\n", fp)
+    assert not rejected and new == "a   \nB\n"
+
+
+def test_new_file():
+    fp = one("--- /dev/null\n+++ b/new.cs\n@@ -0,0 +1,2 @@\n+x\n+y\n")
+    assert fp.is_new and fp.path == "new.cs"
+    assert unidiff.apply_file("", fp) == "x\ny\n"
+
+
+def test_deletion():
+    fp = one("--- a/f.txt\n+++ /dev/null\n@@ -1,5 +0,0 @@\n-a\n-b\n-c\n-d\n-e\n")
+    assert fp.is_deleted and fp.path == "f.txt"
+    new, applied, rejected = unidiff.apply_partial(OLD, fp)
+    assert new == "" and len(applied) == 1 and not rejected
+
+
+def test_truncated_hunk_raises():
+    with pytest.raises(unidiff.PatchError):
+        unidiff.parse("--- a/f\n+++ b/f\n@@ -1,3 +1,3 @@\n a\n-b\n")
+
+
+def test_extract_diff_drops_fences_and_prose():
+    text = "Here is the fix:\n```diff\n--- a/f\n+++ b/f\n@@ -1 +1 @@\n-a\n+b\n```\nDone."
+    assert unidiff.extract_diff(text).startswith("--- a/f\n")
+    assert "```" not in unidiff.extract_diff(text)
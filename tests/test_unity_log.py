@@ -0,0 +1,24 @@
+import json
+
+import fix_memory
+import unity_log
+
+LOG = "\n".join(
+    [f"noise {i}" for i in range(50)]
+    + ["Assets/Scripts/Core/Player.cs(12,5): error CS0103: The name 'speed' does not exist in the current context"] * 3
+    + ["NullReferenceException: Object reference not set to an instance of an object",
+       "  at Game.Player.Update () (at Assets/Scripts/Core/Player.cs:40)",
+       "Assets/Scripts/Core/Player.cs(3,1): warning CS0414: The field 'x' is assigned but its value is never used",
+       "Error building Player because scripts had compiler errors"]
+    + [f"shutdown {i}" for i in range(20)]
+)
+
+
+def test_saved_triage_reads_back_identically(tmp_path):
+    t = unity_log.Triage().feed(LOG.splitlines())
+    path = tmp_path / ("iter0" + unity_log.TRIAGE_SUFFIX)
+    path.write_text(json.dumps(t.to_json()))
+    back = unity_log.triage_file(str(path))
+    assert back.lines == t.lines and back.counts() == t.counts()
+    assert back.excerpt() == t.excerpt()
+    assert fix_memory.signatures(back.ranked()) == fix_memory.signatures(t.ranked())